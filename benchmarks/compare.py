@@ -0,0 +1,62 @@
+"""
+Compare two result files of benchmarks/run.py.
+
+    $ python benchmarks/compare.py before.json after.json [--threshold 1.2]
+
+Exits with a non-zero status if any benchmark became slower than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+KEY_FIELDS = ("format", "rows", "columns", "runs", "stage")
+
+
+def _load(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data["metadata"], {
+        tuple(result[k] for k in KEY_FIELDS): result.get("seconds")
+        for result in data["results"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Ratio of after/before above which it is considered a regression.",
+    )
+    args = parser.parse_args()
+
+    before_meta, before = _load(args.before)
+    after_meta, after = _load(args.after)
+    print(f"before: {before_meta.get('commit')}  after: {after_meta.get('commit')}")
+
+    regressed = False
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        if old is None or new is None:
+            continue
+        ratio = new / old if old > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        elif ratio < 1 / args.threshold:
+            flag = "  improved"
+        fmt, rows, columns, runs, stage = key
+        print(
+            f"{fmt:>9} rows={rows:<8} cols={columns:<4} runs={runs:<4} {stage:<18}"
+            f"{old:>10.4f}s {new:>10.4f}s {ratio:>7.2f}x{flag}"
+        )
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
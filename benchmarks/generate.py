@@ -0,0 +1,169 @@
+"""
+Generators of synthetic datasets for the benchmarks. Everything is written offline,
+without tensorboard installed.
+
+    $ python benchmarks/generate.py OUT_DIR --format csv --rows 100000 --columns 8 --runs 4
+"""
+
+import argparse
+import json
+import math
+import random
+import struct
+import time
+from pathlib import Path
+from typing import List
+
+FORMATS = ("csv", "jsonl", "tfevents")
+
+
+def _column_names(n_columns: int) -> List[str]:
+    # a mix of prefixes, such that consolidation has something to group
+    prefixes = ("loss", "eval", "lr", "grad")
+    return [f"{prefixes[i % len(prefixes)]}/metric_{i}" for i in range(n_columns)]
+
+
+def _values(step: int, n_columns: int, rng: random.Random) -> List[float]:
+    return [
+        math.exp(-step / (1000.0 * (i + 1))) + 0.05 * rng.random()
+        for i in range(n_columns)
+    ]
+
+
+############################################################
+# tfevents (TFRecord of Event protobuf)
+############################################################
+def _crc32c_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _crc32c_table()
+
+
+def _masked_crc32c(data: bytes) -> int:
+    crc = 0xFFFFFFFF
+    for b in data:
+        crc = _CRC32C_TABLE[(crc ^ b) & 0xFF] ^ (crc >> 8)
+    crc ^= 0xFFFFFFFF
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(payload)) + payload
+
+
+def _encode_event(wall_time: float, step: int, scalars) -> bytes:
+    summary = b"".join(
+        _length_delimited(
+            1,
+            _length_delimited(1, tag.encode()) + b"\x15" + struct.pack("<f", value),
+        )
+        for tag, value in scalars
+    )
+    event = b"\x09" + struct.pack("<d", wall_time) + b"\x10" + _varint(step)
+    if scalars:
+        event += _length_delimited(5, summary)
+    return event
+
+
+def _encode_record(data: bytes) -> bytes:
+    header = struct.pack("<Q", len(data))
+    return (
+        header
+        + struct.pack("<I", _masked_crc32c(header))
+        + data
+        + struct.pack("<I", _masked_crc32c(data))
+    )
+
+
+############################################################
+def append_rows(path: Path, fmt: str, start: int, n_rows: int, n_columns: int):
+    """Append n_rows (starting at step `start`) to an existing dataset file."""
+    rng = random.Random(start)
+    names = _column_names(n_columns)
+    if fmt == "csv":
+        with open(path, "a") as f:
+            for step in range(start, start + n_rows):
+                values = _values(step, n_columns, rng)
+                f.write(f"{step}," + ",".join(f"{v:.6f}" for v in values) + "\n")
+    elif fmt == "jsonl":
+        with open(path, "a") as f:
+            for step in range(start, start + n_rows):
+                record = {"step": step}
+                for name, value in zip(names, _values(step, n_columns, rng)):
+                    prefix, metric = name.split("/")
+                    record.setdefault(prefix, {})[metric] = value
+                f.write(json.dumps(record) + "\n")
+    elif fmt == "tfevents":
+        t0 = time.time()
+        with open(path, "ab") as f:
+            for step in range(start, start + n_rows):
+                scalars = list(zip(names, _values(step, n_columns, rng)))
+                f.write(_encode_record(_encode_event(t0 + step, step, scalars)))
+    else:
+        raise ValueError(f"Unknown format {fmt}")
+
+
+def generate(out_dir: Path, fmt: str, n_rows: int, n_columns: int, n_runs: int):
+    """
+    Generate a dataset of n_runs runs, each with n_rows rows of n_columns series.
+
+    :return: the path that should be given to termplot, and the data files
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for run in range(n_runs):
+        if fmt == "csv":
+            path = out_dir / f"run_{run}.csv"
+            path.write_text("step," + ",".join(_column_names(n_columns)) + "\n")
+        elif fmt == "jsonl":
+            path = out_dir / f"run_{run}.jsonl"
+            path.write_text("")
+        elif fmt == "tfevents":
+            run_dir = out_dir / f"run_{run}"
+            run_dir.mkdir(exist_ok=True)
+            path = run_dir / f"events.out.tfevents.{int(time.time())}.bench"
+            with open(path, "wb") as f:
+                f.write(_encode_record(_encode_event(time.time(), 0, [])))
+        else:
+            raise ValueError(f"Unknown format {fmt}")
+        append_rows(path, fmt, 0, n_rows, n_columns)
+        files.append(path)
+    target = out_dir
+    if n_runs == 1 and fmt != "tfevents":
+        target = files[0]
+    return target, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+    target, _ = generate(args.out_dir, args.format, args.rows, args.columns, args.runs)
+    print(target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Benchmark suite of termplot's data sources and backends, over synthetic datasets of
+rows x columns x runs. Results are written as json, which can be compared across
+commits with benchmarks/compare.py.
+
+    $ python benchmarks/run.py --output before.json
+    $ python benchmarks/run.py --rows 1000,100000 --runs 1,16 --output after.json
+    $ python benchmarks/compare.py before.json after.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+# never open a window
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+from generate import FORMATS, append_rows, generate  # noqa: E402
+from termplot.main import create_smoother, parser, plot_logic  # noqa: E402
+
+DATA_SOURCE_OF_FORMAT = {"csv": "csv", "jsonl": "jsonl", "tfevents": "tensorboard"}
+STAGES = (
+    "cold_load",
+    "consolidation",
+    "smoothing",
+    "render_plotext",
+    "render_matplotlib",
+    "refresh_append",
+)
+
+
+class StageSkipped(Exception):
+    pass
+
+
+def _int_list(arg):
+    return [int(x) for x in arg.split(",")]
+
+
+def _median_time(fn, repeat, setup=lambda: None):
+    # untimed, e.g. such that lazily imported modules (scipy, matplotlib, ...) are
+    # not timed along with the first repeat
+    fn(setup())
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        fn(state)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _make_args(target, fmt, extra=()):
+    return parser.parse_args(
+        [
+            str(target),
+            "--data-source",
+            DATA_SOURCE_OF_FORMAT[fmt],
+            "--terminal-width",
+            "200",
+            "--terminal-height",
+            "60",
+            "-c",
+            *extra,
+        ]
+    )
+
+
+def _data_source(target, fmt, args):
+    from termplot.main import get_data_source_class
+
+    return get_data_source_class(DATA_SOURCE_OF_FORMAT[fmt])(target, args)
+
+
+def _render(target, fmt, backend, repeat):
+    if backend == "plotext":
+        from termplot.backend.terminal_plot import TerminalPlot as Backend
+
+        extra = ()
+    else:
+        try:
+            from termplot.backend.matplotlib_plot import MatplotlibPlot as Backend
+        except ImportError as e:
+            raise StageSkipped(str(e))
+        extra = ("--as-raw-bytes",)
+    args = _make_args(target, fmt, extra)
+
+    def setup():
+        return _data_source(target, fmt, args)
+
+    def render(data_source):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with contextlib.redirect_stdout(stdout):
+            plot_logic(data_source, Backend(args))
+
+    return _median_time(render, repeat, setup)
+
+
+def run_stage(stage, target, files, fmt, n_rows, n_columns, repeat):
+    args = _make_args(target, fmt)
+    if stage == "cold_load":
+        return _median_time(lambda _: _data_source(target, fmt, args), repeat)
+    if stage == "consolidation":
+        snapshot = _data_source(target, fmt, args).snapshot()
+        return _median_time(lambda _: snapshot.get_consolidated_stats(), repeat)
+    if stage == "smoothing":
+        try:
+            import scipy  # noqa: F401
+        except ImportError as e:
+            raise StageSkipped(str(e))
+        snapshot = _data_source(target, fmt, args).snapshot()
+        figure = snapshot[0]
+        series = [
+            (name, figure.get_series(x="step", y=name)[1])
+            for name in snapshot.get_all_scalar_names()
+            if name != "step"
+        ]
+        smooth_args = _make_args(target, fmt, ("--smooth", "0.05"))
+
+        def smooth(smoother):
+            for name, y in series:
+                smoother(figure.figure_data, name, y)
+
+        # a new smoother (i.e. without any cached result) for every repeat
+        return _median_time(smooth, repeat, lambda: create_smoother(smooth_args))
+    if stage == "render_plotext":
+        return _render(target, fmt, "plotext", repeat)
+    if stage == "render_matplotlib":
+        return _render(target, fmt, "matplotlib", repeat)
+    if stage == "refresh_append":
+        n_new = max(1, n_rows // 100)
+        appended = [n_rows]
+
+        def setup():
+            data_source = _data_source(target, fmt, args)
+            for path in files:
+                append_rows(path, fmt, appended[0], n_new, n_columns)
+            appended[0] += n_new
+            return data_source
+
+        def refresh(data_source):
+            # as each refresh of --follow, i.e. the newly appended rows are read, and
+            # the series to plot are extracted
+            snapshot = data_source.snapshot()
+            for figure in snapshot:
+                for name in figure.get_filtered_scalar_names(
+                    args.whitelist, args.blacklist
+                ):
+                    figure.get_series(x=args.xaxis_type, y=name)
+
+        return _median_time(refresh, repeat, setup)
+    raise ValueError(f"Unknown stage {stage}")
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for module in ("numpy", "pandas", "plotext", "matplotlib", "scipy"):
+        try:
+            versions[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            versions[module] = None
+    return dict(
+        commit=commit,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        timestamp=time.time(),
+        versions=versions,
+    )
+
+
+def main():
+    bench_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    bench_parser.add_argument("--formats", default=",".join(FORMATS))
+    bench_parser.add_argument("--rows", type=_int_list, default=[1000, 20000])
+    bench_parser.add_argument("--columns", type=_int_list, default=[8])
+    bench_parser.add_argument("--runs", type=_int_list, default=[1, 4])
+    bench_parser.add_argument("--stages", default=",".join(STAGES))
+    bench_parser.add_argument("--repeat", type=int, default=3)
+    bench_parser.add_argument("--output", type=str, help="Write results as json.")
+    bench_args = bench_parser.parse_args()
+
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="termplot-bench-") as tmp_dir:
+        for fmt in bench_args.formats.split(","):
+            for n_rows in bench_args.rows:
+                for n_columns in bench_args.columns:
+                    for n_runs in bench_args.runs:
+                        out_dir = Path(tmp_dir) / f"{fmt}-{n_rows}-{n_columns}-{n_runs}"
+                        target, files = generate(
+                            out_dir, fmt, n_rows, n_columns, n_runs
+                        )
+                        for stage in bench_args.stages.split(","):
+                            result = dict(
+                                format=fmt,
+                                rows=n_rows,
+                                columns=n_columns,
+                                runs=n_runs,
+                                stage=stage,
+                            )
+                            try:
+                                result["seconds"] = run_stage(
+                                    stage,
+                                    target,
+                                    files,
+                                    fmt,
+                                    n_rows,
+                                    n_columns,
+                                    bench_args.repeat,
+                                )
+                            except StageSkipped as e:
+                                result["skipped"] = str(e)
+                            results.append(result)
+                            print(
+                                f"{fmt:>9} rows={n_rows:<8} cols={n_columns:<4} "
+                                f"runs={n_runs:<4} {stage:<18} "
+                                + (
+                                    f"{result['seconds']:.4f}s"
+                                    if "seconds" in result
+                                    else f"skipped ({result['skipped']})"
+                                ),
+                                file=sys.stderr,
+                            )
+
+    if bench_args.output:
+        with open(bench_args.output, "w") as f:
+            json.dump(dict(metadata=_metadata(), results=results), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
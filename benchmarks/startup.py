@@ -0,0 +1,139 @@
+"""
+Startup time benchmark of the common termplot command line paths.
+
+Each path is run in a fresh interpreter, and the median wall time is compared
+against its budget. Exits with a non-zero status if any budget is exceeded.
+
+    $ python benchmarks/startup.py [--repeat N] [--scale S]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# modules that must not be imported by merely importing termplot.main
+HEAVY_MODULES = [
+    "numpy",
+    "pandas",
+    "scipy",
+    "loguru",
+    "watchdog",
+    "argcomplete",
+    "plotext",
+    "matplotlib",
+    "tensorboard",
+]
+
+# seconds, measured as the median over all repeats (including interpreter startup)
+BUDGETS = {
+    "import": 0.15,
+    "version": 0.15,
+    "completion": 0.25,
+    "plot-small-csv": 1.5,
+    "plot-small-jsonl": 1.0,
+}
+
+
+def _time_command(cmd, env=None, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            cmd,
+            env=env,
+            cwd=REPO_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def check_heavy_imports():
+    code = (
+        "import sys, json, termplot.main;"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply every budget by this."
+    )
+    parser.add_argument("--output", type=str, help="Write the results as json.")
+    args = parser.parse_args()
+
+    termplot = [sys.executable, "-m", "termplot.main"]
+    tmp_dir = Path(tempfile.mkdtemp(prefix="termplot-bench-"))
+    csv_file = tmp_dir / "small.csv"
+    csv_file.write_text(
+        "step,loss,acc\n"
+        + "".join(f"{i},{1 / (i + 1)},{i / 100}\n" for i in range(100))
+    )
+    jsonl_file = tmp_dir / "small.jsonl"
+    jsonl_file.write_text(
+        "".join(
+            json.dumps({"loss": 1 / (i + 1), "eval": {"acc": i / 100}}) + "\n"
+            for i in range(100)
+        )
+    )
+    plot_flags = ["--terminal-width", "120", "--terminal-height", "40"]
+    completion_env = dict(
+        os.environ,
+        _ARGCOMPLETE="1",
+        COMP_LINE="termplot --ver",
+        COMP_POINT=str(len("termplot --ver")),
+        _ARGCOMPLETE_STDOUT_FILENAME=os.devnull,
+    )
+
+    results = {
+        "import": _time_command(
+            [sys.executable, "-c", "import termplot.main"], repeat=args.repeat
+        ),
+        "version": _time_command(termplot + ["--version"], repeat=args.repeat),
+        "completion": _time_command(termplot, env=completion_env, repeat=args.repeat),
+        "plot-small-csv": _time_command(
+            termplot + [str(csv_file)] + plot_flags, repeat=args.repeat
+        ),
+        "plot-small-jsonl": _time_command(
+            termplot + [str(jsonl_file)] + plot_flags, repeat=args.repeat
+        ),
+    }
+    heavy_imports = check_heavy_imports()
+    shutil.rmtree(tmp_dir)
+
+    failed = False
+    print(f"{'path':<20}{'median (s)':>12}{'budget (s)':>12}")
+    for name, elapsed in results.items():
+        budget = BUDGETS[name] * args.scale
+        over = elapsed > budget
+        failed |= over
+        print(f"{name:<20}{elapsed:>12.3f}{budget:>12.3f}{'  OVER' if over else ''}")
+    if heavy_imports:
+        failed = True
+        print(f"importing termplot.main loaded heavy modules: {heavy_imports}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(timings=results, heavy_imports=heavy_imports), f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,14 +33,16 @@ setup(
         "tensorboard>=2.5",
         "plotext==5.2.8",
         "loguru",
-        "mock",
         "pandas",
         "numpy",
         "scipy",
         "argcomplete",
         "watchdog",
     ],
-    extras_require={"matplotlib-backend": ["matplotlib", "pillow"]},
+    extras_require={
+        "matplotlib-backend": ["matplotlib", "pillow"],
+        "fast-json": ["orjson"],
+    },
     entry_points={
         "console_scripts": [
             "termplot=termplot.main:run",
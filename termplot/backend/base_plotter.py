@@ -2,6 +2,7 @@ import argparse
 import inspect
 import time
 from abc import ABCMeta, abstractmethod
+from typing import Optional
 
 
 class UnsupportedOption(NotImplementedError):
@@ -18,6 +19,10 @@ class Plotter(metaclass=ABCMeta):
         self.args = args
         self.n_row = None
         self.n_col = None
+        # fingerprint of what was last shown, and the number of refreshes that were
+        # skipped since nothing had changed
+        self.rendered_fingerprint = None
+        self.n_skipped_frames = 0
         for opt in self.unsupported_options:
             if opt in args and getattr(args, opt) not in [None, False]:
                 self.raise_not_supported_option(f"--{opt}")
@@ -166,17 +171,47 @@ class Plotter(metaclass=ABCMeta):
         while True:
             yield from self.fixed_color_seq
 
+    def use_cached_subplot(self, fingerprint: Optional[bytes]) -> bool:
+        """
+        Called after ``target_subplot``. If the backend had cached the rendering of
+        the current subplot with the same fingerprint (see subplot_fingerprint), it
+        re-uses it, and nothing is plotted on the subplot in this frame.
+
+        :return: whether the cached rendering is used
+        """
+        return False
+
     def close(self):
         pass
 
+    def teardown(self):
+        """Called once when termplot exits, e.g. to restore the terminal."""
+        pass
+
+    def get_subplot_pixel_width(self, n_col: int) -> Optional[int]:
+        """
+        The number of horizontal points that a subplot can display (when there are
+        n_col columns of subplots), which is used to downsample series before
+        plotting. None denotes unknown.
+        """
+        return None
+
     def get_colors(self):
         if self.args.no_iter_color:
             return self.fixed_color_seq
         else:
             return self.generator_color_seq
 
-    def sleep(self):
-        time.sleep(self.args.interval)
+    def sleep(self, since: Optional[float] = None):
+        """
+        Sleep for --interval seconds, or till --interval seconds after `since` (a
+        time.monotonic() timestamp), i.e. to rate limit the refreshes.
+        """
+        duration = self.args.interval
+        if since is not None:
+            duration -= time.monotonic() - since
+        if duration > 0:
+            time.sleep(duration)
 
     def raise_not_supported_option(self, option_str):
         print(
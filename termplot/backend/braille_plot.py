@@ -0,0 +1,727 @@
+"""
+A plotting backend that rasterizes with numpy, into a grid of braille characters
+(2x4 dots per character, with one color per character) or half blocks (1x2 dots
+per character, with a color per dot). Unlike plotext, whole series are drawn as
+arrays, hence it stays fast with hundreds of thousands of points per subplot. All
+subplots are composed into one buffer, which is written at once.
+"""
+
+import math
+import shutil
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from termplot.profiling import profiler
+from .base_plotter import Plotter, PlottingError
+from .frame_writer import TerminalFrameWriter
+
+MARKERS = ("braille", "halfblock")
+
+# the 256-color codes of the named colors
+_NAMED_COLORS = {
+    "black": 0,
+    "red": 1,
+    "green": 2,
+    "yellow": 3,
+    "blue": 4,
+    "magenta": 5,
+    "cyan": 6,
+    "white": 7,
+    "gray": 8,
+    "grey": 8,
+    "orange": 208,
+}
+# the bit of each dot (row, col) within a braille character
+_BRAILLE_BITS = ((0x01, 0x08), (0x02, 0x10), (0x04, 0x20), (0x40, 0x80))
+_BRAILLE_CHARS = np.array([" "] + [chr(0x2800 + i) for i in range(1, 256)])
+# the (columns, rows) of dots of a character
+_DOTS_PER_CHAR = {"braille": (2, 4), "halfblock": (1, 2)}
+# the approximate number of characters between ticks
+_X_TICK_SPACING = 14
+_Y_TICK_SPACING = 4
+# round periods of time (in seconds) between datetime ticks
+_DATETIME_STEPS = (
+    *(1, 2, 5, 10, 15, 30),
+    *(60 * m for m in (1, 2, 5, 10, 15, 30)),
+    *(3600 * h for h in (1, 2, 3, 6, 12)),
+    *(86400 * d for d in (1, 2, 7, 14)),
+)
+# segments are clipped slightly within the edges of the canvas
+_CLIP_MARGIN = 1e-6
+
+
+@lru_cache(maxsize=None)
+def parse_color(color) -> Optional[str]:
+    """
+    The SGR parameters (i.e. what follows 38 or 48) of a color, which is either a
+    name, a 256-color code or '#rrggbb'. None denotes the default color.
+    """
+    from loguru import logger
+
+    if color is None:
+        return None
+    color = str(color).strip().lower()
+    if color in _NAMED_COLORS:
+        return f"5;{_NAMED_COLORS[color]}"
+    if color.isdigit() and int(color) < 256:
+        return f"5;{color}"
+    if color.startswith("#") and len(color) == 7:
+        try:
+            r, g, b = (int(color[i : i + 2], 16) for i in (1, 3, 5))
+        except ValueError:
+            pass
+        else:
+            return f"2;{r};{g};{b}"
+    logger.warning("Unknown color '{}'; using the default color instead", color)
+    return None
+
+
+def _as_float(values) -> Tuple[np.ndarray, bool]:
+    """The values as floats, and whether they are datetimes (as epoch seconds)."""
+    values = np.asarray(values)
+    if values.dtype.kind == "O":
+        try:
+            values = values.astype(np.float64)
+        except (TypeError, ValueError):
+            values = values.astype("datetime64[ns]")
+    if values.dtype.kind == "M":
+        nat = np.isnat(values)
+        seconds = values.astype("datetime64[ns]").astype(np.int64) / 1e9
+        seconds[nat] = np.nan
+        return seconds, True
+    if values.dtype.kind == "m":
+        return values.astype("timedelta64[ns]").astype(np.int64) / 1e9, False
+    return values.astype(np.float64, copy=False), False
+
+
+def _transform(values: np.ndarray, scale: str) -> np.ndarray:
+    if scale == "log":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(values > 0, np.log10(values), np.nan)
+    if scale == "symlog":
+        # linear within [-1, 1], and logarithmic beyond
+        magnitude = np.abs(values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            magnitude = np.where(magnitude > 1, 1 + np.log10(magnitude), magnitude)
+        return np.sign(values) * magnitude
+    return values
+
+
+def _inverse_transform(value: float, scale: str) -> float:
+    if scale == "log":
+        return 10**value
+    if scale == "symlog" and abs(value) > 1:
+        return math.copysign(10 ** (abs(value) - 1), value)
+    return value
+
+
+def _nice_ticks(
+    lo: float, hi: float, max_ticks: int, integer: bool = False, datetime: bool = False
+) -> Tuple[np.ndarray, float]:
+    """
+    Round tick values (multiples of 1, 2, 2.5 or 5 times a power of 10), or
+    integers if ``integer`` is set (e.g. decades of a log scale), or round periods of
+    time if ``datetime`` is set (i.e. the values are epoch seconds).
+    """
+    raw_step = (hi - lo) / max(max_ticks - 1, 1)
+    if integer:
+        step = max(math.ceil(raw_step), 1)
+    elif datetime and raw_step <= _DATETIME_STEPS[-1]:
+        step = next(step for step in _DATETIME_STEPS if step >= raw_step)
+    else:
+        magnitude = 10 ** math.floor(math.log10(raw_step))
+        step = next(
+            m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step
+        )
+    ticks = np.arange(math.ceil(lo / step) * step, hi + step * 1e-9, step)
+    if len(ticks) == 0:
+        # a narrow range that is between two round values
+        return np.array([lo, hi]), hi - lo
+    return ticks, step
+
+
+def _format_ticks(ticks: np.ndarray, step: float, scale: str, datetime: bool):
+    if datetime:
+        unit = "D" if step >= 86400 else "s"
+        labels = np.datetime_as_string(
+            np.rint(ticks).astype(np.int64).astype("datetime64[s]"), unit=unit
+        )
+        return [label if unit == "D" else label[11:] for label in labels]
+    if scale != "linear":
+        return [f"{_inverse_transform(t, scale):.3g}" for t in ticks]
+    if max(abs(ticks[0]), abs(ticks[-1])) >= 1e6 or step < 1e-4:
+        return [f"{t:.3g}" for t in ticks]
+    # just enough decimals to distinguish the ticks
+    decimals = next(
+        (d for d in range(6) if abs(round(step, d) - step) < step * 1e-6), 6
+    )
+    # + 0.0 avoids '-0'
+    return [f"{round(t, decimals) + 0.0:.{decimals}f}" for t in ticks]
+
+
+def _clip_segments(x0, y0, x1, y1, width: int, height: int):
+    """
+    Clip segments to the canvas (Liang-Barsky), and drop those that are outside of
+    it. The canvas extends to the edges of its outer dots, but not as far as
+    rounding to the next dot.
+    """
+    lo = -0.5 + _CLIP_MARGIN
+    x_hi = width - 0.5 - _CLIP_MARGIN
+    y_hi = height - 0.5 - _CLIP_MARGIN
+    dx = x1 - x0
+    dy = y1 - y0
+    t0 = np.zeros_like(x0)
+    t1 = np.ones_like(x0)
+    keep = np.ones(len(x0), dtype=bool)
+    for p, q in ((-dx, x0 - lo), (dx, x_hi - x0), (-dy, y0 - lo), (dy, y_hi - y0)):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = q / p
+        # parallel to the edge, and beyond it
+        keep &= ~((p == 0) & (q < 0))
+        t0 = np.where(p < 0, np.maximum(t0, t), t0)
+        t1 = np.where(p > 0, np.minimum(t1, t), t1)
+    keep &= t0 <= t1
+    x0, y0, dx, dy, t0, t1 = (a[keep] for a in (x0, y0, dx, dy, t0, t1))
+    return x0 + t0 * dx, y0 + t0 * dy, x0 + t1 * dx, y0 + t1 * dy
+
+
+def rasterize(
+    x: np.ndarray, y: np.ndarray, width: int, height: int, lines: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The dots (columns, rows) of the given points (in dot coordinates, where y grows
+    upwards), which are joined by straight segments if ``lines`` is set. Dots
+    outside of the canvas are dropped.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    inside = finite & (x > -0.5) & (x < width - 0.5) & (y > -0.5) & (y < height - 0.5)
+    xs = [np.rint(x[inside])]
+    ys = [np.rint(y[inside])]
+    if lines and len(x) > 1:
+        # segments are drawn between the dots of their ends, hence those within a
+        # dot are no-ops (which is the case for most, when the series is dense)
+        x_dots = np.rint(x)
+        y_dots = np.rint(y)
+        drawn = (
+            finite[:-1]
+            & finite[1:]
+            & ((x_dots[:-1] != x_dots[1:]) | (y_dots[:-1] != y_dots[1:]))
+        )
+        within = drawn & inside[:-1] & inside[1:]
+        # the others are clipped to the canvas
+        crossing = np.flatnonzero(drawn & ~within)
+        within = np.flatnonzero(within)
+        x0, y0, x1, y1 = (
+            np.rint(a)
+            for a in _clip_segments(
+                x[crossing],
+                y[crossing],
+                x[crossing + 1],
+                y[crossing + 1],
+                width,
+                height,
+            )
+        )
+        # where the clipped segments enter the canvas
+        xs.append(x0)
+        ys.append(y0)
+        x0 = np.concatenate([x_dots[within], x0])
+        y0 = np.concatenate([y_dots[within], y0])
+        dx = np.concatenate([x_dots[within + 1], x1]) - x0
+        dy = np.concatenate([y_dots[within + 1], y1]) - y0
+        # one dot per step along the major axis of each segment, where the first
+        # end is one of the points
+        n = np.maximum(np.abs(dx), np.abs(dy)).astype(np.int64)
+        segment = np.repeat(np.arange(len(n)), n)
+        t = (np.arange(1, n.sum() + 1) - np.repeat(np.cumsum(n) - n, n)) / n[segment]
+        xs.append(np.rint(x0[segment] + t * dx[segment]))
+        ys.append(np.rint(y0[segment] + t * dy[segment]))
+    cols = np.concatenate(xs).astype(np.int64)
+    rows = height - 1 - np.concatenate(ys).astype(np.int64)
+    return cols, rows
+
+
+class _Grid:
+    """
+    A grid of characters, with the (palette indices of the) colors of each.
+
+    :param previous: the grid of the previous frame, whose palette is shared (such
+        that the cells of both are comparable)
+    """
+
+    def __init__(self, height: int, width: int, previous: Optional["_Grid"] = None):
+        self.chars = np.full((height, width), " ", dtype="<U1")
+        self.fg = np.zeros((height, width), dtype=np.int32)
+        self.bg = np.zeros((height, width), dtype=np.int32)
+        # the rendered text of every row
+        self.lines: List[str] = []
+        if previous is None:
+            # palette index -> SGR color parameters, where 0 is the default color
+            self._palette: List[Optional[str]] = [None]
+            self._indices: Dict[Optional[str], int] = {None: 0}
+        else:
+            self._palette = previous._palette
+            self._indices = previous._indices
+
+    def color(self, color) -> int:
+        sgr = parse_color(color)
+        if sgr not in self._indices:
+            self._indices[sgr] = len(self._palette)
+            self._palette.append(sgr)
+        return self._indices[sgr]
+
+    def text(self, row: int, col: int, text: str, fg: int, max_col: int) -> None:
+        text = text[: max(max_col - col, 0)]
+        if not text or not 0 <= row < len(self.chars):
+            return
+        self.chars[row, col : col + len(text)] = list(text)
+        self.fg[row, col : col + len(text)] = fg
+
+    def _sgr(self, fg: int, bg: int) -> str:
+        params = "0"
+        if fg:
+            params += ";38;" + self._palette[fg]
+        if bg:
+            params += ";48;" + self._palette[bg]
+        return f"\x1b[{params}m"
+
+    def _render_line(self, row: int, colorless: bool) -> str:
+        chars, fg, bg = self.chars[row], self.fg[row], self.bg[row]
+        if colorless:
+            return "".join(chars).rstrip()
+        # runs of characters with the same colors
+        style = fg.astype(np.int64) * len(self._palette) + bg
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(style)) + 1])
+        ends = np.concatenate([starts[1:], [len(chars)]])
+        line = "".join(
+            # the line starts with the default colors
+            ("" if a == 0 and not fg[a] and not bg[a] else self._sgr(fg[a], bg[a]))
+            + "".join(chars[a:b])
+            for a, b in zip(starts.tolist(), ends.tolist())
+        )
+        return line + "\x1b[0m"
+
+    def render(self, colorless: bool, previous: Optional["_Grid"] = None) -> str:
+        """
+        :param previous: the grid of the previous frame (with the same palette), whose
+            rendered rows are re-used where the cells are unchanged
+        """
+        dirty = np.ones(len(self.chars), dtype=bool)
+        if previous is not None and previous.chars.shape == self.chars.shape:
+            dirty = (
+                (self.chars != previous.chars).any(axis=1)
+                | (self.fg != previous.fg).any(axis=1)
+                | (self.bg != previous.bg).any(axis=1)
+            )
+        self.lines = [
+            self._render_line(row, colorless) if is_dirty else previous.lines[row]
+            for row, is_dirty in enumerate(dirty)
+        ]
+        return "\n".join(self.lines)
+
+
+class _Subplot:
+    def __init__(self):
+        self.title = None
+        self.xlabel = None
+        self.ylabel = None
+        self.xscale = "linear"
+        self.yscale = "linear"
+        self.xlim = None
+        self.ylim = None
+        self.x_datetime = False
+        # (x, y, label, color, is line)
+        self.lines = []
+        # the key of its rendering in the cache, and whether that is re-used
+        self.cache_key = None
+        self.cached = False
+
+
+class _Axis:
+    """The range (in transformed values) and the ticks of an axis of a subplot."""
+
+    def __init__(self, values, limits, scale: str, datetime: bool, max_ticks: int):
+        lo = hi = None
+        if limits is not None:
+            lo, hi = _transform(np.asarray(limits, dtype=np.float64), scale)
+        finite = [v[np.isfinite(v)] for v in values]
+        finite = [v for v in finite if len(v)]
+        if lo is None or not np.isfinite(lo):
+            lo = min(v.min() for v in finite) if finite else 0.0
+        if hi is None or not np.isfinite(hi):
+            hi = max(v.max() for v in finite) if finite else 1.0
+        if hi <= lo:
+            lo, hi = lo - 0.5, lo + 0.5
+        self.lo = lo
+        self.hi = hi
+        # ticks of a log scale are at whole decades, if it spans any
+        self.ticks, step = _nice_ticks(
+            lo,
+            hi,
+            max_ticks,
+            integer=scale != "linear" and hi - lo >= 1,
+            datetime=datetime,
+        )
+        self.labels = _format_ticks(self.ticks, step, scale, datetime)
+
+    def to_dots(self, values: np.ndarray, n_dots: int) -> np.ndarray:
+        return (values - self.lo) * ((n_dots - 1) / (self.hi - self.lo))
+
+
+# noinspection SpellCheckingInspection
+class BraillePlot(Plotter):
+    def __init__(self, args):
+        super().__init__(args)
+        if args.marker not in MARKERS:
+            raise ValueError(f"Unknown marker {args.marker}")
+        self.marker = args.marker
+        self._fixed_color_seq = [
+            "blue",
+            "red",
+            "magenta",
+            "green",
+            "orange",
+            "cyan",
+            "black",
+            "white",
+            "gray",
+        ]
+        # do not use the color sequence that's same as the canvas
+        if self.args.canvas_color in self._fixed_color_seq:
+            self._fixed_color_seq.remove(self.args.canvas_color)
+        self._subplots: Dict[Tuple[int, int], _Subplot] = {}
+        self.cur = None
+        self._cur_pos = None
+        # the (width, height) of the figure, which is fixed once the subplots are
+        # created
+        self._size = None
+        # the grid of the previous frame
+        self._grid: Optional[_Grid] = None
+        # (row, col) -> the key and the cells (chars, fg, bg) of the rendered subplot
+        self._cache: Dict[Tuple[int, int], Tuple] = {}
+        # when following, frames are repainted in-place (only the changed lines)
+        self._frame_writer = None
+        if self.args.follow and sys.stdout.isatty():
+            self._frame_writer = TerminalFrameWriter(sys.stdout)
+
+    @property
+    def unsupported_options(self):
+        return ["as_raw_bytes"]
+
+    def _add(self, x, y, label, color, is_line: bool):
+        x, self.cur.x_datetime = _as_float(x)
+        y, _ = _as_float(y)
+        self.cur.lines.append((x, y, label, color, is_line))
+
+    def plot(self, x, y, label=None, color=None, **kwargs):
+        self._add(x, y, label, color, True)
+
+    def scatter(self, x, y, label=None, color=None, **kwargs):
+        self._add(x, y, label, color, False)
+
+    def xlabel(self, xlabel, **kwargs):
+        # only add xlabel to the bottom subplot
+        if kwargs["cur_row"] == self.n_row:
+            self.cur.xlabel = xlabel
+
+    def ylabel(self, ylabel, **kwargs):
+        self.cur.ylabel = ylabel
+
+    def xlim(self, row, col, limits):
+        self.cur.xlim = limits
+
+    def ylim(self, row, col, limits):
+        self.cur.ylim = limits
+
+    def xlog(self):
+        self.cur.xscale = "log"
+
+    def ylog(self):
+        self.cur.yscale = "log"
+
+    def xsymlog(self):
+        self.cur.xscale = "symlog"
+
+    def ysymlog(self):
+        self.cur.yscale = "symlog"
+
+    # the colors and the flags below are read from args when the frame is drawn
+    def canvas_color(self):
+        pass
+
+    def axes_color(self):
+        pass
+
+    def ticks_color(self):
+        pass
+
+    def grid(self):
+        pass
+
+    def plotsize(self):
+        pass
+
+    def colorless(self):
+        pass
+
+    def target_subplot(self, row, col):
+        if not (1 <= row <= self.n_row and 1 <= col <= self.n_col):
+            raise PlottingError(f"Subplot ({row}, {col}) is out of the grid")
+        self.cur = self._subplots.setdefault((row, col), _Subplot())
+        self._cur_pos = (row, col)
+
+    def create_subplot(self, row, col):
+        super().create_subplot(row, col)
+        self._subplots = {}
+        self._size = self._figure_size()
+
+    def _region(self, row: int, col: int) -> Tuple[int, int, int, int]:
+        """The (top, left, height, width) of a subplot; the figure is split evenly."""
+        width, height = self._size
+        top, bottom = height * (row - 1) // self.n_row, height * row // self.n_row
+        left, right = width * (col - 1) // self.n_col, width * col // self.n_col
+        return top, left, bottom - top, right - left
+
+    def use_cached_subplot(self, fingerprint):
+        if fingerprint is None:
+            return False
+        # the rendering also depends on the size of the subplot, and on whether it
+        # shows the xlabel
+        key = (
+            fingerprint,
+            self._region(*self._cur_pos),
+            self._cur_pos[0] == self.n_row,
+        )
+        self.cur.cache_key = key
+        cached = self._cache.get(self._cur_pos)
+        self.cur.cached = cached is not None and cached[0] == key
+        return self.cur.cached
+
+    def set_title(self, title):
+        self.cur.title = title
+
+    def clear_current_figure(self):
+        self._subplots = {}
+        self.cur = None
+
+    def clear_terminal_printed_lines(self):
+        if self._frame_writer is not None:
+            self._frame_writer.invalidate()
+        else:
+            sys.stdout.write("\x1b[H\x1b[2J")
+
+    def _figure_size(self) -> Tuple[int, int]:
+        if self.args.plotsize:
+            return (
+                self.args.plotsize[0] * self.n_col,
+                self.args.plotsize[1] * self.n_row,
+            )
+        terminal_size = shutil.get_terminal_size()
+        width = self.args.terminal_width or terminal_size.columns
+        # leave the last line for the cursor, such that the screen does not scroll
+        height = self.args.terminal_height or terminal_size.lines - 1
+        return width, height
+
+    def build(self) -> str:
+        width, height = self._size
+        grid = _Grid(height, width, previous=self._grid)
+        cache = {}
+        for pos, subplot in self._subplots.items():
+            top, left, height, width = self._region(*pos)
+            area = (slice(top, top + height), slice(left, left + width))
+            if subplot.cached:
+                key, chars, fg, bg = cache[pos] = self._cache[pos]
+                grid.chars[area], grid.fg[area], grid.bg[area] = chars, fg, bg
+                continue
+            self._draw_subplot(grid, subplot, top, left, height, width)
+            if subplot.cache_key is not None:
+                cache[pos] = (
+                    subplot.cache_key,
+                    grid.chars[area].copy(),
+                    grid.fg[area].copy(),
+                    grid.bg[area].copy(),
+                )
+        # only the subplots of this frame are kept
+        self._cache = cache
+        canvas = grid.render(self.args.colorless, previous=self._grid)
+        self._grid = grid
+        return canvas
+
+    def _draw_subplot(
+        self,
+        grid: _Grid,
+        subplot: _Subplot,
+        top: int,
+        left: int,
+        height: int,
+        width: int,
+    ) -> None:
+        right = left + width
+        ticks_fg = grid.color(self.args.ticks_color)
+        grid.bg[top : top + height, left:right] = grid.color(self.args.axes_color)
+        if subplot.title is not None:
+            title = subplot.title[:width]
+            grid.text(top, left + (width - len(title)) // 2, title, ticks_fg, right)
+            top += 1
+            height -= 1
+        if subplot.ylabel:
+            grid.text(top, left, subplot.ylabel, ticks_fg, right)
+            top += 1
+            height -= 1
+        # the x axis, its tick labels and its label are below the canvas
+        plot_height = height - 2 - (1 if subplot.xlabel else 0)
+        if plot_height < 1:
+            raise PlottingError("The terminal is too small to plot")
+
+        lines = subplot.lines
+        y_axis = _Axis(
+            [_transform(y, subplot.yscale) for _, y, _, _, _ in lines],
+            subplot.ylim,
+            subplot.yscale,
+            False,
+            plot_height // _Y_TICK_SPACING + 2,
+        )
+        # the y tick labels are on the left of the axis
+        margin = max(len(label) for label in y_axis.labels) + 1
+        plot_left = left + margin
+        plot_width = width - margin - 1
+        if plot_width < 1:
+            raise PlottingError("The terminal is too small to plot")
+        x_axis = _Axis(
+            [_transform(x, subplot.xscale) for x, _, _, _, _ in lines],
+            subplot.xlim,
+            subplot.xscale,
+            subplot.x_datetime,
+            plot_width // _X_TICK_SPACING + 2,
+        )
+
+        # rasterize every line into a canvas of dots, which holds the (1-based)
+        # index of the line that was drawn last
+        dots_x, dots_y = _DOTS_PER_CHAR[self.marker]
+        n_dots_x = plot_width * dots_x
+        n_dots_y = plot_height * dots_y
+        canvas = np.zeros((n_dots_y, n_dots_x), dtype=np.int32)
+        line_colors = np.zeros(len(lines) + 1, dtype=np.int32)
+        for i, (x, y, _, color, is_line) in enumerate(lines):
+            cols, rows = rasterize(
+                x_axis.to_dots(_transform(x, subplot.xscale), n_dots_x),
+                y_axis.to_dots(_transform(y, subplot.yscale), n_dots_y),
+                n_dots_x,
+                n_dots_y,
+                is_line,
+            )
+            canvas[rows, cols] = i + 1
+            line_colors[i + 1] = grid.color(color)
+
+        area = (slice(top, top + plot_height), slice(plot_left, plot_left + plot_width))
+        canvas_bg = grid.color(self.args.canvas_color)
+        grid.bg[area] = canvas_bg
+        if self.marker == "braille":
+            bits = np.zeros((plot_height, plot_width), dtype=np.int64)
+            owner = np.zeros((plot_height, plot_width), dtype=np.int32)
+            for r, row_bits in enumerate(_BRAILLE_BITS):
+                for c, bit in enumerate(row_bits):
+                    dots = canvas[r::4, c::2]
+                    bits |= (dots > 0) * bit
+                    np.maximum(owner, dots, out=owner)
+            grid.chars[area] = _BRAILLE_CHARS[bits]
+            grid.fg[area] = line_colors[owner]
+        else:
+            upper = canvas[0::2]
+            lower = canvas[1::2]
+            both = (upper > 0) & (lower > 0)
+            same = both & (line_colors[upper] == line_colors[lower])
+            chars = np.where(upper > 0, "▀", np.where(lower > 0, "▄", " "))
+            grid.chars[area] = np.where(same, "█", chars)
+            grid.fg[area] = np.where(upper > 0, line_colors[upper], line_colors[lower])
+            grid.bg[area] = np.where(both & ~same, line_colors[lower], canvas_bg)
+
+        # the rows and columns of the ticks (within the canvas)
+        tick_rows = (
+            n_dots_y - 1 - np.rint(y_axis.to_dots(y_axis.ticks, n_dots_y)).astype(int)
+        ) // dots_y
+        tick_cols = (
+            np.rint(x_axis.to_dots(x_axis.ticks, n_dots_x)).astype(int) // dots_x
+        )
+        if self.args.grid:
+            for tick_row in tick_rows:
+                empty = grid.chars[top + tick_row, area[1]] == " "
+                grid.chars[top + tick_row, area[1]][empty] = "┈"
+                grid.fg[top + tick_row, area[1]][empty] = ticks_fg
+            for tick_col in tick_cols:
+                empty = grid.chars[area[0], plot_left + tick_col] == " "
+                grid.chars[area[0], plot_left + tick_col][empty] = "┊"
+                grid.fg[area[0], plot_left + tick_col][empty] = ticks_fg
+
+        # the y axis, with the tick labels right-aligned on its left
+        axis_col = plot_left - 1
+        grid.chars[area[0], axis_col] = "│"
+        grid.fg[area[0], axis_col] = ticks_fg
+        for tick_row, label in zip(tick_rows, y_axis.labels):
+            grid.chars[top + tick_row, axis_col] = "┤"
+            grid.text(top + tick_row, axis_col - len(label), label, ticks_fg, right)
+
+        # the x axis, with the tick labels centred below the ticks
+        axis_row = top + plot_height
+        grid.chars[axis_row, axis_col] = "└"
+        grid.chars[axis_row, area[1]] = "─"
+        grid.fg[axis_row, axis_col : plot_left + plot_width] = ticks_fg
+        label_end = left - 1
+        for tick_col, label in zip(tick_cols, x_axis.labels):
+            grid.chars[axis_row, plot_left + tick_col] = "┬"
+            label_col = max(plot_left + tick_col - len(label) // 2, left)
+            if label_col > label_end and label_col + len(label) <= right:
+                grid.text(axis_row + 1, label_col, label, ticks_fg, right)
+                label_end = label_col + len(label)
+        if subplot.xlabel:
+            xlabel = subplot.xlabel[:plot_width]
+            grid.text(
+                axis_row + 2,
+                plot_left + (plot_width - len(xlabel)) // 2,
+                xlabel,
+                ticks_fg,
+                right,
+            )
+
+        # the legend is at the top-right corner of the canvas
+        labelled = [(label, color) for _, _, label, color, _ in lines if label]
+        legend_width = max((len(label) + 2 for label, _ in labelled), default=0)
+        legend_col = max(plot_left + plot_width - legend_width, plot_left)
+        legend_area = (
+            slice(top, top + min(len(labelled), plot_height)),
+            slice(legend_col, plot_left + plot_width),
+        )
+        grid.chars[legend_area] = " "
+        grid.bg[legend_area] = canvas_bg
+        for i, (label, color) in enumerate(labelled[:plot_height]):
+            grid.text(top + i, legend_col, "▬ ", grid.color(color), right)
+            grid.text(top + i, legend_col + 2, label, ticks_fg, right)
+
+    def show(self):
+        with profiler.stage("build"):
+            canvas = self.build()
+        with profiler.stage("write"):
+            if self._frame_writer is not None:
+                self._frame_writer.write(canvas)
+            else:
+                sys.stdout.write(canvas + "\n")
+                sys.stdout.flush()
+
+    def teardown(self):
+        if self._frame_writer is not None:
+            self._frame_writer.close()
+
+    def get_subplot_pixel_width(self, n_col):
+        if self.args.plotsize:
+            width = self.args.plotsize[0]
+        else:
+            width = self.args.terminal_width or shutil.get_terminal_size().columns
+            width //= n_col
+        return width * _DOTS_PER_CHAR[self.marker][0]
+
+    @property
+    def fixed_color_seq(self):
+        return self._fixed_color_seq
@@ -0,0 +1,91 @@
+import shutil
+import sys
+from typing import IO, List, Optional
+
+# ANSI escape sequences
+_ENTER_ALTERNATE_SCREEN = "\x1b[?1049h"
+_LEAVE_ALTERNATE_SCREEN = "\x1b[?1049l"
+_HIDE_CURSOR = "\x1b[?25l"
+_SHOW_CURSOR = "\x1b[?25h"
+_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+_CLEAR_TO_END_OF_SCREEN = "\x1b[J"
+# reset the attributes before erasing, such that it is not erased with the
+# background color of the line
+_CLEAR_TO_END_OF_LINE = "\x1b[0m\x1b[K"
+
+
+def _move_to_line(row: int) -> str:
+    # rows are 1-based
+    return f"\x1b[{row + 1};1H"
+
+
+class TerminalFrameWriter:
+    """
+    Writes successive frames (i.e. the full text of a plot) to a terminal, where
+    only the lines that differ from the previous frame are repainted. Lines are
+    addressed with cursor movements, and each frame is sent with a single write.
+
+    Frames are drawn on the alternate screen buffer, such that the terminal's
+    scrollback is left untouched; the last frame is printed to the normal screen
+    when the writer is closed.
+    """
+
+    def __init__(self, stream: Optional[IO] = None, alternate_screen: bool = True):
+        self.stream = stream or sys.stdout
+        self.alternate_screen = alternate_screen
+        self._started = False
+        self._previous_lines: Optional[List[str]] = []
+        self._previous_frame = ""
+        self._terminal_size = None
+
+    def _start(self) -> str:
+        self._started = True
+        return (_ENTER_ALTERNATE_SCREEN if self.alternate_screen else "") + _HIDE_CURSOR
+
+    def invalidate(self) -> None:
+        """Repaint the whole screen on the next frame."""
+        self._previous_lines = None
+
+    def write(self, frame: str) -> None:
+        out = []
+        if not self._started:
+            out.append(self._start())
+            self.invalidate()
+        terminal_size = shutil.get_terminal_size()
+        if terminal_size != self._terminal_size:
+            # the layout had been re-flowed by the terminal
+            self._terminal_size = terminal_size
+            self.invalidate()
+        if self._previous_lines is None:
+            out.append(_CLEAR_SCREEN)
+            self._previous_lines = []
+
+        # lines below the screen cannot be addressed, and writing past the last row
+        # would scroll the screen
+        lines = frame.rstrip("\n").split("\n")[: terminal_size.lines]
+        previous_lines = self._previous_lines
+        for row, line in enumerate(lines):
+            if row < len(previous_lines) and previous_lines[row] == line:
+                continue
+            out.append(_move_to_line(row) + line + _CLEAR_TO_END_OF_LINE)
+        if len(lines) < len(previous_lines):
+            out.append(_move_to_line(len(lines)) + _CLEAR_TO_END_OF_SCREEN)
+
+        self._previous_lines = lines
+        self._previous_frame = frame
+        if out:
+            self.stream.write("".join(out))
+            self.stream.flush()
+
+    def close(self) -> None:
+        if not self._started:
+            return
+        self._started = False
+        out = _SHOW_CURSOR
+        if self.alternate_screen:
+            # keep the last frame visible after exiting
+            out += _LEAVE_ALTERNATE_SCREEN + self._previous_frame
+        else:
+            out += _move_to_line(len(self._previous_lines)) + "\n"
+        self.stream.write(out)
+        self.stream.flush()
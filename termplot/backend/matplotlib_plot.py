@@ -4,27 +4,98 @@ import sys
 from functools import lru_cache
 from shutil import which
 from subprocess import Popen, PIPE, STDOUT
+from typing import Dict, List, Tuple
+
 from loguru import logger
 
 
 import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
+import numpy as np
 
 
+from termplot.profiling import profiler
 from .base_plotter import Plotter, PlottingError
 
 
 # noinspection SpellCheckingInspection,PyAttributeOutsideInit
 class MatplotlibPlot(Plotter):
+    """
+    When rendering off-screen (i.e. to an image), the plot is kept in retained mode:
+    the figure and its axes persist across refreshes (as long as the grid of
+    subplots is unchanged), lines are updated in place with ``set_data``, and only
+    the axes whose data changed are autoscaled. Images are rendered by the Agg
+    canvas of the figure, without going through pyplot.
+    """
+
+    def __init__(self, args):
+        super().__init__(args)
+        self.fig = None
+        self.axs = None
+        # (row, col) -> the lines of the subplot, which are reused by the next frame
+        self._lines: Dict[Tuple[int, int], List] = {}
+        # the number of lines of each subplot that were plotted in this frame
+        self._n_plotted: Dict[Tuple[int, int], int] = {}
+        # (row, col) -> the fingerprint of what the subplot shows, and of what it
+        # will show once the frame is finished
+        self._fingerprints: Dict[Tuple[int, int], bytes] = {}
+        self._new_fingerprints: Dict[Tuple[int, int], bytes] = {}
+        self._changed_axes = set()
+        self._legend_axes = set()
+        self._legend_changed_axes = set()
+        # axis -> label to be set
+        self._labels = {}
+        # axes -> its tick labels, whose size the layout depends on
+        self._tick_labels = {}
+        self._layout_changed = False
+
+    @property
+    def renders_offscreen(self) -> bool:
+        return self.args.as_raw_bytes
+
     @property
     def unsupported_options(self):
         return []
 
-    def plot(self, *args, label="", **kwargs):
-        self.cur_ax.plot(*args, label=label, **kwargs)
-
-    def scatter(self, *args, label="", **kwargs):
-        self.cur_ax.scatter(*args, label=label, **kwargs)
+    def _next_line(self, kind: str, label, color):
+        """The line (of the current subplot) to be reused for the next plot call."""
+        key = (self.cur_row, self.cur_col)
+        index = self._n_plotted.get(key, 0)
+        self._n_plotted[key] = index + 1
+        lines = self._lines.setdefault(key, [])
+        line = _Line(kind, label, color)
+        if index == len(lines):
+            lines.append(line)
+        elif lines[index].matches(line):
+            return lines[index]
+        else:
+            lines[index].artist.remove()
+            lines[index] = line
+        self._legend_changed_axes.add(self.cur_ax)
+        self._layout_changed = True
+        return line
+
+    def plot(self, x, y, label="", color=None, **kwargs):
+        line = self._next_line("plot", label, color)
+        if line.artist is None:
+            (line.artist,) = self.cur_ax.plot(x, y, label=label, color=color, **kwargs)
+        elif not line.holds(x, y):
+            line.artist.set_data(x, y)
+        else:
+            return
+        line.x, line.y = x, y
+        self._changed_axes.add(self.cur_ax)
+
+    def scatter(self, x, y, label="", color=None, **kwargs):
+        line = self._next_line("scatter", label, color)
+        if line.holds(x, y):
+            return
+        if line.artist is not None:
+            # the offsets of a collection are not unit converted, i.e. re-create it
+            line.artist.remove()
+        line.artist = self.cur_ax.scatter(x, y, label=label, color=color, **kwargs)
+        line.x, line.y = x, y
+        self._changed_axes.add(self.cur_ax)
 
     def xlim(self, row, col, limits):
         self.cur_ax.set_xlim(limits)
@@ -32,32 +103,38 @@ class MatplotlibPlot(Plotter):
     def ylim(self, row, col, limits):
         self.cur_ax.set_ylim(limits)
 
+    # setting the scale resets the tick locators, hence only when it had changed
     def xlog(self):
-        self.cur_ax.set_xscale("log")
+        if self.cur_ax.get_xscale() != "log":
+            self.cur_ax.set_xscale("log")
 
     def ylog(self):
-        self.cur_ax.set_yscale("log")
+        if self.cur_ax.get_yscale() != "log":
+            self.cur_ax.set_yscale("log")
 
     def xsymlog(self):
-        self.cur_ax.set_xscale("symlog")
+        if self.cur_ax.get_xscale() != "symlog":
+            self.cur_ax.set_xscale("symlog")
 
     def ysymlog(self):
-        self.cur_ax.set_yscale("symlog")
+        if self.cur_ax.get_yscale() != "symlog":
+            self.cur_ax.set_yscale("symlog")
 
     def legend(self):
-        self.cur_ax.legend()
+        # the legend is (re)created once all lines had been plotted
+        self._legend_axes.add(self.cur_ax)
+
+    def _set_label(self, axis, label):
+        # the label of the last line of the subplot is applied
+        self._labels[axis] = label
 
     def xlabel(self, xlabel, **kwargs):
         # only add xlabel to the bottom subplot
-        if self.match_subplot(
-            [(self.n_row, i) for i in range(1, self.n_col + 1)],
-            kwargs["cur_row"],
-            kwargs["cur_col"],
-        ):
-            self.cur_ax.set_xlabel(xlabel)
+        if kwargs["cur_row"] == self.n_row:
+            self._set_label(self.cur_ax.xaxis, xlabel)
 
     def ylabel(self, ylabel, **kwargs):
-        self.cur_ax.set_ylabel(ylabel)
+        self._set_label(self.cur_ax.yaxis, ylabel)
 
     def canvas_color(self):
         self.fig.set_facecolor(self.args.canvas_color)
@@ -77,49 +154,126 @@ class MatplotlibPlot(Plotter):
 
     def target_subplot(self, row, col):
         try:
-            if self.n_row == 1 and self.n_col == 1:
-                self.cur_ax = self.axs
-            elif self.n_row == 1:
-                self.cur_ax = self.axs[col - 1]
-            elif self.n_col == 1:
-                self.cur_ax = self.axs[row - 1]
-            else:
-                self.cur_ax = self.axs[row - 1][col - 1]
+            self.cur_ax = self.axs[row - 1][col - 1]
         except IndexError as e:
             raise PlottingError from e
+        self.cur_row, self.cur_col = row, col
+
+    def _new_figure(self, row, col):
+        if not self.renders_offscreen:
+            return plt.subplots(row, col, figsize=self.args.plotsize, squeeze=False)
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=self.args.plotsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots(row, col, squeeze=False)
 
     def create_subplot(self, row, col):
+        if self.fig is not None and (row, col) == (self.n_row, self.n_col):
+            # retained from the previous frame
+            return
         super().create_subplot(row, col)
+        self.close()
         try:
-            self.fig, self.axs = plt.subplots(row, col, figsize=self.args.plotsize)
+            self.fig, self.axs = self._new_figure(row, col)
         except (ValueError, IndexError) as e:
             logger.warning(e)
             raise PlottingError from e
+        self._lines = {}
+        self._fingerprints = {}
+        self._tick_labels = {}
+        self._layout_changed = True
+
+    def use_cached_subplot(self, fingerprint):
+        key = (self.cur_row, self.cur_col)
+        if fingerprint is None or self._fingerprints.get(key) != fingerprint:
+            self._new_fingerprints[key] = fingerprint
+            return False
+        # the lines of the retained figure are kept as they are
+        self._n_plotted[key] = len(self._lines.get(key, ()))
+        return True
 
     def set_title(self, title):
         kwargs = {}
         if self.args.ticks_color is not None:
             kwargs["color"] = self.args.ticks_color
+        if self.cur_ax.get_title() != title:
+            self._layout_changed = True
         self.cur_ax.set_title(title, fontsize=10, **kwargs)
 
     def clear_current_figure(self):
-        pass
-        # self.cur_ax.clf()
+        self._n_plotted = {}
+        self._new_fingerprints = {}
+        self._changed_axes = set()
+        self._legend_axes = set()
+        self._legend_changed_axes = set()
+        self._labels = {}
 
     def clear_terminal_printed_lines(self):
         pass
         # self.fig.clear()
 
+    def _finish_frame(self):
+        """Apply what depends on all the lines of the frame, before drawing."""
+        # lines that were not plotted in this frame
+        for key, lines in self._lines.items():
+            ax = self.axs[key[0] - 1][key[1] - 1]
+            for line in lines[self._n_plotted.get(key, 0) :]:
+                line.artist.remove()
+                self._changed_axes.add(ax)
+                self._legend_changed_axes.add(ax)
+            del lines[self._n_plotted.get(key, 0) :]
+        for ax in self._changed_axes:
+            if not ax.collections:
+                # scatters are not accounted by relim, but they update the data
+                # limits when they are created
+                ax.relim()
+            ax.autoscale_view()
+            # e.g. wider tick labels need more room
+            tick_labels = _get_tick_labels(ax)
+            if self._tick_labels.get(ax) != tick_labels:
+                self._tick_labels[ax] = tick_labels
+                self._layout_changed = True
+        for axis, label in self._labels.items():
+            if axis.get_label_text() != label:
+                axis.set_label_text(label)
+                self._layout_changed = True
+        for ax in self._legend_axes:
+            if ax in self._legend_changed_axes or ax.get_legend() is None:
+                ax.legend()
+                self._layout_changed = True
+        if self._layout_changed:
+            # from the default positions, i.e. as the layout of a new figure
+            self.fig.subplots_adjust(
+                **{
+                    name: plt.rcParams[f"figure.subplot.{name}"]
+                    for name in ("left", "bottom", "right", "top", "wspace", "hspace")
+                }
+            )
+            self.fig.tight_layout()
+            self._layout_changed = False
+        self._fingerprints.update(self._new_fingerprints)
+        self._new_fingerprints = {}
+
     def show(self):
-        self.fig.tight_layout()
+        self._finish_frame()
         plt.show()
 
+    def _write_png(self, stream):
+        self._finish_frame()
+        self.fig.canvas.print_png(stream)
+
+    def _render_rgba(self) -> np.ndarray:
+        """Draw the figure, and return the pixels of the canvas (without copying)."""
+        self._finish_frame()
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba())
+
     def _get_image_raw_bytes(self):
-        self.fig.tight_layout()
         string_io_bytes = io.BytesIO()
-        plt.savefig(string_io_bytes, format="png")
-        string_io_bytes.seek(0)
-        return string_io_bytes.read()
+        self._write_png(string_io_bytes)
+        return string_io_bytes.getvalue()
 
     def as_image_raw_bytes(self):
         # if self.args.timg:
@@ -134,20 +288,103 @@ class MatplotlibPlot(Plotter):
         # else:
         sys.stdout.buffer.write(self._get_image_raw_bytes())
 
+    def get_subplot_pixel_width(self, n_col):
+        fig_width = (self.args.plotsize or plt.rcParams["figure.figsize"])[0]
+        return int(fig_width * plt.rcParams["figure.dpi"] / n_col)
+
     @property
     def fixed_color_seq(self):
         return mcolors.TABLEAU_COLORS
 
     def close(self):
+        if self.fig is None or self.renders_offscreen:
+            # retained for the next frame
+            return
         plt.close(self.fig)
+        self.fig = None
+
+    def teardown(self):
+        if self.fig is not None and not self.renders_offscreen:
+            plt.close(self.fig)
+        self.fig = None
+
+
+def _get_tick_labels(ax) -> Tuple:
+    """The major tick labels (and the offset texts) of the axes, as they are drawn."""
+    labels = []
+    for axis in (ax.xaxis, ax.yaxis):
+        formatter = axis.get_major_formatter()
+        labels.append(tuple(formatter.format_ticks(axis.get_majorticklocs())))
+        labels.append(formatter.get_offset())
+    return tuple(labels)
+
+
+class _Line:
+    """A plotted line (or scatter) of a subplot, and the data that it shows."""
+
+    def __init__(self, kind: str, label, color):
+        self.kind = kind
+        self.label = label
+        self.color = color
+        self.artist = None
+        self.x = None
+        self.y = None
+
+    def matches(self, other: "_Line") -> bool:
+        return (self.kind, self.label, self.color) == (
+            other.kind,
+            other.label,
+            other.color,
+        )
+
+    def holds(self, x, y) -> bool:
+        return (
+            self.artist is not None
+            and np.array_equal(np.asarray(self.x), np.asarray(x))
+            and np.array_equal(np.asarray(self.y), np.asarray(y), equal_nan=True)
+        )
 
 
 class MatplotlibPlotTerminal(MatplotlibPlot):
+    """
+    Shows the plot within the terminal, either with its graphics protocol (i.e.
+    escape sequences written straight from the pixels of the canvas) or by piping a
+    PNG into a viewer program (e.g. timg).
+    """
+
     def __init__(self, args):
         super().__init__(args)
-        self.backend_program_cmds = self.get_supported_backend()
-        if self.backend_program_cmds is None:
-            raise RuntimeError("No supported program found (e.g. timg, .")
+        self.backend_program_cmds = None
+        self._image_writer = None
+        protocol = self.get_graphics_protocol(args.graphics)
+        if protocol is not None:
+            from .terminal_graphics import create_image_writer
+
+            self._image_writer = create_image_writer(
+                protocol, home=self.args.follow and sys.stdout.isatty()
+            )
+        else:
+            self.backend_program_cmds = self.get_supported_backend()
+            if self.backend_program_cmds is None:
+                raise RuntimeError("No supported program found (e.g. timg, kitty).")
+
+    @staticmethod
+    def get_graphics_protocol(graphics: str):
+        """The graphics protocol to write images with, or None to use a program."""
+        if graphics == "auto":
+            from .terminal_graphics import detect_graphics_protocol
+
+            return detect_graphics_protocol()
+        if graphics == "program":
+            return None
+        return graphics
+
+    @classmethod
+    def is_supported(cls, args) -> bool:
+        return (
+            cls.get_graphics_protocol(args.graphics) is not None
+            or cls.get_supported_backend() is not None
+        )
 
     @classmethod
     @lru_cache()
@@ -158,13 +395,28 @@ class MatplotlibPlotTerminal(MatplotlibPlot):
         elif which("kitty"):
             return ["kitty", "+kitten", "icat"]
 
+    @property
+    def renders_offscreen(self) -> bool:
+        return True
+
     def show(self):
+        if self._image_writer is not None:
+            with profiler.stage("build"):
+                rgba = self._render_rgba()
+            with profiler.stage("write"):
+                self._image_writer.write(rgba)
+            return
         program = Popen(
             self.backend_program_cmds,
             stdin=PIPE,
             bufsize=-1,
         )
         # pipe image data to program
-        self.fig.savefig(program.stdin)
+        self._write_png(program.stdin)
 
         program.stdin.close()  # done (no more input)
+
+    def teardown(self):
+        super().teardown()
+        if self._image_writer is not None:
+            self._image_writer.close()
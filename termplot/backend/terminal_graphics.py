@@ -0,0 +1,238 @@
+"""
+Writers of images to terminals that support inline graphics, straight from an RGBA
+pixel buffer (e.g. the Agg canvas of matplotlib), i.e. without spawning a viewer
+program or encoding a PNG for every frame.
+
+- ``kitty``: the kitty graphics protocol (also supported by e.g. WezTerm and
+  Ghostty). The image is transmitted once, and later frames only send the regions
+  whose pixels changed, by editing the image with the same id in-place.
+- ``sixel``: DEC sixel graphics (e.g. foot, mlterm, xterm -ti vt340). The protocol
+  has no notion of an image to be updated, hence a frame is sent in full, unless it
+  is identical to the previous one.
+"""
+
+import base64
+import os
+import sys
+import zlib
+from typing import IO, List, Optional, Tuple
+
+import numpy as np
+
+GRAPHICS_PROTOCOLS = ("kitty", "sixel")
+
+# a payload of the kitty protocol is sent in chunks of at most this many (base64)
+# bytes
+_KITTY_CHUNK_SIZE = 4096
+# changed rows that are separated by fewer unchanged rows are sent as one region
+_KITTY_REGION_GAP = 16
+# TERM values of terminals that support sixel graphics
+_SIXEL_TERMS = ("foot", "foot-extra", "mlterm", "yaft-256color", "contour")
+_SIXEL_MAX_COLORS = 256
+
+_CLEAR_SCREEN = b"\x1b[H\x1b[2J"
+_CURSOR_HOME = b"\x1b[H"
+
+
+def detect_graphics_protocol() -> Optional[str]:
+    """The graphics protocol that the current terminal supports (by its env vars)."""
+    term = os.environ.get("TERM", "")
+    term_program = os.environ.get("TERM_PROGRAM", "")
+    if (
+        "KITTY_WINDOW_ID" in os.environ
+        or term == "xterm-kitty"
+        or term_program in ("WezTerm", "ghostty")
+    ):
+        return "kitty"
+    if term in _SIXEL_TERMS or "sixel" in term:
+        return "sixel"
+    return None
+
+
+class ImageWriter:
+    """
+    Writes successive frames (i.e. RGBA pixel buffers of shape (height, width, 4))
+    to a terminal.
+
+    :param stream: a binary stream, which is stdout by default
+    :param home: draw every frame at the top-left corner of the screen (which is
+        cleared beforehand), instead of at the cursor
+    """
+
+    def __init__(self, stream: Optional[IO[bytes]] = None, home: bool = False):
+        self.stream = stream or sys.stdout.buffer
+        self.home = home
+        self._previous: Optional[np.ndarray] = None
+
+    def write(self, rgba: np.ndarray) -> None:
+        rgba = np.asarray(rgba, dtype=np.uint8)
+        if self._previous is not None and self._previous.shape == rgba.shape:
+            if np.array_equal(self._previous, rgba):
+                return
+            out = self._encode_update(self._previous, rgba)
+        else:
+            out = self._encode_full(rgba)
+            if self.home:
+                out = (_CLEAR_SCREEN if self._previous is None else _CURSOR_HOME) + out
+        # the buffer of the canvas is reused by the next draw
+        self._previous = rgba.copy()
+        self.stream.write(out)
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self._previous is not None:
+            self.stream.write(b"\n")
+            self.stream.flush()
+
+    def _encode_full(self, rgba: np.ndarray) -> bytes:
+        raise NotImplementedError()
+
+    def _encode_update(self, previous: np.ndarray, rgba: np.ndarray) -> bytes:
+        """Encode a frame of the same size as the previous (but different) one."""
+        out = self._encode_full(rgba)
+        return (_CURSOR_HOME if self.home else b"") + out
+
+
+class KittyImageWriter(ImageWriter):
+    """
+    The image is transmitted (and placed) once with a fixed id, and later frames
+    edit the pixels of its changed regions. It is re-transmitted if its size
+    changes.
+
+    :param image_id: the id of the image within the terminal, which is derived from
+        the pid by default (such that concurrent instances do not clash)
+    """
+
+    def __init__(
+        self,
+        stream: Optional[IO[bytes]] = None,
+        home: bool = False,
+        image_id: Optional[int] = None,
+    ):
+        super().__init__(stream, home)
+        self.image_id = image_id or os.getpid() % 0xFFFFFF + 1
+
+    @staticmethod
+    def _command(control: str, payload: bytes) -> bytes:
+        # q=2 suppresses the responses of the terminal, which would otherwise be
+        # received as input
+        data = base64.standard_b64encode(zlib.compress(payload, 1))
+        chunks = [
+            data[i : i + _KITTY_CHUNK_SIZE]
+            for i in range(0, len(data), _KITTY_CHUNK_SIZE)
+        ] or [b""]
+        out = []
+        for i, chunk in enumerate(chunks):
+            more = int(i < len(chunks) - 1)
+            keys = f"{control},o=z,q=2,m={more}" if i == 0 else f"m={more}"
+            out.append(b"\x1b_G" + keys.encode() + b";" + chunk + b"\x1b\\")
+        return b"".join(out)
+
+    def _encode_full(self, rgba: np.ndarray) -> bytes:
+        height, width = rgba.shape[:2]
+        out = b""
+        if self._previous is not None:
+            # free the previous image (of another size) along with its placement
+            out += f"\x1b_Ga=d,d=I,i={self.image_id},q=2\x1b\\".encode()
+        return out + self._command(
+            f"a=T,f=32,s={width},v={height},i={self.image_id},p=1",
+            rgba.tobytes(),
+        )
+
+    def _encode_update(self, previous: np.ndarray, rgba: np.ndarray) -> bytes:
+        out = []
+        for y0, y1, x0, x1 in changed_regions(previous, rgba, _KITTY_REGION_GAP):
+            # edit the pixels of the root frame, where X=1 overwrites them rather
+            # than alpha blending
+            out.append(
+                self._command(
+                    f"a=f,r=1,f=32,i={self.image_id},x={x0},y={y0},"
+                    f"s={x1 - x0},v={y1 - y0},X=1",
+                    rgba[y0:y1, x0:x1].tobytes(),
+                )
+            )
+        return b"".join(out)
+
+
+def changed_regions(
+    previous: np.ndarray, current: np.ndarray, gap: int
+) -> List[Tuple[int, int, int, int]]:
+    """
+    The bounding boxes (y0, y1, x0, x1) of the pixels that differ between two images
+    of the same shape. Changed rows that are separated by fewer than ``gap``
+    unchanged rows are within the same box.
+    """
+    changed = np.any(previous != current, axis=2)
+    rows = np.flatnonzero(changed.any(axis=1))
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) > gap)
+    starts = np.concatenate([[rows[0]], rows[breaks + 1]])
+    ends = np.concatenate([rows[breaks], [rows[-1]]]) + 1
+    regions = []
+    for y0, y1 in zip(starts, ends):
+        cols = np.flatnonzero(changed[y0:y1].any(axis=0))
+        regions.append((int(y0), int(y1), int(cols[0]), int(cols[-1]) + 1))
+    return regions
+
+
+class SixelImageWriter(ImageWriter):
+    """Frames are quantized to (at most) 256 colors, and sent in full."""
+
+    def _encode_full(self, rgba: np.ndarray) -> bytes:
+        from PIL import Image
+
+        height, width = rgba.shape[:2]
+        image = Image.fromarray(np.ascontiguousarray(rgba[..., :3]), "RGB")
+        # fast octree, without dithering (which would make flat areas noisy)
+        quantized = image.quantize(_SIXEL_MAX_COLORS, method=2, dither=0)
+        indices = np.asarray(quantized, dtype=np.uint8)
+        palette = np.asarray(quantized.getpalette()[: 3 * _SIXEL_MAX_COLORS])
+        palette = palette.reshape(-1, 3)
+
+        # raster attributes: 1:1 pixel aspect ratio, and the image size
+        out = [f'\x1bP0;1;0q"1;1;{width};{height}']
+        for i in np.unique(indices):
+            # colors are given as RGB percentages
+            r, g, b = (palette[i] * 100 + 127) // 255
+            out.append(f"#{i};2;{r};{g};{b}")
+        for y in range(0, height, 6):
+            out.append(_sixel_band(indices[y : y + 6]))
+        out.append("\x1b\\")
+        return "".join(out).encode()
+
+
+def _sixel_band(band: np.ndarray) -> str:
+    """Encode (up to) 6 rows of palette indices, i.e. one line of sixels."""
+    # bit k of a sixel is the pixel on the k-th row of the band
+    weights = (1 << np.arange(len(band), dtype=np.uint8))[:, None]
+    out = []
+    for color in np.unique(band):
+        sixels = ((band == color) * weights).sum(axis=0, dtype=np.uint8)
+        last = np.flatnonzero(sixels)[-1] + 1
+        out.append(f"#{color}" + _sixel_runs(sixels[:last] + 63) + "$")
+    # next line of sixels
+    out.append("-")
+    return "".join(out)
+
+
+def _sixel_runs(chars: np.ndarray) -> str:
+    """Run-length encode sixel characters."""
+    breaks = np.flatnonzero(np.diff(chars)) + 1
+    starts = np.concatenate([[0], breaks])
+    lengths = np.diff(np.concatenate([starts, [len(chars)]]))
+    out = []
+    for start, length in zip(starts.tolist(), lengths.tolist()):
+        char = chr(chars[start])
+        out.append(f"!{length}{char}" if length > 3 else char * length)
+    return "".join(out)
+
+
+def create_image_writer(
+    protocol: str, stream: Optional[IO[bytes]] = None, home: bool = False
+) -> ImageWriter:
+    if protocol == "kitty":
+        return KittyImageWriter(stream, home=home)
+    if protocol == "sixel":
+        return SixelImageWriter(stream, home=home)
+    raise ValueError(f"Unknown graphics protocol {protocol}")
@@ -1,12 +1,13 @@
 from argparse import ArgumentParser
-import os
-import pandas as pd
-import numpy as np
+import shutil
+import sys
 import plotext
 import plotext as plt
 import plotext._utility as plt_util
 
+from termplot.profiling import profiler
 from .base_plotter import Plotter
+from .frame_writer import TerminalFrameWriter
 
 
 # noinspection SpellCheckingInspection
@@ -33,14 +34,20 @@ class TerminalPlot(Plotter):
             self._fixed_color_seq.pop(self._fixed_color_seq.index(canvas_color))
         except ValueError:
             pass
+        # when following, frames are repainted in-place (only the changed lines)
+        self._frame_writer = None
+        if self.args.follow and sys.stdout.isatty():
+            self._frame_writer = TerminalFrameWriter(sys.stdout)
 
     @property
     def unsupported_options(self):
         return ["xsymlog", "ysymlog"]
 
     def _args_transformer(self, args):
+        # pandas is only loaded if the data source uses it
+        pd = sys.modules.get("pandas")
         for arg in args:
-            if isinstance(arg, pd.Series):
+            if pd is not None and isinstance(arg, pd.Series):
                 if pd.core.dtypes.common.is_datetime_or_timedelta_dtype(arg):
                     arg = plotext.datetimes_to_string(arg)
 
@@ -105,21 +112,42 @@ class TerminalPlot(Plotter):
         plt.clf()
 
     def clear_terminal_printed_lines(self):
-        # plt.clear_terminal()
-        os.system("cls" if os.name == "nt" else "clear")
+        if self._frame_writer is not None:
+            self._frame_writer.invalidate()
+        else:
+            plt_util.write("\x1b[H\x1b[2J")
 
     def show(self):
-        if self.args.terminal_width and self.args.terminal_height:
-            import mock
-
-            with mock.patch("shutil.get_terminal_size") as MockClass:
-                MockClass.return_value = (
-                    self.args.terminal_width,
-                    self.args.terminal_height,
+        # equivalent to plt.show(), but building the canvas is separated from writing
+        # it to the terminal
+        with profiler.stage("build"):
+            if self.args.terminal_width and self.args.terminal_height:
+                # size the whole figure, rather than patching the (process-wide)
+                # terminal size, which the loader thread reads concurrently. A line
+                # is left for the prompt, as plotext does for the terminal size.
+                plt.limit_size(False, False)
+                plt.main().plot_size(
+                    self.args.terminal_width, self.args.terminal_height - 1
                 )
-                plt.show()
+            canvas = plt.build()
+        with profiler.stage("write"):
+            if self._frame_writer is not None:
+                self._frame_writer.write(canvas)
+            else:
+                plt_util.write(canvas)
+
+    def teardown(self):
+        if self._frame_writer is not None:
+            self._frame_writer.close()
+
+    def get_subplot_pixel_width(self, n_col):
+        if self.args.plotsize:
+            width = self.args.plotsize[0]
         else:
-            plt.show()
+            width = self.args.terminal_width or shutil.get_terminal_size().columns
+            width //= n_col
+        # the "fhd" marker draws two points per character
+        return 2 * width
 
     @property
     def fixed_color_seq(self):
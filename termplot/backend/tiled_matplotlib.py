@@ -0,0 +1,209 @@
+"""
+Tiled rendering of the matplotlib backend (see --render-workers), for large grids
+of subplots (e.g. when consolidating many runs). The grid is split into tiles of
+--tile-columns columns of subplots, where each tile is rendered on its own Agg
+canvas (in a process pool if there is more than one worker) and the tiles are
+stitched into the final image.
+
+The plotter records what is plotted on each subplot, and the workers replay it on
+a new MatplotlibPlot per tile. Tiles are always rendered by the same function from
+the same (i.e. no retained) state, hence the output only depends on the tiling,
+not on the number of workers nor on which worker had rendered a tile before. A tile
+whose subplots had not changed is not rendered again.
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base_plotter import PlottingError
+from .matplotlib_plot import MatplotlibPlot, MatplotlibPlotTerminal
+
+
+def render_tile(
+    args: argparse.Namespace,
+    n_row: int,
+    first_col: int,
+    n_col: int,
+    size: Tuple[int, int],
+    subplots: List[Tuple],
+) -> np.ndarray:
+    """
+    Render one tile, i.e. the columns [first_col, first_col + n_col) of the grid.
+
+    :param size: the (width, height) of the tile in pixels
+    :param subplots: the (row, col, calls) of the subplots of the tile, where calls
+        are (method name, args, kwargs) to replay on the plotter
+    :return: the RGBA pixels of the tile
+    """
+    from matplotlib import rcParams
+
+    args = argparse.Namespace(**vars(args))
+    # an off-screen figure of the size of the tile
+    args.as_raw_bytes = True
+    args.plotsize = (size[0] / rcParams["figure.dpi"], size[1] / rcParams["figure.dpi"])
+    plotter = MatplotlibPlot(args)
+
+    plotter.clear_current_figure()
+    plotter.create_subplot(n_row, n_col)
+    for row, col, calls in subplots:
+        plotter.target_subplot(row, col - first_col + 1)
+        # post_setup is given the position within the grid, which the options
+        # (e.g. --xlog) refer to
+        for name, call_args, call_kwargs in calls:
+            getattr(plotter, name)(*call_args, **call_kwargs)
+    return plotter._render_rgba().copy()
+
+
+class TiledRendering:
+    """
+    A mixin of the matplotlib plotters, which records the plotting of every subplot
+    and renders the figure as tiles (see the module docstring).
+    """
+
+    def __init__(self, args):
+        super().__init__(args)
+        if not self.renders_offscreen:
+            self.raise_not_supported_option(
+                "--render-workers (without an image output)"
+            )
+        if self.args.tile_columns < 1:
+            raise PlottingError("--tile-columns must be at least 1")
+        self._pool = None
+        # (row, col) -> the fingerprint and the calls of the subplot
+        self._calls: Dict[Tuple[int, int], List] = {}
+        self._subplot_fingerprints: Dict[Tuple[int, int], Optional[bytes]] = {}
+        # of the previous frame
+        self._prev_calls: Dict[Tuple[int, int], List] = {}
+        self._prev_fingerprints: Dict[Tuple[int, int], Optional[bytes]] = {}
+        # tile index -> the key (layout and fingerprints) and the pixels of the tile
+        self._tiles: Dict[int, Tuple] = {}
+
+    def _get_pool(self):
+        if self._pool is None and self.args.render_workers > 1:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # not forked, as the process has threads (e.g. the loader and the
+            # filesystem observer)
+            self._pool = ProcessPoolExecutor(
+                self.args.render_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def create_subplot(self, row, col):
+        if (row, col) != (self.n_row, self.n_col):
+            self._prev_calls = {}
+            self._prev_fingerprints = {}
+            self._tiles = {}
+        self.n_row = row
+        self.n_col = col
+
+    def clear_current_figure(self):
+        self._calls = {}
+        self._subplot_fingerprints = {}
+
+    def target_subplot(self, row, col):
+        if not (1 <= row <= self.n_row and 1 <= col <= self.n_col):
+            raise PlottingError(f"Subplot ({row}, {col}) is out of the grid")
+        self.cur_row, self.cur_col = row, col
+        self._cur_calls = self._calls.setdefault((row, col), [])
+
+    def use_cached_subplot(self, fingerprint):
+        pos = (self.cur_row, self.cur_col)
+        self._subplot_fingerprints[pos] = fingerprint
+        if fingerprint is None or self._prev_fingerprints.get(pos) != fingerprint:
+            return False
+        # the calls of the previous frame (which include the title)
+        self._calls[pos] = self._prev_calls[pos]
+        return True
+
+    def set_title(self, title):
+        self._cur_calls.append(("set_title", (title,), {}))
+
+    def plot(self, *args, **kwargs):
+        self._cur_calls.append(("plot", args, kwargs))
+
+    def scatter(self, *args, **kwargs):
+        self._cur_calls.append(("scatter", args, kwargs))
+
+    def post_setup(self, *args, **kwargs):
+        self._cur_calls.append(("post_setup", args, kwargs))
+
+    def _tile_sizes(self) -> Tuple[List[int], int]:
+        """The width of every tile, and the height (in pixels) of the figure."""
+        from matplotlib import rcParams
+
+        fig_width, fig_height = self.args.plotsize or rcParams["figure.figsize"]
+        width = round(fig_width * rcParams["figure.dpi"])
+        height = round(fig_height * rcParams["figure.dpi"])
+        edges = [
+            width * min(col, self.n_col) // self.n_col
+            for col in range(
+                0, self.n_col + self.args.tile_columns, self.args.tile_columns
+            )
+        ]
+        return [right - left for left, right in zip(edges, edges[1:])], height
+
+    def _render_rgba(self) -> np.ndarray:
+        from loguru import logger
+
+        widths, height = self._tile_sizes()
+        layout = (self.n_row, self.n_col, tuple(widths), height)
+        tiles = {}
+        pending = {}
+        for i, width in enumerate(widths):
+            first_col = i * self.args.tile_columns + 1
+            n_col = min(self.args.tile_columns, self.n_col - first_col + 1)
+            positions = [
+                pos
+                for pos in sorted(self._calls)
+                if first_col <= pos[1] < first_col + n_col
+            ]
+            fingerprints = tuple(self._subplot_fingerprints.get(p) for p in positions)
+            key = None if None in fingerprints else (layout, fingerprints)
+            if key is not None and self._tiles.get(i, (None,))[0] == key:
+                tiles[i] = self._tiles[i]
+                continue
+            subplots = [(row, col, self._calls[row, col]) for row, col in positions]
+            call = (render_tile, self.args, self.n_row, first_col, n_col)
+            pending[i] = (key, call + ((width, height), subplots))
+        logger.debug("tiles: {} re-used, {} rendered", len(tiles), len(pending))
+
+        pool = self._get_pool()
+        if pool is not None:
+            futures = {i: pool.submit(*call) for i, (key, call) in pending.items()}
+            for i, future in futures.items():
+                tiles[i] = (pending[i][0], future.result())
+        else:
+            for i, (key, (func, *call_args)) in pending.items():
+                tiles[i] = (key, func(*call_args))
+
+        self._tiles = tiles
+        self._prev_calls = self._calls
+        self._prev_fingerprints = self._subplot_fingerprints
+        return np.concatenate([tiles[i][1] for i in range(len(widths))], axis=1)
+
+    def _write_png(self, stream):
+        from matplotlib.image import imsave
+
+        imsave(stream, self._render_rgba(), format="png")
+
+    def close(self):
+        pass
+
+    def teardown(self):
+        super().teardown()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+class MatplotlibTiledPlot(TiledRendering, MatplotlibPlot):
+    pass
+
+
+class MatplotlibTiledPlotTerminal(TiledRendering, MatplotlibPlotTerminal):
+    pass
@@ -1,9 +1,14 @@
 from abc import ABC, abstractmethod
 from argparse import ArgumentParser
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
+from typing import TYPE_CHECKING, Callable, List, Tuple, Dict, Optional
 
-import numpy as np
+if TYPE_CHECKING:
+    import numpy as np
+    from termplot.data_source.incremental import Window
+
+
+_NOT_COMPUTED = object()
 
 
 class DataSourceMissingException(Exception, ABC): ...
@@ -13,15 +18,7 @@ class DataSourceProcessingException(Exception, ABC): ...
 
 
 class NonNumericalSeries(Exception):
-    _offending_series = None
-
-    @property
-    def offending_series(self):
-        return self._offending_series
-
-    @offending_series.setter
-    def offending_series(self, value):
-        self._offending_series = value
+    pass
 
 
 def guess_prefix(token: str, determiner_list: Tuple[str] = ("/", "_")):
@@ -32,9 +29,33 @@ def guess_prefix(token: str, determiner_list: Tuple[str] = ("/", "_")):
     return token
 
 
+def is_scalar_name_selected(
+    name: str, whitelist: Optional[List[str]], blacklist: Optional[List[str]]
+) -> bool:
+    """Check a scalar name against the white and black list of keywords"""
+    if whitelist and not any(keyword in name for keyword in whitelist):
+        return False
+    if blacklist and any(keyword in name for keyword in blacklist):
+        return False
+    return True
+
+
 class DataSource(ABC):
     def __init__(self, input_file: Optional[Path], args: ArgumentParser):
         self.args = args
+        self.window: Optional["Window"] = None
+        if args.window is not None or args.window_seconds is not None:
+            from termplot.data_source.incremental import Window
+
+            # e.g. a datetime column of a csv file, by which rows are aged
+            column = None if args.xaxis_type == "step" else args.xaxis_type
+            self.window = Window(args.window, args.window_seconds, column)
+        self.cache = None
+        # the cache holds whole series, which a window would never use
+        if args.cache_dir is not None and self.window is None:
+            from termplot.data_source.cache import SeriesCache
+
+            self.cache = SeriesCache(args.cache_dir, args.cache_size * 1024 * 1024)
         if input_file is not None:
             self.input = Path(input_file)
             if not self.input.exists():
@@ -42,12 +63,183 @@ class DataSource(ABC):
                     f"The given input file '{self.input}' does not exists"
                 )
 
+    def _load_figures(
+        self, factories: List[Callable[[], "FigureData"]]
+    ) -> List["FigureData"]:
+        """
+        Construct (i.e. parse) the figures, in parallel processes if --jobs is given.
+
+        :param factories: picklable callables that each construct one figure
+        :return: the figures, in the same order as the given factories
+        """
+        if self.args.jobs == 1 or len(factories) <= 1:
+            return [factory() for factory in factories]
+        from termplot.data_source.parallel import load_in_parallel
+
+        return load_in_parallel(factories, self.args.jobs or None)
+
+    def refresh(self):
+        """
+        Called once at the start of every plotting cycle (by ``snapshot``), for the
+        data source to pick up new inputs (e.g. newly created run folders) since the
+        last cycle.
+        """
+        pass
+
+    def watched_paths(self) -> Optional[List[Path]]:
+        """
+        The files that this data source reads, and the folders where new inputs can
+        appear, i.e. which paths need to be watched for changes. None denotes
+        everything within the input.
+        """
+        return None
+
+    def snapshot(self) -> "DataSnapshot":
+        """
+        Refresh the data source and each of its figures (once), for a plotting cycle.
+
+        :return: a view of the data as of now, which is shared by the consolidation,
+            the filtering and the plotting of the cycle
+        """
+        self.refresh()
+        figures = []
+        for figure_data in self:
+            figure_data.refresh()
+            figures.append(FigureSnapshot(figure_data))
+        return DataSnapshot(tuple(figures), self.args)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __getitem__(self, item) -> "FigureData":
+        pass
+
+
+class FigureData(ABC):
+    """
+    The data of one run. Indexing a data source does not refresh the figure, which
+    is done once per plotting cycle by ``DataSource.snapshot``.
+    """
+
+    title: str
+    scalar_names: str
+
+    @abstractmethod
+    def get_series(self, *, x: str, y: str) -> "np.ndarray":
+        pass
+
+    @property
+    def title(self):
+        raise NotImplementedError()
+
+    @property
+    def scalar_names(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def refresh(self):
+        pass
+
+    def fingerprint(self) -> Optional[Tuple]:
+        """
+        A cheap summary of the data (e.g. the scalar names, the number of rows and
+        the last values), which changes whenever new data were read. None denotes
+        that it is unknown, i.e. the figure is always re-plotted.
+        """
+        return None
+
+    def is_plottable(self, name: str) -> bool:
+        """Whether the series is numerical (or e.g. datetime), i.e. not categorical"""
+        return True
+
+    def get_filtered_scalar_names(self, whitelist: List[str], blacklist: List[str]):
+        """Filter out scalar_names based on white and black list, and those that are
+        not plottable"""
+        return [
+            name
+            for name in self.scalar_names
+            if is_scalar_name_selected(name, whitelist, blacklist)
+            and self.is_plottable(name)
+        ]
+
+
+class FigureSnapshot(FigureData):
+    """
+    The data of one figure as of a refresh. Series are extracted on first use, and
+    cached for the rest of the plotting cycle.
+    """
+
+    def __init__(self, figure_data: FigureData):
+        self.figure_data = figure_data
+        self._title = figure_data.title
+        self._scalar_names: Tuple[str, ...] = tuple(figure_data.scalar_names)
+        self._fingerprint = _NOT_COMPUTED
+        self._series: Dict[Tuple[str, str], Tuple] = {}
+
+    def get_series(self, *, x: str, y: str) -> Tuple:
+        series = self._series.get((x, y))
+        if series is None:
+            series = self._series[(x, y)] = self.figure_data.get_series(x=x, y=y)
+        return series
+
+    @property
+    def title(self):
+        return self._title
+
+    @property
+    def scalar_names(self):
+        return self._scalar_names
+
+    def is_plottable(self, name: str) -> bool:
+        return self.figure_data.is_plottable(name)
+
+    def refresh(self):
+        # a snapshot never changes
+        pass
+
+    def fingerprint(self) -> Optional[Tuple]:
+        if self._fingerprint is _NOT_COMPUTED:
+            self._fingerprint = self.figure_data.fingerprint()
+        return self._fingerprint
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}<{self.figure_data}>"
+
+
+class DataSnapshot:
+    """The (immutable) sequence of figure snapshots of a plotting cycle."""
+
+    def __init__(self, figures: Tuple[FigureSnapshot, ...], args: ArgumentParser):
+        self.figures = figures
+        self.args = args
+
+    def __len__(self) -> int:
+        return len(self.figures)
+
+    def __getitem__(self, item) -> FigureSnapshot:
+        return self.figures[item]
+
+    def __iter__(self):
+        return iter(self.figures)
+
+    def fingerprint(self) -> Optional[Tuple]:
+        """
+        A cheap summary of the data of all figures, which changes whenever the
+        plotted data would change. None denotes that it is unknown.
+        """
+        fingerprints = tuple(figure.fingerprint() for figure in self.figures)
+        if any(fingerprint is None for fingerprint in fingerprints):
+            return None
+        return fingerprints
+
     def get_all_scalar_names(self):
         all_scalar_names = []
-        for figure_data in self:
+        for figure in self.figures:
             # filter tags
             all_scalar_names.extend(
-                figure_data.get_filtered_scalar_names(
+                figure.get_filtered_scalar_names(
                     whitelist=self.args.whitelist, blacklist=self.args.blacklist
                 )
             )
@@ -90,47 +282,3 @@ class DataSource(ABC):
             prefix: sorted(mapped_stat)
             for prefix, mapped_stat in consolidated_stats.items()
         }
-
-    @abstractmethod
-    def __len__(self) -> int:
-        pass
-
-    @abstractmethod
-    def __getitem__(self, item) -> "FigureData":
-        pass
-
-
-class FigureData(ABC):
-    title: str
-    scalar_names: str
-
-    @abstractmethod
-    def get_series(self, *, x: str, y: str) -> np.ndarray:
-        pass
-
-    @property
-    def title(self):
-        raise NotImplementedError()
-
-    @property
-    def scalar_names(self):
-        raise NotImplementedError()
-
-    @abstractmethod
-    def refresh(self):
-        pass
-
-    def get_filtered_scalar_names(self, whitelist: List[str], blacklist: List[str]):
-        """Filter out scalar_names based on white and black list"""
-        filtered_scalar_names = self.scalar_names
-        if whitelist:
-            filtered_scalar_names = filter(
-                lambda name: any(keyword in name for keyword in whitelist),
-                filtered_scalar_names,
-            )
-        if blacklist:
-            filtered_scalar_names = filter(
-                lambda name: not any(keyword in name for keyword in blacklist),
-                filtered_scalar_names,
-            )
-        return list(filtered_scalar_names)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from loguru import logger
+
+_MANIFEST = "manifest.json"
+# bytes around the parse offset that are hashed to detect a re-written source
+_FINGERPRINT_SIZE = 4096
+# a stored entry is refreshed at most this often, unless its data had doubled
+_STORE_INTERVAL = 60
+
+
+class UncacheableColumn(Exception):
+    pass
+
+
+class CacheEntry(NamedTuple):
+    # source path -> parse offset
+    offsets: Dict[str, int]
+    # column name -> (memory-mapped) values
+    columns: Dict[str, np.ndarray]
+    # reader specific state, e.g. the csv header
+    state: Dict
+
+
+def _fingerprint(path: Path, offset: int) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        digest.update(f.read(min(offset, _FINGERPRINT_SIZE)))
+        f.seek(max(0, offset - _FINGERPRINT_SIZE))
+        digest.update(f.read(min(offset, _FINGERPRINT_SIZE)))
+    return digest.hexdigest()
+
+
+class SeriesCache:
+    """
+    An on-disk cache of already parsed columns, stored as one ``.npy`` file per
+    column plus a json manifest, so that they can be memory-mapped on the next
+    launch.
+
+    Entries are keyed by the source path, and remember the size, mtime and parse
+    offset of every source file. An entry is reused as-is if a source is unchanged,
+    and is resumed from its offset if the source had only been appended to.
+    The least recently used entries are evicted when the cache exceeds its size cap.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # key -> (number of rows, time) of the last store in this session
+        self._last_store: Dict[str, Tuple[int, float]] = {}
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / hashlib.sha1(key.encode()).hexdigest()[:20]
+
+    @staticmethod
+    def _read_manifest(entry_dir: Path) -> Optional[Dict]:
+        try:
+            with open(entry_dir / _MANIFEST) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load(self, key: str) -> Optional[CacheEntry]:
+        entry_dir = self._entry_dir(key)
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None or manifest["key"] != key:
+            return None
+        for path, source in manifest["sources"].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if (stat.st_size, stat.st_mtime_ns) == (source["size"], source["mtime"]):
+                continue
+            # the source had changed; it is only usable if it was appended to
+            if stat.st_size < source["offset"] or source["fingerprint"] != (
+                _fingerprint(Path(path), source["offset"])
+            ):
+                logger.debug("Discarding stale cache entry of {}", key)
+                return None
+        columns = {}
+        try:
+            for name, column in manifest["columns"].items():
+                values = np.load(entry_dir / column["file"], mmap_mode="r")
+                if column.get("mask") is not None:
+                    # non-numerical column that was stored as fixed width strings
+                    mask = np.load(entry_dir / column["mask"])
+                    values = values.astype(object)
+                    values[mask] = None
+                columns[name] = values
+        except (OSError, ValueError):
+            return None
+        # mark as recently used
+        os.utime(entry_dir / _MANIFEST)
+        self._last_store[key] = (manifest["n_rows"], time.monotonic())
+        logger.debug("Loaded {} cached columns of {}", len(columns), key)
+        return CacheEntry(
+            offsets={p: s["offset"] for p, s in manifest["sources"].items()},
+            columns=columns,
+            state=manifest["state"],
+        )
+
+    def should_store(self, key: str, n_rows: int) -> bool:
+        if key not in self._last_store:
+            return n_rows > 0
+        stored_rows, stored_time = self._last_store[key]
+        if n_rows <= stored_rows:
+            return False
+        # amortise the cost of re-writing the entry
+        return (
+            n_rows >= 2 * stored_rows
+            or time.monotonic() - stored_time > _STORE_INTERVAL
+        )
+
+    def store(
+        self,
+        key: str,
+        offsets: Dict[str, int],
+        columns: Dict[str, np.ndarray],
+        state: Optional[Dict] = None,
+    ) -> None:
+        entry_dir = self._entry_dir(key)
+        entry_dir.mkdir(exist_ok=True)
+        old_manifest = self._read_manifest(entry_dir)
+        generation = 0 if old_manifest is None else old_manifest["generation"] + 1
+        n_rows = max((len(values) for values in columns.values()), default=0)
+
+        manifest = dict(
+            key=key,
+            generation=generation,
+            n_rows=n_rows,
+            state=state or {},
+            sources={},
+            columns={},
+        )
+        for path, offset in offsets.items():
+            stat = os.stat(path)
+            manifest["sources"][path] = dict(
+                size=stat.st_size,
+                mtime=stat.st_mtime_ns,
+                offset=offset,
+                fingerprint=_fingerprint(Path(path), offset),
+            )
+        written = []
+        try:
+            for i, (name, values) in enumerate(columns.items()):
+                column = dict(file=f"{generation}-{i}.npy", mask=None)
+                if values.dtype.kind == "O":
+                    mask = np.array([v is None or v != v for v in values], dtype=bool)
+                    if not all(isinstance(v, str) for v in values[~mask]):
+                        raise UncacheableColumn(name)
+                    column["mask"] = f"{generation}-{i}-mask.npy"
+                    np.save(entry_dir / column["mask"], mask)
+                    written.append(column["mask"])
+                    values = np.where(mask, "", values).astype(str)
+                np.save(entry_dir / column["file"], values)
+                written.append(column["file"])
+                manifest["columns"][name] = column
+        except UncacheableColumn as e:
+            logger.debug("Not caching {}: column '{}' is not cacheable", key, e)
+            for file in written:
+                os.remove(entry_dir / file)
+            return
+
+        # atomically replace the manifest, then remove the previous generation
+        tmp_manifest = entry_dir / f"{_MANIFEST}.tmp"
+        with open(tmp_manifest, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, entry_dir / _MANIFEST)
+        for file in entry_dir.iterdir():
+            if file.suffix == ".npy" and file.name not in written:
+                os.remove(file)
+        self._last_store[key] = (n_rows, time.monotonic())
+        logger.debug("Stored {} rows of {} to cache", n_rows, key)
+
+        self.evict(keep=entry_dir)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """Remove the least recently used entries until within the size cap."""
+        entries: List[Tuple[float, int, Path]] = []
+        total_size = 0
+        for entry_dir in self.cache_dir.iterdir():
+            try:
+                size = sum(f.stat().st_size for f in entry_dir.iterdir())
+                last_used = os.path.getmtime(entry_dir / _MANIFEST)
+            except OSError:
+                # not an entry, or it is being modified by another process
+                continue
+            total_size += size
+            entries.append((last_used, size, entry_dir))
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            logger.debug("Evicting cache entry {}", entry_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
@@ -1,21 +1,25 @@
+import csv
 from argparse import ArgumentParser
-from io import StringIO
+from functools import partial
+from io import BytesIO, StringIO
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
-from typing import TYPE_CHECKING, Union
+from loguru import logger
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Union
 
 if TYPE_CHECKING:
+    import pandas as pd
     from pandas._typing import FilePath, ReadCsvBuffer
+    from termplot.data_source.cache import SeriesCache
 
 from termplot.data_source import (
     DataSource,
     FigureData,
     DataSourceMissingException,
     DataSourceProcessingException,
-    NonNumericalSeries,
 )
+from termplot.data_source.incremental import CATEGORICAL, TailReader, Window
 
 
 class CsvDataSourceMissingException(DataSourceMissingException):
@@ -30,16 +34,15 @@ class CsvDataSource(DataSource):
     def __init__(self, input_file: Path, args: ArgumentParser):
         super().__init__(input_file, args)
         self.figures = []
+        # the csv files that had been loaded as figures
+        self._known_files: Set[str] = set()
 
         if self.input.is_file():
             # assume it is csv file
-            # if self.input.name.endswith(".csv"):
-            # the given 'input' is the actual csv file
-            self.figures.append(CsvFigureData(self.input))
+            self._add_figures([self.input])
         else:  # is a folder
             # the given 'input' is a folder that contains csv file
-            for csv_file in self.input.glob("*.csv"):
-                self.figures.append(CsvFigureData(csv_file))
+            self._add_figures(sorted(self.input.glob("*.csv")))
             # if len(self.figures) == 0:
             # try to recursively
 
@@ -48,13 +51,111 @@ class CsvDataSource(DataSource):
                 f"Unable to find csv files within '{self.input}'."
             )
 
+    def _add_figures(self, csv_files: List[Path]) -> None:
+        self.figures.extend(
+            self._load_figures(
+                [
+                    partial(
+                        CsvFigureData, csv_file, cache=self.cache, window=self.window
+                    )
+                    for csv_file in csv_files
+                ]
+            )
+        )
+        self._known_files.update(map(str, csv_files))
+
+    def refresh(self):
+        """Pick up csv files that had appeared since the last refresh."""
+        if self.input.is_file():
+            return
+        for csv_file in sorted(self.input.glob("*.csv")):
+            if str(csv_file) in self._known_files:
+                continue
+            try:
+                self._add_figures([csv_file])
+            except CsvDataSourceProcessingException:
+                # e.g. the header had not been written yet; retry on next refresh
+                logger.debug("Skipping csv file without scalars: {}", csv_file)
+
+    def watched_paths(self):
+        paths = [Path(figure_data.path) for figure_data in self.figures]
+        if self.input.is_dir():
+            # for csv files that are created later on
+            paths.append(self.input)
+        return paths
+
     def __len__(self):
         return len(self.figures)
 
     def __getitem__(self, item):
-        figure_data = self.figures[item]
-        figure_data.refresh()
-        return figure_data
+        return self.figures[item]
+
+
+class CsvTailReader(TailReader):
+    """
+    Incremental csv reader. The first line is remembered as the header, and every
+    subsequent call only parses the rows appended since the last read.
+    """
+
+    def __init__(
+        self,
+        source,
+        cache: Optional["SeriesCache"] = None,
+        window: Optional[Window] = None,
+    ):
+        super().__init__(source, cache, window)
+        self.header: Optional[List[str]] = None
+        self._header_is_provisional = False
+
+    def _get_cache_state(self) -> Dict:
+        return dict(header=self.header)
+
+    def _set_cache_state(self, state: Dict) -> None:
+        self.header = state["header"]
+
+    def reset(self) -> None:
+        super().reset()
+        self.header = None
+        self._header_is_provisional = False
+
+    def _drop_provisional(self) -> None:
+        super()._drop_provisional()
+        if self._header_is_provisional:
+            self.header = None
+            self.columns = {}
+            self._header_is_provisional = False
+
+    def _set_header(self, line: bytes, provisional: bool) -> None:
+        import pandas as pd
+
+        # let pandas de-duplicate and name the columns as it always does
+        self.header = list(pd.read_csv(BytesIO(line), nrows=0).columns)
+        self._header_is_provisional = provisional
+        self.columns = {name: self._new_buffer() for name in self.header}
+
+    def _parse(self, chunk: bytes, provisional: bool) -> Dict[str, np.ndarray]:
+        import pandas as pd
+
+        if self.header is None:
+            header_end = chunk.find(b"\n") + 1
+            if header_end == 0:
+                header_end = len(chunk)
+            self._set_header(chunk[:header_end], provisional)
+            chunk = chunk[header_end:]
+        if provisional and chunk:
+            # only accept an incomplete trailing line if it has all the fields
+            fields = next(csv.reader([chunk.decode(errors="replace")]), [])
+            if len(fields) != len(self.header):
+                return {}
+        if not chunk.strip():
+            return {}
+        try:
+            df = pd.read_csv(
+                BytesIO(chunk), header=None, names=self.header, index_col=False
+            )
+        except pd.errors.EmptyDataError:
+            return {}
+        return {name: df[name].to_numpy() for name in self.header}
 
 
 class CsvFigureData(FigureData):
@@ -62,23 +163,13 @@ class CsvFigureData(FigureData):
         self,
         path: Union["FilePath", "ReadCsvBuffer[bytes]", "ReadCsvBuffer[str]", StringIO],
         remove_nan: bool = True,
+        cache: Optional["SeriesCache"] = None,
+        window: Optional[Window] = None,
     ):
         # decide whether we should try to clean up nan values
         self.remove_nan = remove_nan
         self.path = path
-        i = 0
-        while True:
-            try:
-                self.df = pd.read_csv(path)
-            except pd.errors.EmptyDataError:
-                i += 1
-                if i > 10:
-                    raise
-                import time
-
-                time.sleep((i * 0.05))
-            else:
-                break
+        self.reader = CsvTailReader(path, cache=cache, window=window)
 
         self.refresh()
         if len(self.scalar_names) == 0:
@@ -87,7 +178,8 @@ class CsvFigureData(FigureData):
             )
 
     def refresh(self):
-        pass
+        # only parse the rows that were appended since the last refresh
+        self.reader.read_new()
 
     @staticmethod
     def remove_nan_values(x_values, y_values, reference_values):
@@ -100,22 +192,15 @@ class CsvFigureData(FigureData):
             y_values = y_values[_mapping]
         return x_values, y_values
 
-    @staticmethod
-    def try_obj_to_datetime(series: pd.Series):
-        if series.dtype == object:
-            try:
-                # try to convert to datetime
-                series = pd.to_datetime(series)
-            except Exception as e:
-                raise NonNumericalSeries() from e
-        return series
-
     def get_series(self, *, x: str, y: str):
-        y_values = self.df[y].to_numpy()
+        import pandas as pd
+
+        # e.g. datetime strings are converted, as per the kind of the column
+        y_values = self.reader.plottable(y)
         if x == "step":
-            x_values = np.arange(len(y_values))
+            x_values = np.arange(len(y_values)) + self.reader.column_offset(y)
         else:
-            x_values = self.df[x]
+            x_values = pd.Series(self.reader.plottable(x), name=x)
         if self.remove_nan:
             # remove nan values in x
             x_values, y_values = self.remove_nan_values(
@@ -126,9 +211,6 @@ class CsvFigureData(FigureData):
                 x_values, y_values, reference_values=y_values
             )
 
-        x_values = self.try_obj_to_datetime(x_values)
-        y_values = self.try_obj_to_datetime(y_values)
-
         return x_values, y_values
 
     @property
@@ -137,7 +219,13 @@ class CsvFigureData(FigureData):
 
     @property
     def scalar_names(self):
-        return list(self.df.columns)
+        return self.reader.names
+
+    def is_plottable(self, name: str) -> bool:
+        return self.reader.kind(name) != CATEGORICAL
+
+    def fingerprint(self):
+        return str(self.title), self.reader.fingerprint()
 
     def __repr__(self):
-        return f"{self.__class__.__name__}<path={self.path}|df={self.df}>"
+        return f"{self.__class__.__name__}<path={self.path}|rows={len(self.reader)}>"
@@ -0,0 +1,550 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import IO
+
+import numpy as np
+from loguru import logger
+
+from termplot.data_source import NonNumericalSeries
+from termplot.profiling import profiler
+
+if TYPE_CHECKING:
+    from termplot.data_source.cache import SeriesCache
+
+
+def _promote_dtype(current: Optional[np.dtype], incoming: np.dtype) -> np.dtype:
+    """Return a dtype that can hold both the existing and the incoming values."""
+    if current is None:
+        return incoming
+    if current == incoming:
+        return current
+    if current.kind in "OUS" or incoming.kind in "OUS":
+        return np.dtype("object")
+    try:
+        return np.result_type(current, incoming)
+    except TypeError:
+        return np.dtype("object")
+
+
+# kinds of columns
+NUMERIC = "numeric"
+DATETIME = "datetime"
+CATEGORICAL = "categorical"
+
+
+def _classify(values: np.ndarray) -> Optional[str]:
+    """The kind of the given values, or None if they are all missing."""
+    if values.dtype.kind in "biuf":
+        return NUMERIC
+    if values.dtype.kind in "mM":
+        return DATETIME
+    import pandas as pd
+
+    present = values[pd.notna(values)]
+    if len(present) == 0:
+        return None
+    inferred = pd.api.types.infer_dtype(present, skipna=True)
+    if inferred in ("integer", "floating", "mixed-integer-float", "decimal", "boolean"):
+        return NUMERIC
+    if inferred in ("datetime64", "datetime", "date"):
+        return DATETIME
+    if inferred != "string":
+        return CATEGORICAL
+    import warnings
+
+    try:
+        with warnings.catch_warnings():
+            # e.g. that the format cannot be inferred
+            warnings.simplefilter("ignore")
+            pd.to_datetime(present)
+    except (ValueError, TypeError, OverflowError):
+        return CATEGORICAL
+    return DATETIME
+
+
+def classify_values(
+    values: np.ndarray, previous: Optional[str] = None
+) -> Optional[str]:
+    """
+    Update the kind of a column with the values that were appended to it.
+
+    :param values: the appended values
+    :param previous: the kind of the values before them, if any
+    :return: one of NUMERIC, DATETIME, CATEGORICAL, or None if still unknown
+    """
+    if previous == CATEGORICAL:
+        return CATEGORICAL
+    kind = _classify(values)
+    if kind is None or previous is None or kind == previous:
+        return kind or previous
+    # e.g. strings in a numerical column
+    return CATEGORICAL
+
+
+def to_plottable(values, kind: Optional[str]):
+    """
+    Convert the values of a column into numbers or datetimes, as per its kind.
+
+    :raises NonNumericalSeries: if the column is categorical
+    """
+    if kind == CATEGORICAL:
+        raise NonNumericalSeries()
+    if values.dtype != object:
+        return values
+    import pandas as pd
+
+    if kind == DATETIME:
+        return pd.to_datetime(values)
+    # e.g. promoted to object by a trailing row that is still being written
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _to_datetime(values: np.ndarray) -> np.ndarray:
+    import pandas as pd
+
+    # datetime64, or Timestamps (objects) if they are timezone aware
+    return pd.to_datetime(values).to_numpy()
+
+
+def last_value_bytes(values: np.ndarray) -> bytes:
+    """The last value as bytes, which (unlike nan) compares equal to itself."""
+    last = values[-1:]
+    if last.dtype.kind == "O":
+        return repr(last.tolist()).encode()
+    return last.tobytes()
+
+
+class Window(NamedTuple):
+    """The most recent points of every series that are kept (see --window)."""
+
+    n_points: Optional[int] = None
+    seconds: Optional[float] = None
+    # the column whose datetimes age the rows of a line-based file (i.e. the x-axis)
+    column: Optional[str] = None
+
+
+class ColumnBuffer:
+    """
+    A growable 1-d numpy array with amortised O(1) appends.
+
+    The dtype of the buffer is promoted (e.g. int -> float -> object) whenever the
+    appended values cannot be represented by the current dtype.
+
+    If max_length is given, only the last max_length values are kept, i.e. the
+    memory stays bounded however many values are appended. The kept values are
+    still contiguous (``values`` is a view): they slide back to the front of the
+    storage (of twice the max length) once its end is reached, which is amortised
+    O(1) as well.
+    """
+
+    def __init__(self, capacity: int = 1024, max_length: Optional[int] = None):
+        self._data = None
+        self._start = 0
+        self._len = 0
+        self._initial_capacity = capacity
+        self.max_length = max_length
+        # the number of values that were dropped from the head
+        self.n_dropped = 0
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "ColumnBuffer":
+        """Wrap existing (possibly read-only, memory-mapped) values without copying."""
+        buffer = cls()
+        buffer._data = values
+        buffer._len = len(values)
+        return buffer
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def n_appended(self) -> int:
+        """The length of the series, including the values dropped from the head."""
+        return self.n_dropped + self._len
+
+    def __getstate__(self):
+        # only the valid portion is pickled (e.g. when sent across processes)
+        state = self.__dict__.copy()
+        if self._data is not None:
+            state["_data"] = np.array(self.values)
+            state["_start"] = 0
+        return state
+
+    @property
+    def dtype(self) -> Optional[np.dtype]:
+        return None if self._data is None else self._data.dtype
+
+    @property
+    def values(self) -> np.ndarray:
+        """A view of the valid portion of the buffer."""
+        if self._data is None:
+            return np.empty(0)
+        return self._data[self._start : self._start + self._len]
+
+    def _reserve(self, needed: int, dtype: np.dtype):
+        reusable = (
+            self._data is not None
+            and dtype == self._data.dtype
+            and self._data.flags.writeable
+        )
+        if reusable and self._start + needed <= len(self._data):
+            return
+        if reusable and self._start and needed <= len(self._data) // 2:
+            # slide the kept values back to the front
+            self._data[: self._len] = self.values
+            self._start = 0
+            return
+        capacity = self._initial_capacity
+        if self._data is not None:
+            capacity = max(capacity, 2 * len(self._data))
+        if self.max_length is not None:
+            capacity = min(capacity, 2 * self.max_length)
+        new_data = np.empty(max(capacity, needed), dtype=dtype)
+        if self._data is not None:
+            new_data[: self._len] = self.values
+        self._data = new_data
+        self._start = 0
+
+    def extend(self, values) -> None:
+        values = np.asarray(values).reshape(-1)
+        if len(values) == 0 and self._data is not None:
+            return
+        if self.max_length is not None:
+            excess = self._len + len(values) - self.max_length
+            if excess > 0:
+                n_kept_dropped = min(excess, self._len)
+                self.drop_head(n_kept_dropped)
+                self.n_dropped += excess - n_kept_dropped
+                values = values[excess - n_kept_dropped :]
+        needed = self._len + len(values)
+        self._reserve(needed, _promote_dtype(self.dtype, values.dtype))
+        self._data[self._start + self._len : self._start + needed] = values
+        self._len = needed
+
+    def pad(self, n: int) -> None:
+        """Append n missing values."""
+        if n <= 0:
+            return
+        if self.max_length is not None and n > self.max_length:
+            # only the last max_length of them would be kept
+            self.n_dropped += n - self.max_length
+            n = self.max_length
+        if self.dtype is not None and self.dtype.kind == "O":
+            self.extend(np.full(n, None, dtype=object))
+        else:
+            self.extend(np.full(n, np.nan))
+
+    def drop_head(self, n: int) -> None:
+        """Drop the first n values."""
+        n = min(n, self._len)
+        if n <= 0:
+            return
+        self._start += n
+        self._len -= n
+        self.n_dropped += n
+
+    def truncate(self, length: int) -> None:
+        """
+        Drop the values past the given length, which includes the dropped head
+        values (i.e. it is an index of the whole series that had been appended).
+        """
+        self._len = max(0, min(self._len, length - self.n_dropped))
+
+
+class TailReader(ABC):
+    """
+    Incrementally reads a line-based file (or text stream), remembering the byte
+    offset of the last complete line that was consumed. Each call to
+    :meth:`read_new` only parses the lines appended since the previous call, and
+    appends the parsed values to the column buffers already held.
+
+    A trailing line that is not yet terminated by a newline (e.g. it is still being
+    written) is parsed provisionally: it is shown, but it will be re-read (and
+    replaced) on the next call.
+
+    If a cache is given, the parsed columns of a file source are restored from (and
+    periodically stored to) the cache, such that only the new tail is parsed.
+
+    If a window is given, only the most recent rows are kept. The age of a row is
+    given by the datetimes of the window's column, relative to the latest one. If
+    there is no such column (or it is not a datetime one), it is the time since
+    the row was read instead.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path, IO],
+        cache: Optional["SeriesCache"] = None,
+        window: Optional[Window] = None,
+    ):
+        self.source = source
+        self.window = window
+        self.is_file = isinstance(source, (str, Path))
+        self.cache = cache if self.is_file else None
+        if self.cache is not None:
+            self._cache_path = os.path.abspath(source)
+            self._cache_key = f"{self.__class__.__name__}:{self._cache_path}"
+        self._restored_from_cache = False
+        self.offset = 0
+        self.n_rows = 0
+        self.columns: Dict[str, ColumnBuffer] = {}
+        self._n_provisional = 0
+        self._provisional_names: List[str] = []
+        # unconsumed bytes of a stream source (a file source is re-read by offset)
+        self._pending = b""
+        # the time when each complete row was read, for a window of seconds
+        self._read_times = self._new_buffer()
+        # the kind of each column, and the number of complete rows it is based on
+        self._kinds: Dict[str, Optional[str]] = {}
+        self._n_classified: Dict[str, int] = {}
+        # the complete rows of datetime string columns, as converted so far
+        self._datetimes: Dict[str, ColumnBuffer] = {}
+
+    @abstractmethod
+    def _parse(self, chunk: bytes, provisional: bool) -> Dict[str, np.ndarray]:
+        """
+        Parse the given chunk of lines into columns of equal length.
+
+        :param chunk: the bytes to be parsed
+        :param provisional: whether the chunk is an incomplete trailing line
+        :return: a mapping of column name to values
+        """
+        pass
+
+    def _new_buffer(self) -> ColumnBuffer:
+        return ColumnBuffer(max_length=self.window and self.window.n_points)
+
+    def _get_cache_state(self) -> Dict:
+        """Reader specific state that is stored alongside the cached columns."""
+        return {}
+
+    def _set_cache_state(self, state: Dict) -> None:
+        pass
+
+    def _restore_from_cache(self) -> None:
+        entry = self.cache.load(self._cache_key)
+        if entry is None:
+            return
+        self.offset = entry.offsets[self._cache_path]
+        self.columns = {
+            name: ColumnBuffer.from_array(values)
+            for name, values in entry.columns.items()
+        }
+        self.n_rows = max(map(len, entry.columns.values()), default=0)
+        self._set_cache_state(entry.state)
+
+    def _store_to_cache(self) -> None:
+        if not self.cache.should_store(self._cache_key, self.n_rows):
+            return
+        self.cache.store(
+            self._cache_key,
+            offsets={self._cache_path: self.offset},
+            columns={
+                name: buffer.values[: self.n_rows]
+                for name, buffer in self.columns.items()
+            },
+            state=self._get_cache_state(),
+        )
+
+    def reset(self) -> None:
+        self.offset = 0
+        self.n_rows = 0
+        self.columns = {}
+        self._n_provisional = 0
+        self._provisional_names = []
+        self._pending = b""
+        self._read_times = self._new_buffer()
+        self._kinds = {}
+        self._n_classified = {}
+        self._datetimes = {}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name].values
+
+    def kind(self, name: str) -> Optional[str]:
+        """
+        The kind of the column (see ``classify_values``). It is only updated with
+        the complete rows that had not been classified yet, i.e. every value is
+        classified once. None denotes that the column has no values yet.
+        """
+        buffer = self.columns[name]
+        start = max(self._n_classified.get(name, 0), buffer.n_dropped)
+        if start >= self.n_rows:
+            if name not in self._kinds:
+                # only an incomplete trailing row, which may still change
+                return classify_values(buffer.values)
+            return self._kinds[name]
+        previous = self._kinds.get(name)
+        kind = classify_values(
+            buffer.values[start - buffer.n_dropped : self.n_rows - buffer.n_dropped],
+            previous,
+        )
+        if kind == CATEGORICAL and previous != CATEGORICAL:
+            logger.warning(f"The series '{name}' is non-numeric; ignoring it...")
+        self._kinds[name] = kind
+        self._n_classified[name] = self.n_rows
+        return kind
+
+    def plottable(self, name: str) -> np.ndarray:
+        """
+        The values of the column as numbers or datetimes, as per its kind (see
+        ``to_plottable``). Datetime strings are converted once, as the (complete)
+        rows are appended, rather than the whole column on every call.
+
+        :raises NonNumericalSeries: if the column is categorical
+        """
+        buffer = self.columns[name]
+        kind = self.kind(name)
+        if kind != DATETIME or buffer.dtype.kind != "O":
+            return to_plottable(buffer.values, kind)
+        converted = self._datetimes.get(name)
+        if converted is None or converted.n_appended < buffer.n_dropped:
+            # e.g. the unconverted rows had all been dropped out of the window
+            converted = self._datetimes[name] = self._new_buffer()
+            converted.n_dropped = buffer.n_dropped
+        converted.drop_head(buffer.n_dropped - converted.n_dropped)
+        n_complete = self.n_rows - buffer.n_dropped
+        new_values = buffer.values[converted.n_appended - buffer.n_dropped : n_complete]
+        if len(new_values):
+            converted.extend(_to_datetime(new_values))
+        values = converted.values
+        if len(buffer) > max(n_complete, 0):
+            # the incomplete trailing row, which may still change
+            values = np.concatenate(
+                [values, _to_datetime(buffer.values[max(n_complete, 0) :])]
+            )
+        if values.dtype.kind == "O":
+            import pandas as pd
+
+            return pd.to_datetime(values)
+        return values
+
+    def column_offset(self, name: str) -> int:
+        """The row index of the first value of the column, i.e. rows before it had
+        been dropped as they are out of the window."""
+        return self.columns[name].n_dropped
+
+    def __len__(self):
+        return self.n_rows + self._n_provisional
+
+    def fingerprint(self) -> Tuple:
+        """
+        A cheap summary of the parsed data (i.e. the number of rows, and the last
+        value of every column), which changes whenever new rows are parsed.
+        """
+        return len(self), tuple(
+            (name, last_value_bytes(buffer.values))
+            for name, buffer in self.columns.items()
+        )
+
+    def _read_raw(self) -> bytes:
+        if not self.is_file:
+            data = self.source.read()
+            if isinstance(data, str):
+                data = data.encode()
+            profiler.add_bytes_read(len(data))
+            return self._pending + data
+        with open(self.source, "rb") as f:
+            f.seek(0, 2)
+            if f.tell() < self.offset:
+                # the file had been truncated or re-written; start all over again.
+                self.reset()
+            f.seek(self.offset)
+            data = f.read()
+        profiler.add_bytes_read(len(data))
+        return data
+
+    def _consume(self, data: bytes, n_bytes: int) -> None:
+        self.offset += n_bytes
+        if not self.is_file:
+            self._pending = data[n_bytes:]
+
+    def _drop_provisional(self) -> None:
+        if self._n_provisional:
+            for buffer in self.columns.values():
+                buffer.truncate(self.n_rows)
+            for name in self._provisional_names:
+                self.columns.pop(name, None)
+            self._n_provisional = 0
+            self._provisional_names = []
+
+    def _append(self, parsed: Dict[str, np.ndarray], provisional: bool = False) -> int:
+        n_new = max((len(values) for values in parsed.values()), default=0)
+        if n_new == 0:
+            return 0
+        n_existing = len(self)
+        for name, values in parsed.items():
+            if name not in self.columns:
+                self.columns[name] = self._new_buffer()
+                self.columns[name].pad(n_existing)
+                if provisional:
+                    self._provisional_names.append(name)
+            self.columns[name].extend(values)
+        # columns that are absent from the new rows
+        for name, buffer in self.columns.items():
+            buffer.pad(n_existing + n_new - buffer.n_appended)
+        return n_new
+
+    def _drop_expired_rows(self, n_new: int) -> None:
+        """Drop the rows that are older than the window of seconds."""
+        self._read_times.extend(np.full(n_new, time.monotonic()))
+        column = self.window.column
+        if column in self.columns and self.kind(column) == DATETIME:
+            import pandas as pd
+
+            buffer = self.columns[column]
+            times = pd.DatetimeIndex(
+                self.plottable(column)[: self.n_rows - buffer.n_dropped]
+            )
+            is_recent = ~(
+                times < times.max() - pd.Timedelta(seconds=self.window.seconds)
+            )
+            # the index of the first row that is kept, where the rows after it are
+            # kept as well (datetimes are not necessarily sorted, or may be missing)
+            first_row = buffer.n_dropped + np.argmax(is_recent)
+        else:
+            read_times = self._read_times.values
+            n_expired = np.searchsorted(
+                read_times, read_times[-1] - self.window.seconds
+            )
+            first_row = self._read_times.n_dropped + n_expired
+        for buffer in (self._read_times, *self.columns.values()):
+            buffer.drop_head(first_row - buffer.n_dropped)
+
+    def read_new(self) -> int:
+        """
+        Parse everything appended to the source since the last call.
+
+        :return: the number of new complete rows
+        """
+        if self.cache is not None and not self._restored_from_cache:
+            self._restored_from_cache = True
+            self._restore_from_cache()
+        self._drop_provisional()
+        data = self._read_raw()
+        if not data:
+            return 0
+        end = data.rfind(b"\n") + 1
+        n_new = 0
+        if end > 0:
+            n_new = self._append(self._parse(data[:end], provisional=False))
+            self.n_rows += n_new
+            if n_new and self.window is not None and self.window.seconds is not None:
+                self._drop_expired_rows(n_new)
+        self._consume(data, end)
+        # before the incomplete trailing row is appended, which may e.g. add a
+        # column, or promote the dtype of one
+        if self.cache is not None and n_new:
+            self._store_to_cache()
+        if data[end:].strip():
+            self._n_provisional = self._append(
+                self._parse(data[end:], provisional=True), provisional=True
+            )
+        return n_new
@@ -1,13 +1,17 @@
+import json
 from argparse import ArgumentParser
+from functools import partial
 from io import StringIO
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
-from typing import TYPE_CHECKING, Union
+from loguru import logger
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Union
 
 if TYPE_CHECKING:
+    import pandas as pd
     from pandas._typing import FilePath, ReadCsvBuffer
+    from termplot.data_source.cache import SeriesCache
 
 from termplot.data_source import (
     DataSource,
@@ -15,6 +19,13 @@ from termplot.data_source import (
     DataSourceMissingException,
     DataSourceProcessingException,
 )
+from termplot.data_source.incremental import CATEGORICAL, TailReader, Window
+
+try:
+    # optional faster json decoder
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class JsonlDataSourceMissingException(DataSourceMissingException):
@@ -29,14 +40,15 @@ class JsonlDataSource(DataSource):
     def __init__(self, input_file: Path, args: ArgumentParser):
         super().__init__(input_file, args)
         self.figures = []
+        # the jsonl files that had been loaded as figures
+        self._known_files: Set[str] = set()
 
         if self.input.is_file():
             # assume it is jsonl file
-            self.figures.append(JsonlFigureData(self.input))
+            self._add_figures([self.input])
         else:  # is a folder
             # the given 'input' is a folder that contains jsonl file
-            for jsonl_file in self.input.glob("*.jsonl?"):
-                self.figures.append(JsonlFigureData(jsonl_file))
+            self._add_figures(sorted(self.input.glob("*.jsonl")))
             # if len(self.figures) == 0:
             # try to recursively
 
@@ -45,13 +57,133 @@ class JsonlDataSource(DataSource):
                 f"Unable to find jsonl files within '{self.input}'."
             )
 
+    def _add_figures(self, jsonl_files: List[Path]) -> None:
+        self.figures.extend(
+            self._load_figures(
+                [
+                    partial(
+                        JsonlFigureData,
+                        jsonl_file,
+                        cache=self.cache,
+                        window=self.window,
+                    )
+                    for jsonl_file in jsonl_files
+                ]
+            )
+        )
+        self._known_files.update(map(str, jsonl_files))
+
+    def refresh(self):
+        """Pick up jsonl files that had appeared since the last refresh."""
+        if self.input.is_file():
+            return
+        for jsonl_file in sorted(self.input.glob("*.jsonl")):
+            if str(jsonl_file) in self._known_files:
+                continue
+            try:
+                self._add_figures([jsonl_file])
+            except JsonlDataSourceProcessingException:
+                # e.g. the header had not been written yet; retry on next refresh
+                logger.debug("Skipping jsonl file without scalars: {}", jsonl_file)
+
+    def watched_paths(self):
+        paths = [Path(figure_data.path) for figure_data in self.figures]
+        if self.input.is_dir():
+            # for jsonl files that are created later on
+            paths.append(self.input)
+        return paths
+
     def __len__(self):
         return len(self.figures)
 
     def __getitem__(self, item):
-        figure_data = self.figures[item]
-        figure_data.refresh()
-        return figure_data
+        return self.figures[item]
+
+
+def _json_loads(line: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN and Infinity, which the json module writes by default
+            pass
+    return json.loads(line)
+
+
+def _to_array(values: List[Any]) -> np.ndarray:
+    """Convert a list of decoded json values into a typed numpy array."""
+    kinds = set(map(type, values))
+    if kinds <= {int, float, bool, type(None)}:
+        try:
+            if kinds <= {int}:
+                return np.array(values, dtype=np.int64)
+            return np.array(
+                [np.nan if v is None else v for v in values], dtype=np.float64
+            )
+        except OverflowError:
+            pass
+    array = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        array[i] = v
+    return array
+
+
+class JsonlTailReader(TailReader):
+    """
+    Incremental jsonl reader. Only the lines appended since the last read are
+    decoded, and nested keys are flattened (joined with '.') into columns.
+    """
+
+    def __init__(
+        self,
+        source,
+        cache: Optional["SeriesCache"] = None,
+        window: Optional[Window] = None,
+    ):
+        super().__init__(source, cache, window)
+        # cache of key path -> flattened column name
+        self._key_path_names: Dict[Tuple[str, ...], str] = {}
+
+    def _flatten(self, record: Dict, prefix: Tuple[str, ...], out: List):
+        for key, value in record.items():
+            path = prefix + (key,)
+            if isinstance(value, dict) and value:
+                self._flatten(value, path, out)
+                continue
+            name = self._key_path_names.get(path)
+            if name is None:
+                name = self._key_path_names[path] = ".".join(path)
+            out.append((name, value))
+        return out
+
+    def _parse(self, chunk: bytes, provisional: bool) -> Dict[str, np.ndarray]:
+        columns: Dict[str, List] = {}
+        n_rows = 0
+        for line in chunk.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = _json_loads(line)
+            except ValueError as e:
+                if provisional:
+                    # the trailing line is still being written
+                    return {}
+                raise JsonlDataSourceProcessingException(
+                    f"Invalid json line in '{self.source}': {line[:80]}"
+                ) from e
+            if not isinstance(record, dict):
+                continue
+            for name, value in self._flatten(record, (), []):
+                values = columns.get(name)
+                if values is None:
+                    values = columns[name] = []
+                if len(values) < n_rows:
+                    values.extend([None] * (n_rows - len(values)))
+                values.append(value)
+            n_rows += 1
+        for values in columns.values():
+            values.extend([None] * (n_rows - len(values)))
+        return {name: _to_array(values) for name, values in columns.items()}
 
 
 class JsonlFigureData(FigureData):
@@ -59,30 +191,13 @@ class JsonlFigureData(FigureData):
         self,
         path: Union["FilePath", "ReadCsvBuffer[bytes]", "ReadCsvBuffer[str]", StringIO],
         remove_nan: bool = True,
+        cache: Optional["SeriesCache"] = None,
+        window: Optional[Window] = None,
     ):
         # decide whether we should try to clean up nan values
         self.remove_nan = remove_nan
         self.path = path
-        i = 0
-
-        import json
-
-        while True:
-            try:
-                with open(path) as f:
-                    lines = f.read().splitlines()
-                df_inter = pd.DataFrame(lines)
-                df_inter.columns = ["json_element"]
-                self.df = pd.json_normalize(df_inter["json_element"].apply(json.loads))
-            except pd.errors.EmptyDataError:
-                i += 1
-                if i > 10:
-                    raise
-                import time
-
-                time.sleep((i * 0.05))
-            else:
-                break
+        self.reader = JsonlTailReader(path, cache=cache, window=window)
 
         self.refresh()
         if len(self.scalar_names) == 0:
@@ -91,7 +206,8 @@ class JsonlFigureData(FigureData):
             )
 
     def refresh(self):
-        pass
+        # only decode the lines that were appended since the last refresh
+        self.reader.read_new()
 
     @staticmethod
     def remove_nan_values(x_values, y_values, reference_values):
@@ -104,19 +220,15 @@ class JsonlFigureData(FigureData):
             y_values = y_values[_mapping]
         return x_values, y_values
 
-    @staticmethod
-    def try_obj_to_datetime(series: pd.Series):
-        if series.dtype == object:
-            # try to convert to datetime
-            series = pd.to_datetime(series)
-        return series
-
     def get_series(self, *, x: str, y: str):
-        y_values = self.df[y].to_numpy()
+        # e.g. datetime strings are converted, as per the kind of the column
+        y_values = self.reader.plottable(y)
         if x == "step":
-            x_values = np.arange(len(y_values))
+            x_values = np.arange(len(y_values)) + self.reader.column_offset(y)
         else:
-            x_values = self.df[x]
+            import pandas as pd
+
+            x_values = pd.Series(self.reader.plottable(x), name=x)
         if self.remove_nan:
             # remove nan values in x
             x_values, y_values = self.remove_nan_values(
@@ -127,9 +239,6 @@ class JsonlFigureData(FigureData):
                 x_values, y_values, reference_values=y_values
             )
 
-        x_values = self.try_obj_to_datetime(x_values)
-        y_values = self.try_obj_to_datetime(y_values)
-
         return x_values, y_values
 
     @property
@@ -138,7 +247,13 @@ class JsonlFigureData(FigureData):
 
     @property
     def scalar_names(self):
-        return list(self.df.columns)
+        return self.reader.names
+
+    def is_plottable(self, name: str) -> bool:
+        return self.reader.kind(name) != CATEGORICAL
+
+    def fingerprint(self):
+        return str(self.title), self.reader.fingerprint()
 
     def __repr__(self):
-        return f"{self.__class__.__name__}<path={self.path}|df={self.df}>"
+        return f"{self.__class__.__name__}<path={self.path}|rows={len(self.reader)}>"
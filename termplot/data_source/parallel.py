@@ -0,0 +1,82 @@
+import multiprocessing
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # python < 3.8
+    SharedMemory = None
+
+if TYPE_CHECKING:
+    from termplot.data_source import FigureData
+
+# pickled figure, name of the shared memory, and (offset, size) of each buffer
+_Payload = Tuple[bytes, Optional[str], List[Tuple[int, int]]]
+
+
+def _build_figure(factory: Callable[[], "FigureData"]) -> _Payload:
+    """
+    Runs in the worker process. The figure is pickled without its numpy buffers,
+    which are instead copied into one shared memory block.
+    """
+    figure = factory()
+    buffers = []
+    data = pickle.dumps(figure, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+    total_size = sum(raw.nbytes for raw in raw_buffers)
+    if total_size == 0:
+        return data, None, [(0, 0)] * len(raw_buffers)
+
+    shm = SharedMemory(create=True, size=total_size)
+    layout = []
+    offset = 0
+    for raw in raw_buffers:
+        shm.buf[offset : offset + raw.nbytes] = raw
+        layout.append((offset, raw.nbytes))
+        offset += raw.nbytes
+    shm.close()
+    # the receiving process is responsible to unlink it, so stop the resource
+    # tracker of this worker from removing it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return data, shm.name, layout
+
+
+def _receive_figure(payload: _Payload) -> "FigureData":
+    data, shm_name, layout = payload
+    if shm_name is None:
+        return pickle.loads(data, buffers=[bytearray() for _ in layout])
+    shm = SharedMemory(name=shm_name)
+    try:
+        buffers = [bytearray(shm.buf[start : start + size]) for start, size in layout]
+    finally:
+        shm.close()
+        shm.unlink()
+    return pickle.loads(data, buffers=buffers)
+
+
+def load_in_parallel(
+    factories: List[Callable[[], "FigureData"]], jobs: Optional[int]
+) -> List["FigureData"]:
+    """
+    Construct each figure (i.e. parse its input) in a pool of processes.
+
+    :param factories: picklable callables that each construct one figure
+    :param jobs: number of processes, None denotes the number of cpus
+    :return: the figures, in the same order as the given factories
+    """
+    if SharedMemory is None:
+        logger.warning("Parallel loading requires python >= 3.8")
+        return [factory() for factory in factories]
+    # not forked, as the process may have threads (e.g. the loader and the
+    # filesystem observer of --follow), whose locks a fork could copy while held
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return [
+            _receive_figure(payload)
+            for payload in executor.map(_build_figure, factories)
+        ]
@@ -1,16 +1,26 @@
 from argparse import ArgumentParser
-from functools import lru_cache
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Set, Tuple, Union
 
 import numpy as np
-from tensorboard.backend.event_processing.event_accumulator import EventAccumulator
 
 from termplot.data_source import (
     DataSource,
     FigureData,
     DataSourceProcessingException,
     DataSourceMissingException,
+    is_scalar_name_selected,
 )
+from termplot.data_source.incremental import Window
+from termplot.data_source.tfevents import ScalarEventAccumulator
+from termplot.downsample import minmax_indices
+from loguru import logger
+
+if TYPE_CHECKING:
+    from tensorboard.backend.event_processing.event_accumulator import (
+        EventAccumulator,
+    )
 
 
 class TensorboardDataSourceMissingException(DataSourceMissingException):
@@ -25,49 +35,151 @@ class TensorboardDataSource(DataSource):
     def __init__(self, input_file: Path, args: ArgumentParser):
         super().__init__(input_file, args)
         self.figures = []
-
-        def _add_figure(_folder):
-            _folder = str(_folder)
-            self.figures.append(
-                TensorboardFigureData(
-                    ea=EventAccumulator(_folder),
-                    folder=_folder,
-                )
-            )
+        self._known_folders: Set[str] = set()
+        # whether the given folder nest multiple event folders
+        self._is_nested = False
 
         if self.input.is_file():
             if self.input.name.startswith("events.out."):
                 # the given 'folder' is the actual event file
-                _add_figure(self.input)
+                self._add_figure(self.input)
         else:  # is a folder
             if next(self.input.glob("events.out.*"), None) is not None:
                 # the given folder is the actual event folder
-                _add_figure(self.input)
+                self._add_figure(self.input)
             else:
                 # the given folder nest multiple event folders
-                for folder in self.input.iterdir():
+                self._is_nested = True
+                folders = [
+                    str(folder)
+                    for folder in self.input.iterdir()
                     # ensure they are event folder
-                    if next(folder.glob("events.out.*"), None) is not None:
-                        _add_figure(folder)
+                    if next(folder.glob("events.out.*"), None) is not None
+                ]
+                self._known_folders.update(folders)
+                self.figures.extend(
+                    self._load_figures(
+                        [self._figure_factory(folder) for folder in folders]
+                    )
+                )
 
         if len(self.figures) == 0:
             raise TensorboardDataSourceMissingException(
                 f"Unable to find tensorboard event files within '{self.input}'."
             )
 
+    def _create_accumulator(self, folder: str):
+        if self.args.tensorboard_reader == "tensorboard":
+            from tensorboard.backend.event_processing import event_accumulator
+
+            # only scalars are plotted, hence retain (at most) one of everything else
+            size_guidance = {
+                kind: 1
+                for kind in (
+                    event_accumulator.IMAGES,
+                    event_accumulator.AUDIO,
+                    event_accumulator.HISTOGRAMS,
+                    event_accumulator.COMPRESSED_HISTOGRAMS,
+                    event_accumulator.TENSORS,
+                )
+            }
+            # every scalar is retained (rather than reservoir sampled), such that the
+            # extrema are kept when reducing them to --tensorboard-max-points (once
+            # per Reload, see TensorboardFigureData._get_scalar_array). The native
+            # reader compacts them as they are read instead.
+            size_guidance[event_accumulator.SCALARS] = 0
+            return event_accumulator.EventAccumulator(
+                folder, size_guidance=size_guidance
+            )
+        # only decode scalars of the tags that will be plotted
+        return ScalarEventAccumulator(
+            folder,
+            tag_filter=partial(
+                is_scalar_name_selected,
+                whitelist=self.args.whitelist,
+                blacklist=self.args.blacklist,
+            ),
+            cache=self.cache,
+            cache_namespace=(
+                f"{self.args.whitelist}|{self.args.blacklist}"
+                f"|{self.args.tensorboard_max_points}"
+            ),
+            window=self.window,
+            max_points=self.args.tensorboard_max_points,
+        )
+
+    def _figure_factory(self, folder: str):
+        return partial(
+            TensorboardFigureData,
+            ea=self._create_accumulator(folder),
+            folder=folder,
+            window=self.window,
+            max_points=self.args.tensorboard_max_points,
+        )
+
+    def _load_figures(self, factories):
+        if self.args.tensorboard_reader == "tensorboard":
+            # EventAccumulator cannot be sent across processes
+            return [factory() for factory in factories]
+        return super()._load_figures(factories)
+
+    def _add_figure(self, folder):
+        folder = str(folder)
+        self.figures.append(self._figure_factory(folder)())
+        self._known_folders.add(folder)
+
+    def refresh(self):
+        """Pick up run folders that had appeared since the last refresh."""
+        if not self._is_nested:
+            return
+        for folder in self.input.iterdir():
+            if str(folder) in self._known_folders:
+                continue
+            if next(folder.glob("events.out.*"), None) is not None:
+                try:
+                    self._add_figure(folder)
+                except TensorboardDataSourceProcessingException:
+                    # the run had not written any scalar yet; retry on next refresh
+                    logger.debug("Skipping run folder without scalars: {}", folder)
+
+    def watched_paths(self):
+        paths = []
+        for folder in map(Path, self._known_folders):
+            if folder.is_file():
+                paths.append(folder)
+            else:
+                # the folder itself, for event files that are created later on
+                paths.append(folder)
+                paths.extend(p for p in folder.iterdir() if "tfevents" in p.name)
+        if self._is_nested:
+            # folders that may become runs, once an event file is written in them
+            paths.extend(p for p in self.input.iterdir() if p.is_dir())
+        return paths
+
     def __len__(self):
         return len(self.figures)
 
     def __getitem__(self, item):
-        figure_data = self.figures[item]
-        figure_data.refresh()
-        return figure_data
+        return self.figures[item]
 
 
 class TensorboardFigureData(FigureData):
-    def __init__(self, ea: EventAccumulator, folder: str):
+    def __init__(
+        self,
+        ea: Union["EventAccumulator", ScalarEventAccumulator],
+        folder: str,
+        window: Optional[Window] = None,
+        max_points: Optional[int] = None,
+    ):
         self.ea = ea
         self.folder = folder
+        self.window = window
+        self.max_points = max_points
+        # cached time origin, and the set of scalar names it was computed from
+        self._time_origin: Optional[float] = None
+        self._time_origin_scalar_names: Optional[Tuple[str, ...]] = None
+        # the (windowed and reduced) series of each scalar, until the next refresh
+        self._scalar_arrays: Dict[str, np.ndarray] = {}
         self.refresh()
         if len(self.scalar_names) == 0:
             raise TensorboardDataSourceProcessingException(
@@ -77,15 +189,12 @@ class TensorboardFigureData(FigureData):
 
     def refresh(self):
         self.ea.Reload()
+        self._scalar_arrays.clear()
 
     def get_series(self, *, x: str, y: str):
         if x not in ("step", "time"):
             raise ValueError("Tensorboard only support 'step' or 'time' as x-axis")
-        series = np.array(self.ea.Scalars(y))
-        # fixes when the pervious output results in an array of object.
-        if series.dtype == np.dtype("object"):
-            series = np.array([[o.wall_time, o.step, o.value] for o in series])
-        wall_t, steps, vals = series.T
+        wall_t, steps, vals = self._get_scalar_array(y).T
         if x == "step":
             x_values = steps
         else:
@@ -93,6 +202,32 @@ class TensorboardFigureData(FigureData):
             x_values = wall_t - self._get_time_origin()
         return x_values, vals
 
+    def _get_scalar_array(self, scalar_name: str) -> np.ndarray:
+        """
+        :return: an array of shape (n, 3), where each row is (wall_time, step, value)
+        """
+        if scalar_name in self._scalar_arrays:
+            return self._scalar_arrays[scalar_name]
+        series = np.array(self.ea.Scalars(scalar_name))
+        # fixes when the pervious output results in an array of object.
+        if series.dtype == np.dtype("object"):
+            series = np.array([[o.wall_time, o.step, o.value] for o in series])
+        if not isinstance(self.ea, ScalarEventAccumulator):
+            # tensorboard's accumulator retains every point; the window and the
+            # budget are applied here instead
+            if self.window is not None and self.window.n_points is not None:
+                series = series[-self.window.n_points :]
+            if self.window is not None and self.window.seconds is not None:
+                if len(series):
+                    wall_t = series[:, 0]
+                    series = series[wall_t >= wall_t[-1] - self.window.seconds]
+            if self.max_points is not None and len(series) > self.max_points:
+                n_buckets = max(1, (self.max_points - 2) // 2)
+                indices = minmax_indices(series[:, 2], n_buckets, bucket_edges=False)
+                series = series[indices]
+        self._scalar_arrays[scalar_name] = series
+        return series
+
     @property
     def title(self) -> str:
         return self.ea.path
@@ -101,22 +236,41 @@ class TensorboardFigureData(FigureData):
     def scalar_names(self):
         return self.ea.Tags()["scalars"]
 
-    @lru_cache()
     def _get_time_origin(self) -> float:
         """
         Helper function that get the origin of time via checking through all stats.
+        The result is cached until a new stat appears after a refresh.
         :return: time origin
         """
+        scalar_names = tuple(self.scalar_names)
+        if self._time_origin_scalar_names == scalar_names:
+            return self._time_origin
+
         # find the earliest time across all stats
         wall_t_origin = float("inf")
 
         for scalar_name in self.scalar_names:
             # series = np.array(self.ea.Scalars(scalar_name))
             # wall_t, steps, vals = series.T
-            first_item = self.ea.Scalars(scalar_name)[0]
-            wall_t_origin = min(wall_t_origin, first_item.wall_time)
+            wall_t_origin = min(
+                wall_t_origin, self._get_scalar_array(scalar_name)[0, 0]
+            )
 
+        self._time_origin = wall_t_origin
+        self._time_origin_scalar_names = scalar_names
         return wall_t_origin
 
+    def fingerprint(self):
+        if isinstance(self.ea, ScalarEventAccumulator):
+            return self.title, self.ea.fingerprint()
+        fingerprint = []
+        for scalar_name in self.scalar_names:
+            events = self.ea.Scalars(scalar_name)
+            last = events[-1] if events else None
+            fingerprint.append(
+                (scalar_name, len(events), last and (last.step, repr(last.value)))
+            )
+        return self.title, tuple(fingerprint)
+
     def __repr__(self):
         return f"{self.__class__.__name__}<folder={self.folder}|ea={self.ea}>"
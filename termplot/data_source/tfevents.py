@@ -0,0 +1,327 @@
+"""
+A minimal reader of tensorboard event files that only extracts scalar summaries.
+
+Event files are TFRecord files, where each record is a serialised ``Event``
+protobuf. Instead of importing tensorboard (and decoding images, histograms, etc.
+that are never plotted), the few protobuf fields that matter are parsed by hand:
+
+    Event:         1: wall_time (double), 2: step (int64), 5: summary (Summary)
+    Summary:       1: value (repeated Value)
+    Summary.Value: 1: tag (string), 2: simple_value (float)
+"""
+
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from termplot.data_source.incremental import ColumnBuffer, Window, last_value_bytes
+from termplot.downsample import minmax_indices
+from termplot.profiling import profiler
+
+if TYPE_CHECKING:
+    from termplot.data_source.cache import SeriesCache
+
+_READ_CHUNK_SIZE = 16 * 1024 * 1024
+# record header: uint64 length, uint32 masked crc of length
+_RECORD_HEADER = struct.Struct("<QI")
+# record footer: uint32 masked crc of data
+_RECORD_FOOTER_SIZE = 4
+_DOUBLE = struct.Struct("<d")
+_FLOAT = struct.Struct("<f")
+
+# protobuf keys, i.e. (field_number << 3) | wire_type
+_EVENT_WALL_TIME = (1 << 3) | 1
+_EVENT_STEP = (2 << 3) | 0
+_EVENT_SUMMARY = (5 << 3) | 2
+_SUMMARY_VALUE = (1 << 3) | 2
+_VALUE_TAG = (1 << 3) | 2
+_VALUE_SIMPLE_VALUE = (2 << 3) | 5
+
+_NOT_SEEN = object()
+_SERIES_FIELDS = ("wall_time", "step", "value")
+
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip_field(buf: bytes, pos: int, wire_type: int) -> int:
+    if wire_type == 0:
+        while buf[pos] & 0x80:
+            pos += 1
+        return pos + 1
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        length, pos = _read_varint(buf, pos)
+        return pos + length
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+
+
+class EventFileLoader:
+    """
+    Iterates through the records of one event file, remembering the offset of the
+    last complete record such that the next call resumes from there.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+
+    def iter_new_records(self) -> Iterator[Tuple[bytes, int, int]]:
+        """
+        :return: an iterator of (buffer, start, end) of the new records' payload
+        """
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            leftover = b""
+            while True:
+                chunk = f.read(_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                profiler.add_bytes_read(len(chunk))
+                buf = leftover + chunk if leftover else chunk
+                pos = 0
+                while pos + _RECORD_HEADER.size <= len(buf):
+                    length, _ = _RECORD_HEADER.unpack_from(buf, pos)
+                    start = pos + _RECORD_HEADER.size
+                    end = start + length + _RECORD_FOOTER_SIZE
+                    if end > len(buf):
+                        # incomplete record (or still being written)
+                        break
+                    yield buf, start, start + length
+                    pos = end
+                self.offset += pos
+                leftover = buf[pos:]
+
+
+class ScalarEventAccumulator:
+    """
+    A scalar-only, drop-in replacement of tensorboard's ``EventAccumulator`` for
+    what termplot uses of it (i.e. ``Reload``, ``Tags``, ``Scalars`` and ``path``).
+
+    Every ``Reload`` only reads the records appended since the previous one, and
+    values of tags that are rejected by ``tag_filter`` are never decoded.
+
+    :param cache: optional on-disk cache of the parsed scalars
+    :param cache_namespace: distinguishes cache entries of the same path, e.g. when
+        a different ``tag_filter`` is used
+    :param window: if given, only the most recent points of every tag are kept,
+        where the age of a point is relative to the wall time of the tag's last one
+    :param max_points: if given, a tag that exceeds it is compacted to half of it
+        (keeping the extrema of equally sized buckets, see ``minmax_indices``), in a
+        single pass
+    """
+
+    def __init__(
+        self,
+        path: str,
+        tag_filter: Optional[Callable[[str], bool]] = None,
+        cache: Optional["SeriesCache"] = None,
+        cache_namespace: str = "",
+        window: Optional[Window] = None,
+        max_points: Optional[int] = None,
+    ):
+        self.path = path
+        self.window = window
+        self.max_points = max_points
+        self.tag_filter = tag_filter
+        self.cache = cache
+        self._cache_key = (
+            f"{self.__class__.__name__}:{os.path.abspath(path)}:{cache_namespace}"
+        )
+        self._restored_from_cache = False
+        # absolute path of event file -> loader
+        self._loaders: Dict[str, EventFileLoader] = {}
+        # tag -> (wall_time, step, value)
+        self._series: Dict[str, Tuple[ColumnBuffer, ColumnBuffer, ColumnBuffer]] = {}
+        # raw tag bytes -> decoded tag, or None if the tag is filtered out
+        self._tag_cache: Dict[bytes, Optional[str]] = {}
+
+    def _event_files(self) -> List[Path]:
+        path = Path(self.path)
+        if path.is_file():
+            return [path]
+        return sorted(p for p in path.iterdir() if "tfevents" in p.name)
+
+    def _decode_tag(self, raw_tag: bytes) -> Optional[str]:
+        tag = self._tag_cache.get(raw_tag, _NOT_SEEN)
+        if tag is _NOT_SEEN:
+            tag = raw_tag.decode(errors="replace")
+            if self.tag_filter is not None and not self.tag_filter(tag):
+                tag = None
+            self._tag_cache[raw_tag] = tag
+        return tag
+
+    def _parse_summary(self, buf, pos, end, wall_time, step, new_values):
+        while pos < end:
+            key, pos = _read_varint(buf, pos)
+            if key != _SUMMARY_VALUE:
+                pos = _skip_field(buf, pos, key & 0x7)
+                continue
+            length, pos = _read_varint(buf, pos)
+            value_end = pos + length
+            tag = simple_value = None
+            while pos < value_end:
+                key, pos = _read_varint(buf, pos)
+                if key == _VALUE_TAG:
+                    length, pos = _read_varint(buf, pos)
+                    tag = self._decode_tag(buf[pos : pos + length])
+                    pos += length
+                    if tag is None:
+                        break
+                elif key == _VALUE_SIMPLE_VALUE:
+                    (simple_value,) = _FLOAT.unpack_from(buf, pos)
+                    pos += 4
+                else:
+                    pos = _skip_field(buf, pos, key & 0x7)
+            pos = value_end
+            if tag is not None and simple_value is not None:
+                series = new_values.get(tag)
+                if series is None:
+                    series = new_values[tag] = ([], [], [])
+                series[0].append(wall_time)
+                series[1].append(step)
+                series[2].append(simple_value)
+
+    def _parse_event(self, buf, pos, end, new_values):
+        wall_time = 0.0
+        step = 0
+        summary = None
+        while pos < end:
+            key, pos = _read_varint(buf, pos)
+            if key == _EVENT_WALL_TIME:
+                (wall_time,) = _DOUBLE.unpack_from(buf, pos)
+                pos += 8
+            elif key == _EVENT_STEP:
+                step, pos = _read_varint(buf, pos)
+                if step >= 1 << 63:
+                    step -= 1 << 64
+            elif key == _EVENT_SUMMARY:
+                length, pos = _read_varint(buf, pos)
+                summary = (pos, pos + length)
+                pos += length
+            else:
+                pos = _skip_field(buf, pos, key & 0x7)
+        if summary is not None:
+            self._parse_summary(buf, *summary, wall_time, step, new_values)
+
+    def _restore_from_cache(self) -> None:
+        entry = self.cache.load(self._cache_key)
+        if entry is None:
+            return
+        for event_file, offset in entry.offsets.items():
+            self._loaders[event_file] = EventFileLoader(Path(event_file))
+            self._loaders[event_file].offset = offset
+        for name, values in entry.columns.items():
+            field, tag = name.split(":", 1)
+            if tag not in self._series:
+                self._series[tag] = (None, None, None)
+            series = list(self._series[tag])
+            series[_SERIES_FIELDS.index(field)] = ColumnBuffer.from_array(values)
+            self._series[tag] = tuple(series)
+
+    def _store_to_cache(self) -> None:
+        n_rows = sum(len(series[0]) for series in self._series.values())
+        if not self.cache.should_store(self._cache_key, n_rows):
+            return
+        self.cache.store(
+            self._cache_key,
+            offsets={path: loader.offset for path, loader in self._loaders.items()},
+            columns={
+                f"{field}:{tag}": buffer.values
+                for tag, series in self._series.items()
+                for field, buffer in zip(_SERIES_FIELDS, series)
+            },
+        )
+
+    def Reload(self) -> "ScalarEventAccumulator":
+        if self.cache is not None and not self._restored_from_cache:
+            self._restored_from_cache = True
+            self._restore_from_cache()
+        has_new_values = False
+        for event_file in self._event_files():
+            event_file = os.path.abspath(event_file)
+            loader = self._loaders.get(event_file)
+            if loader is None:
+                loader = self._loaders[event_file] = EventFileLoader(Path(event_file))
+            new_values = {}
+            for buf, start, end in loader.iter_new_records():
+                self._parse_event(buf, start, end, new_values)
+            has_new_values = has_new_values or bool(new_values)
+            for tag, (wall_times, steps, values) in new_values.items():
+                series = self._series.get(tag)
+                if series is None:
+                    max_length = self.window and self.window.n_points
+                    series = self._series[tag] = (
+                        ColumnBuffer(max_length=max_length),
+                        ColumnBuffer(max_length=max_length),
+                        ColumnBuffer(max_length=max_length),
+                    )
+                series[0].extend(np.array(wall_times, dtype=np.float64))
+                series[1].extend(np.array(steps, dtype=np.int64))
+                series[2].extend(np.array(values, dtype=np.float32))
+                if self.window is not None and self.window.seconds is not None:
+                    self._drop_expired(series)
+                if self.max_points is not None and len(series[0]) > self.max_points:
+                    self._series[tag] = self._compact(series)
+        if self.cache is not None and has_new_values:
+            self._store_to_cache()
+        return self
+
+    def _drop_expired(self, series: Tuple[ColumnBuffer, ...]) -> None:
+        wall_times = series[0].values
+        # wall times are not necessarily sorted, e.g. when a run was resumed
+        n_expired = np.argmax(wall_times >= wall_times[-1] - self.window.seconds)
+        for buffer in series:
+            buffer.drop_head(n_expired)
+
+    def _compact(self, series: Tuple[ColumnBuffer, ...]) -> Tuple[ColumnBuffer, ...]:
+        # to (about) half of the budget, such that it is amortised over the next
+        # points. Buckets keep their minimum and maximum, i.e. (at most) 2 points.
+        values = series[2].values
+        n_buckets = max(1, (self.max_points // 2 - 2) // 2)
+        indices = minmax_indices(values, n_buckets, bucket_edges=False)
+        compacted = []
+        for buffer in series:
+            compacted.append(ColumnBuffer(max_length=buffer.max_length))
+            compacted[-1].extend(buffer.values[indices])
+        return tuple(compacted)
+
+    def Tags(self) -> Dict[str, List[str]]:
+        return {"scalars": list(self._series.keys())}
+
+    def Scalars(self, tag: str) -> np.ndarray:
+        """
+        :return: an array of shape (n, 3), where each row is (wall_time, step, value)
+        """
+        wall_times, steps, values = self._series[tag]
+        return np.column_stack([wall_times.values, steps.values, values.values])
+
+    def fingerprint(self) -> Tuple:
+        """The number of points, and the last step and value, of every tag."""
+        return tuple(
+            (
+                tag,
+                len(steps),
+                last_value_bytes(steps.values),
+                last_value_bytes(values.values),
+            )
+            for tag, (_, steps, values) in self._series.items()
+        )
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}<path={self.path}>"
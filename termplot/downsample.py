@@ -0,0 +1,194 @@
+from typing import Tuple
+
+import numpy as np
+
+# the number of points whose triangles are computed at once, and the size of the
+# buckets above which they are computed one by one instead (see lttb_indices)
+_LTTB_BLOCK_POINTS = 1 << 16
+_LTTB_MAX_VECTORISED_BUCKET = 1024
+
+
+def _take(values, indices: np.ndarray):
+    # keep the type of the given values, e.g. pandas series of datetime
+    if hasattr(values, "iloc"):
+        return values.iloc[indices]
+    return values[indices]
+
+
+def _as_numeric(values) -> np.ndarray:
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return values.astype(np.float64, copy=False)
+    if values.dtype.kind in "mM":
+        return values.astype(np.int64).astype(np.float64)
+    # non-numerical x-axis; use the position instead
+    return np.arange(len(values), dtype=np.float64)
+
+
+def _nan_argextrema(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The positions of the minimum and the maximum along the last axis, ignoring
+    NaN. That of an all-NaN row is its first position.
+    """
+    is_nan = np.isnan(values)
+    if not is_nan.any():
+        return np.argmin(values, axis=-1), np.argmax(values, axis=-1)
+    return (
+        np.argmin(np.where(is_nan, np.inf, values), axis=-1),
+        np.argmax(np.where(is_nan, -np.inf, values), axis=-1),
+    )
+
+
+def minmax_indices(
+    y: np.ndarray, n_buckets: int, bucket_edges: bool = True
+) -> np.ndarray:
+    """
+    Split the series into buckets of equal count, and keep the first, the minimum,
+    the maximum and the last point of each bucket. Extrema are never lost, hence
+    spikes are preserved.
+
+    NaN values are ignored, unless a bucket has nothing else (then its first point
+    is kept).
+
+    :param bucket_edges: keep the first and the last point of every bucket (i.e. up
+        to 4 points per bucket), rather than only those of the whole series (i.e.
+        at most 2 points per bucket, plus 2)
+    """
+    n = len(y)
+    bucket_size = int(np.ceil(n / n_buckets))
+    n_full = (n // bucket_size) * bucket_size
+    offsets = np.arange(0, n_full, bucket_size)
+
+    buckets = y[:n_full].reshape(-1, bucket_size)
+    selected = [offsets + i for i in _nan_argextrema(buckets)]
+    if bucket_edges:
+        selected += [offsets, offsets + bucket_size - 1]
+    else:
+        selected.append(np.array([0, n - 1]))
+    if n_full < n:
+        tail = y[n_full:]
+        selected.append(n_full + np.array(_nan_argextrema(tail)))
+        if bucket_edges:
+            selected.append(np.array([n_full, n - 1]))
+    return np.unique(np.concatenate(selected))
+
+
+def _largest_triangles(
+    x: np.ndarray,
+    y: np.ndarray,
+    prev_point: Tuple[np.ndarray, np.ndarray],
+    next_point: Tuple[np.ndarray, np.ndarray],
+) -> np.ndarray:
+    """
+    For each bucket (i.e. a row of points), the position of the point that forms the
+    largest triangle with the given previous and next point (x, y) of that bucket.
+    """
+    prev_x, prev_y = prev_point[0][:, None], prev_point[1][:, None]
+    next_x, next_y = next_point[0][:, None], next_point[1][:, None]
+    # twice the area of the triangle, up to its sign
+    areas = np.abs((prev_x - next_x) * (y - prev_y) + (next_y - prev_y) * (x - prev_x))
+    return np.argmax(areas, axis=1)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets. Keeps the first and last point, and for each
+    bucket in between, the point that forms the largest triangle with the point
+    kept in the previous bucket and the average of the next bucket.
+
+    Small buckets are computed at once (in blocks of about ``_LTTB_BLOCK_POINTS``
+    points), as the per-bucket overhead of numpy would otherwise dominate. Hence,
+    the point kept in the previous bucket is approximated: by the average of that
+    bucket first, and then by the point that this first pass had kept. Buckets of
+    more than ``_LTTB_MAX_VECTORISED_BUCKET`` points are computed one after the
+    other (exactly).
+
+    Points with a NaN (or infinite) coordinate are left out, as they would spread
+    to the averages and the triangles of the neighbouring buckets.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.all():
+        positions = np.flatnonzero(finite)
+        if len(positions) <= n_out:
+            return positions
+        return positions[lttb_indices(x[positions], y[positions], n_out)]
+    n = len(y)
+    # the n_out - 2 buckets between the first and the last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # the averages of the buckets, followed by the last point
+    counts = np.diff(np.append(edges, n))
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+
+    n_buckets = n_out - 2
+    starts, ends = edges[:-1], edges[1:]
+    max_count = counts[:-1].max()
+    kept = np.empty(n_buckets, dtype=np.int64)
+    if max_count > _LTTB_MAX_VECTORISED_BUCKET:
+        prev = 0
+        for i in range(n_buckets):
+            start, end = starts[i], ends[i]
+            prev = kept[i] = (
+                start
+                + _largest_triangles(
+                    x[None, start:end],
+                    y[None, start:end],
+                    (x[prev : prev + 1], y[prev : prev + 1]),
+                    (avg_x[i + 1 : i + 2], avg_y[i + 1 : i + 2]),
+                )[0]
+            )
+        return np.concatenate([[0], kept, [n - 1]])
+
+    # the previous bucket of the first one is the first point
+    prev_avg_x = np.concatenate([[x[0]], avg_x[:-2]])
+    prev_avg_y = np.concatenate([[y[0]], avg_y[:-2]])
+    block_size = max(1, _LTTB_BLOCK_POINTS // max_count)
+    # the point that the first pass kept in the bucket before the block
+    prev_first_pass = 0
+    for start in range(0, n_buckets, block_size):
+        block = slice(start, start + block_size)
+        following = slice(start + 1, start + block_size + 1)
+        # the points of each bucket (one per row), where the buckets that are one
+        # point shorter repeat their last point
+        indices = np.minimum(
+            starts[block, None] + np.arange(max_count), ends[block, None] - 1
+        )
+        bucket_x, bucket_y = x[indices], y[indices]
+        rows = np.arange(len(indices))
+        next_avg = avg_x[following], avg_y[following]
+        first_pass = indices[
+            rows,
+            _largest_triangles(
+                bucket_x, bucket_y, (prev_avg_x[block], prev_avg_y[block]), next_avg
+            ),
+        ]
+        prev = np.concatenate([[prev_first_pass], first_pass[:-1]])
+        kept[block] = indices[
+            rows, _largest_triangles(bucket_x, bucket_y, (x[prev], y[prev]), next_avg)
+        ]
+        prev_first_pass = first_pass[-1]
+    return np.concatenate([[0], kept, [n - 1]])
+
+
+def downsample(x_values, y_values, width: int, mode: str = "minmax") -> Tuple:
+    """
+    Reduce the number of points of a series to what can be displayed within the
+    given width (in pixels).
+
+    :param x_values: the x values, numpy array or pandas series
+    :param y_values: the y values
+    :param width: the number of horizontal pixels available
+    :param mode: either 'minmax' or 'lttb'
+    :return: the downsampled x and y values
+    """
+    n = len(y_values)
+    if mode == "none" or width is None or width < 2 or n <= 2 * width:
+        return x_values, y_values
+    y = _as_numeric(y_values)
+    if mode == "minmax":
+        indices = minmax_indices(y, width)
+    elif mode == "lttb":
+        indices = lttb_indices(_as_numeric(x_values), y, 2 * width)
+    else:
+        raise ValueError(f"Unknown downsampling mode '{mode}'")
+    return _take(x_values, indices), _take(y_values, indices)
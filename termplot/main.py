@@ -1,24 +1,29 @@
 import argparse
+import os
+import shutil
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Tuple
-from typing import Union, Type
-from loguru import logger
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional
+from typing import Tuple
+from typing import Type
 
-import argcomplete
 import warnings
 
 from termplot._version import __version__
 from termplot.backend.base_plotter import Plotter, PlottingError
 from termplot.data_source import (
-    FigureData,
+    FigureSnapshot,
     DataSource,
     DataSourceMissingException,
     DataSourceProcessingException,
     NonNumericalSeries,
 )
 from termplot.monitor import AbstractMonitor
-from termplot.monitor.fs_monitor import FilesystemMonitor
+from termplot.profiling import profiler
+
+if TYPE_CHECKING:
+    from termplot.smoothing import SeriesSmoother
 
 
 def pair_of_num(arg):
@@ -54,13 +59,73 @@ parser.add_argument(
 )
 parser.add_argument("--version", action="version", version=f"termplot {__version__}")
 parser.add_argument("--debug", action="store_true")
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Report the time spent in each stage of every refresh, along with the "
+    "bytes read and the peak memory usage, as json lines to stderr.",
+)
+parser.add_argument(
+    "--profile-output",
+    metavar="FILE",
+    type=str,
+    help="Append the --profile reports to the given jsonl file instead of stderr "
+    "(implies --profile).",
+)
+parser.add_argument(
+    "--profile-dump",
+    metavar="FILE",
+    type=str,
+    help="Dump the cProfile stats of the slowest refresh to the given file, which "
+    "can be inspected with 'python -m pstats FILE' (implies --profile).",
+)
+
+parser.add_argument(
+    "-j",
+    "--jobs",
+    metavar="N",
+    default=1,
+    type=int,
+    help="Number of processes used to load multiple runs in parallel (0 denotes "
+    "the number of cpus).",
+)
+parser.add_argument(
+    "--cache-dir",
+    metavar="DIR",
+    type=str,
+    help="Cache parsed series in the given folder, such that the next launch only "
+    "needs to parse newly appended data.",
+)
+parser.add_argument(
+    "--cache-size",
+    metavar="MB",
+    default=2048,
+    type=int,
+    help="Maximum size of the cache folder, least recently used entries are evicted.",
+)
+parser.add_argument(
+    "--window",
+    metavar="N",
+    type=int,
+    help="Only keep the last N points of every series, such that the memory stays "
+    "bounded however long the run lasts (--cache-dir is then not used).",
+)
+parser.add_argument(
+    "--window-seconds",
+    metavar="T",
+    type=float,
+    help="Only keep the points of the last T seconds of every series, i.e. by the "
+    "wall time of tensorboard events, or by the -x datetime column of the other data "
+    "sources. Without such a column, rows are aged by the time when they were read "
+    "(i.e. the rows read at startup are all equally recent).",
+)
 
 # plotting generic flags
 parser.add_argument(
     "--backend",
     default="plotext",
     help="Set the plotting backend",
-    choices=["plotext", "matplotlib", "matplotlib-terminal"],
+    choices=["plotext", "matplotlib", "matplotlib-terminal", "braille"],
     type=str,
 )
 # plotting generic flags
@@ -71,6 +136,22 @@ parser.add_argument(
     choices=["tensorboard", "csv", "jsonl"],
     type=str,
 )
+parser.add_argument(
+    "--tensorboard-reader",
+    default="native",
+    help="Set the reader of tensorboard event files. 'native' only parses scalars, "
+    "without importing tensorboard.",
+    choices=["native", "tensorboard"],
+    type=str,
+)
+parser.add_argument(
+    "--tensorboard-max-points",
+    metavar="N",
+    type=int,
+    help="Keep at most N points (but at least 4) of every tensorboard tag, where the "
+    "minimum and maximum of the series are always kept. By default, every point is "
+    "kept.",
+)
 parser.add_argument(
     "-m",
     "--matplotlib",
@@ -160,7 +241,16 @@ parser.add_argument(
     type=float,
     metavar="secs",
     default=5,
-    help="seconds to wait between updates",
+    help="Minimum seconds between updates. The plot is updated as soon as the data "
+    "changes, but no more often than this.",
+)
+parser.add_argument(
+    "--debounce",
+    type=float,
+    metavar="secs",
+    default=0.2,
+    help="Seconds without new file changes before a burst of changes is considered "
+    "to be over (and the plot is updated).",
 )
 
 # filtering for stats name
@@ -240,6 +330,33 @@ parser.add_argument(
     action="store_true",
     help="Writes the raw image bytes to stdout.",
 )
+parser.add_argument(
+    "--render-workers",
+    metavar="N",
+    type=int,
+    default=0,
+    help="Render the figure as tiles of --tile-columns columns of subplots (each "
+    "with its own canvas) in N processes, which are stitched into the final image. "
+    "Tiles whose subplots had not changed are re-used. The output only depends on "
+    "--tile-columns, i.e. N=1 renders the same tiles within the main process.",
+)
+parser.add_argument(
+    "--tile-columns",
+    metavar="K",
+    type=int,
+    default=1,
+    help="The number of columns of subplots of each tile (see --render-workers).",
+)
+parser.add_argument(
+    "--graphics",
+    default="auto",
+    choices=["auto", "kitty", "sixel", "program"],
+    help="How matplotlib plots are shown within the terminal. 'kitty' and 'sixel' "
+    "write the image with the graphics protocol of the terminal, where only the "
+    "changed regions of a kitty image are re-sent. 'program' pipes a PNG into timg "
+    "or kitty icat. 'auto' picks a protocol that the terminal is known to support, "
+    "and falls back to 'program'.",
+)
 parser.add_argument(
     "-s",
     "--smooth",
@@ -247,7 +364,17 @@ parser.add_argument(
     const=0.05,
     nargs="?",
     type=between_zero_and_one,
-    help="A value from 0 to 1 as a smoothing factor.",
+    help="A value from 0 to 1 as a smoothing factor. It is the window size relative "
+    "to the series length for 'savgol', and the weight of the previous average for "
+    "'ema' (as the smoothing slider of tensorboard, i.e. less than 1).",
+)
+parser.add_argument(
+    "--smooth-method",
+    default="savgol",
+    choices=["savgol", "ema", "rolling"],
+    type=str,
+    help="The smoothing algorithm. 'ema' is an exponential moving average, and "
+    "'rolling' is the mean of a fixed number of points (see --smooth-window).",
 )
 parser.add_argument(
     "--smooth-poly-order",
@@ -256,6 +383,22 @@ parser.add_argument(
     type=int,
     help="Polynomial order for the savgol smoothing algorithm.",
 )
+parser.add_argument(
+    "--smooth-window",
+    metavar="N",
+    default=10,
+    type=int,
+    help="Number of points to average over for the rolling smoothing algorithm.",
+)
+parser.add_argument(
+    "--downsample",
+    default="minmax",
+    choices=["minmax", "lttb", "none"],
+    type=str,
+    help="Reduce each series to the number of points that the subplot can display. "
+    "'minmax' keeps the extrema of every pixel column (i.e. preserves spikes), "
+    "'lttb' keeps the visually most significant points.",
+)
 
 # plotext backend specific
 parser.add_argument(
@@ -269,67 +412,128 @@ parser.add_argument(
     help="Manually set the terminal height.",
 )
 
+# braille backend specific
+parser.add_argument(
+    "--marker",
+    default="braille",
+    choices=["braille", "halfblock"],
+    help="The characters that the braille backend draws with. 'braille' has 2x4 dots "
+    "per character (with one color per character), 'halfblock' has 1x2 dots per "
+    "character (with a color per dot).",
+)
 
-def ensure_odd(x: int, roundup: bool):
-    if x % 2 == 0:
-        if roundup:
-            return x + 1
-        else:
-            return x - 1
-    return x
+
+def create_smoother(args) -> Optional["SeriesSmoother"]:
+    if not args.smooth:
+        return None
+    from termplot.smoothing import SeriesSmoother
+
+    return SeriesSmoother(
+        args.smooth_method,
+        args.smooth,
+        poly_order=args.smooth_poly_order,
+        window=args.smooth_window,
+    )
+
+
+class Line(NamedTuple):
+    x: Any
+    y: Any
+    label: Optional[str]
+    color: Any
+    ylabel: str
 
 
-def apply_smoothing(y_vals, smoothing_factor: float, poly_order: int):
-    from scipy.signal import savgol_filter
+class Subplot(NamedTuple):
+    row: int
+    col: int
+    title: Optional[str]
+    lines: List[Line]
+    # a digest of the title and the lines (see subplot_fingerprint)
+    fingerprint: Optional[bytes] = None
 
-    # factor controls the window size, with factor 0 being the min and 1
-    # being the max
-    # window size must be odd, and greater than the polynomial order
-    min_win_size = poly_order + 1
-    max_win_size = len(y_vals)
 
-    min_win_size = ensure_odd(min_win_size, roundup=True)
-    max_win_size = ensure_odd(max_win_size, roundup=False)
-    assert min_win_size < max_win_size
+def subplot_fingerprint(subplot: Subplot) -> bytes:
+    """
+    A digest of everything that is plotted on a subplot (i.e. the data and the
+    style of its lines, and its title), which backends use to re-use the rendering
+    of a subplot that had not changed since the previous frame.
+    """
+    import hashlib
+
+    import numpy as np
+
+    digest = hashlib.blake2b(repr(subplot.title).encode(), digest_size=16)
+    for line in subplot.lines:
+        digest.update(repr((line.label, line.color, line.ylabel)).encode())
+        for values in (line.x, line.y):
+            values = np.asarray(values)
+            digest.update(f"{values.dtype}{values.shape}".encode())
+            if values.dtype.kind == "O":
+                digest.update(repr(values.tolist()).encode())
+            elif values.dtype.kind in "mM":
+                # datetimes cannot be exported as a buffer (the unit is within the
+                # dtype, which is digested above)
+                digest.update(np.ascontiguousarray(values.view("i8")).data)
+            else:
+                digest.update(np.ascontiguousarray(values).data)
+    return digest.digest()
+
 
-    # apply the user-supplied factor
-    win_size = int(min_win_size + smoothing_factor * (max_win_size - min_win_size))
+class Frame(NamedTuple):
+    """
+    Everything that is needed to render one refresh. It does not reference the data
+    source, such that it can be rendered while the next frame is being prepared.
+    """
 
-    win_size = ensure_odd(win_size, roundup=False)
+    fingerprint: Optional[Tuple]
+    n_row: int
+    n_col: int
+    subplots: List[Subplot]
 
-    return savgol_filter(y_vals, win_size, poly_order)
 
+def _prepare_one_run(
+    plotter: Plotter,
+    figure: FigureSnapshot,
+    consolidated_stats: Dict,
+    col_num: int,
+    width: Optional[int],
+    smoother: Optional["SeriesSmoother"] = None,
+) -> List[Subplot]:
+    from loguru import logger
+
+    from termplot.downsample import downsample
 
-def _plot_for_one_run(
-    plotter: Plotter, figure_data: FigureData, consolidated_stats: Dict, col_num: int
-):
-    title = f"'{figure_data.title}'"
+    title = f"'{figure.title}'"
 
     if plotter.args.follow:
         title += f" [refresh every {plotter.args.interval}s]"
 
     colors = plotter.get_colors()
+    subplots = []
 
     for i, (prefix, scalar_names) in enumerate(consolidated_stats.items()):
-        cur_row, cur_col = i + 1, col_num + 1
-        plotter.target_subplot(cur_row, cur_col)
         # setup the title for the current top subplot
-        if i == 0:
-            plotter.set_title(title)
+        subplot = Subplot(i + 1, col_num + 1, title if i == 0 else None, [])
+        subplots.append(subplot)
         ###############################
 
         for scalar_name, color in zip(scalar_names, colors):
             try:
-                x_val, y_val = figure_data.get_series(
-                    x=plotter.args.xaxis_type, y=scalar_name
-                )
-            except NonNumericalSeries as e:
-                e.offending_series = scalar_name
-                raise e
-            if plotter.args.smooth:
-                y_val = apply_smoothing(
-                    y_val, plotter.args.smooth, plotter.args.smooth_poly_order
-                )
+                with profiler.stage("get_series"):
+                    x_val, y_val = figure.get_series(
+                        x=plotter.args.xaxis_type, y=scalar_name
+                    )
+            except NonNumericalSeries:
+                # e.g. the x-axis is categorical
+                logger.debug("skipped the non-numeric series '{}'", scalar_name)
+                continue
+            if smoother is not None:
+                with profiler.stage("smoothing"):
+                    # cached per figure, which outlives its snapshots
+                    y_val = smoother(figure.figure_data, scalar_name, y_val)
+            with profiler.stage("downsample"):
+                x_val, y_val = downsample(x_val, y_val, width, plotter.args.downsample)
 
             # only label the line if we are consolidating stats. (because otherwise it
             # will always be the only line)
@@ -338,19 +542,12 @@ def _plot_for_one_run(
                 if (plotter.args.consolidate or plotter.args.force_label)
                 else None
             )
-            _plot_func = plotter.scatter if plotter.args.as_scatter else plotter.plot
-            _plot_func(
-                x_val,
-                y_val,
-                label=label,
-                color=color,
-            )
-            plotter.post_setup(
-                xlabel=plotter.args.xaxis_type,
-                ylabel=scalar_name,
-                cur_row=cur_row,
-                cur_col=cur_col,
+            # copied (at most the pixel width after downsampling), as the buffers
+            # they view are modified by the next refresh
+            subplot.lines.append(
+                Line(x_val.copy(), y_val.copy(), label, color, scalar_name)
             )
+    return subplots
 
 
 def get_data_source_class(data_source: str) -> Type[DataSource]:
@@ -383,107 +580,255 @@ def get_data_source_class(data_source: str) -> Type[DataSource]:
     return data_source_class
 
 
+def prepare_frame(
+    data_source: DataSource,
+    plotter: Plotter,
+    smoother: Optional["SeriesSmoother"] = None,
+) -> Optional[Frame]:
+    """
+    Read the new data, and extract the (smoothed and downsampled) series to plot.
+
+    :return: the frame to be rendered, or None if nothing had changed since the
+        frame that was last rendered
+    """
+    from loguru import logger
+
+    with profiler.stage("read"):
+        # every figure reads its newly appended data (once per cycle)
+        snapshot = data_source.snapshot()
+
+    # skip rendering if neither the data nor the terminal size had changed since the
+    # last time it was shown
+    with profiler.stage("fingerprint"):
+        fingerprint = snapshot.fingerprint()
+    if fingerprint is not None:
+        fingerprint = (fingerprint, shutil.get_terminal_size())
+        if fingerprint == plotter.rendered_fingerprint:
+            plotter.n_skipped_frames += 1
+            logger.debug(
+                "data unchanged, skipped rendering ({} skipped frames)",
+                plotter.n_skipped_frames,
+            )
+            profiler.record("skipped_frames", plotter.n_skipped_frames)
+            return None
+    profiler.record("skipped_frames", plotter.n_skipped_frames)
+
+    # non-plottable (i.e. categorical) series are excluded by the consolidation
+    with profiler.stage("consolidate"):
+        consolidated_stats = snapshot.get_consolidated_stats()
+    n_col = len(snapshot)
+    width = plotter.get_subplot_pixel_width(n_col)
+
+    subplots = []
+    for col_i, figure in enumerate(snapshot):
+        # the column of subplots for this folder
+        logger.debug("prepare plots of {}", figure)
+        subplots.extend(
+            _prepare_one_run(
+                plotter, figure, consolidated_stats, col_i, width, smoother
+            )
+        )
+    with profiler.stage("subplot_fingerprint"):
+        subplots = [
+            subplot._replace(fingerprint=subplot_fingerprint(subplot))
+            for subplot in subplots
+        ]
+    return Frame(fingerprint, len(consolidated_stats), n_col, subplots)
+
+
+def render_frame(plotter: Plotter, frame: Frame) -> None:
+    """Plot a prepared frame with the backend, and show it."""
+    from loguru import logger
+
+    plotter.clear_current_figure()
+    # create the master plot of all folders
+    with profiler.stage("create_subplot"):
+        plotter.create_subplot(frame.n_row, frame.n_col)
+    logger.debug("created subplot with size ({}, {})", frame.n_row, frame.n_col)
+
+    _plot_func = plotter.scatter if plotter.args.as_scatter else plotter.plot
+    n_cache_hits = 0
+    for subplot in frame.subplots:
+        plotter.target_subplot(subplot.row, subplot.col)
+        if subplot.title is not None:
+            plotter.set_title(subplot.title)
+        if plotter.use_cached_subplot(subplot.fingerprint):
+            # unchanged since the previous frame
+            n_cache_hits += 1
+            continue
+        for line in subplot.lines:
+            with profiler.stage("plot"):
+                _plot_func(line.x, line.y, label=line.label, color=line.color)
+                plotter.post_setup(
+                    xlabel=plotter.args.xaxis_type,
+                    ylabel=line.ylabel,
+                    cur_row=subplot.row,
+                    cur_col=subplot.col,
+                )
+    logger.debug(
+        "subplot cache: {} hits, {} misses",
+        n_cache_hits,
+        len(frame.subplots) - n_cache_hits,
+    )
+    profiler.record("subplot_cache_hits", n_cache_hits)
+
+    with profiler.stage("show"):
+        if plotter.args.as_raw_bytes:
+            plotter.as_image_raw_bytes()
+        else:
+            plotter.show()
+    plotter.close()
+    plotter.rendered_fingerprint = frame.fingerprint
+
+
 def plot_logic(
-    target_input: Union[str, Path],
+    data_source: DataSource,
     plotter: Plotter,
-    DataSourceClass: Type[DataSource],
+    smoother: Optional["SeriesSmoother"] = None,
 ) -> None:
     """
     Main plotting logic
 
-    :param target_input: The target folder, or string buffer
+    :param data_source: The data source that consumes the target input. It is kept
+        alive across refreshes, such that it only needs to read newly appended data.
     :param plotter: An instance of backend plotter
-    :param DataSourceClass: The class to be used to consume the target input
+    :param smoother: Smooths the series if given. It is kept alive across refreshes,
+        such that only the newly appended points need to be smoothed.
     """
-    # while terminate_cond:
-    plotter.clear_current_figure()
-
-    data_source = DataSourceClass(target_input, plotter.args)
+    frame = prepare_frame(data_source, plotter, smoother)
+    if frame is not None:
+        render_frame(plotter, frame)
 
-    while True:
-        try:
-            data_source = DataSourceClass(target_input, plotter.args)
 
-            # Get the maximum number of subplots across all folder
-            consolidated_stats = data_source.get_consolidated_stats()
-            max_plots = len(consolidated_stats)
-
-            # create the master plot of all folders
-            plotter.create_subplot(max_plots, len(data_source))
-            logger.debug(
-                "created subplot with size ({}, {})", max_plots, len(data_source)
-            )
+def _follow(
+    args,
+    plotter: Plotter,
+    monitor: AbstractMonitor,
+    get_data_source: Callable[[], DataSource],
+    smoother: Optional["SeriesSmoother"],
+) -> None:
+    """
+    Keep refreshing the plot, where the next frame is prepared (in a loader thread)
+    while the current one is being rendered.
+    """
+    from termplot.pipeline import RefreshPipeline
 
-            # do the actual plotting
-            for col_i, figure_data in enumerate(data_source):
-                # plot the column of subplots for this folder
-                logger.debug(
-                    "plot with {} with data {}", plotter.__class__, figure_data
-                )
-                _plot_for_one_run(plotter, figure_data, consolidated_stats, col_i)
+    last_refresh = time.monotonic()
 
-            break
+    def prepare() -> Optional[Frame]:
+        nonlocal last_refresh
+        last_refresh = time.monotonic()
+        try:
+            with profiler.refresh("prepare"):
+                data_source = get_data_source()
+                frame = prepare_frame(data_source, plotter, smoother)
+        except (
+            DataSourceMissingException,
+            DataSourceProcessingException,
+            PlottingError,
+        ):
+            if not args.latest:
+                raise
+            # the latest run may not have any data yet
+            return None
+        # only watch what the data source reads (e.g. not checkpoints)
+        monitor.watch(data_source.watched_paths())
+        return frame
+
+    def render(frame: Frame) -> None:
+        # it may had been prepared before the previous (identical) frame was shown
+        if frame.fingerprint is not None and (
+            frame.fingerprint == plotter.rendered_fingerprint
+        ):
+            return
+        with profiler.refresh("render"):
+            render_frame(plotter, frame)
+
+    def wait() -> None:
+        # we will wait for filesystem to notify us when there's new update, and then
+        # rate limit the update frequency
+        monitor.wait_till_new_modification()
+        plotter.sleep(since=last_refresh)
+
+    RefreshPipeline(prepare, render, wait, on_resize=monitor.notify).run()
+
+
+def create_matplotlib_plotter(args, terminal: bool) -> Plotter:
+    """
+    :param terminal: show the plot within the terminal (rather than in a window, or
+        as raw bytes)
+    """
+    if args.render_workers > 0:
+        from termplot.backend.tiled_matplotlib import (
+            MatplotlibTiledPlot,
+            MatplotlibTiledPlotTerminal,
+        )
 
-        except NonNumericalSeries as e:
-            # when one of the series is non-numeric, we will auto add it to blacklist,
-            # the current approach might be redundant (as we force all the redoing of
-            # previously plotted series).
-            logger.warning(
-                f"The series '{e.offending_series}' is non-numeric; ignoring it..."
-            )
-            if plotter.args.blacklist is None:
-                plotter.args.blacklist = []
-            plotter.args.blacklist.append(e.offending_series)
+        if terminal:
+            return MatplotlibTiledPlotTerminal(args)
+        return MatplotlibTiledPlot(args)
+    from termplot.backend.matplotlib_plot import MatplotlibPlot, MatplotlibPlotTerminal
 
-    if plotter.args.as_raw_bytes:
-        plotter.as_image_raw_bytes()
-    else:
-        plotter.show()
-    plotter.close()
+    if terminal:
+        return MatplotlibPlotTerminal(args)
+    return MatplotlibPlot(args)
 
 
 def main(args):
+    from loguru import logger
+
     if not args.debug:
         logger.remove()
         logger.add(sys.stderr, level="INFO")
 
     logger.debug("args: {}", args)
 
+    if args.profile or args.profile_output or args.profile_dump:
+        profiler.configure(args.profile_output or "-", args.profile_dump)
+
     # set backend
     if args.backend == "plotext":
         from termplot.backend.terminal_plot import TerminalPlot
 
         plotter = TerminalPlot(args)
     elif args.backend == "matplotlib":
-        from termplot.backend.matplotlib_plot import (
-            MatplotlibPlot,
-            MatplotlibPlotTerminal,
+        from termplot.backend.matplotlib_plot import MatplotlibPlotTerminal
+
+        # automatically use terminal version of matplotlib, if supported.
+        plotter = create_matplotlib_plotter(
+            args, terminal=MatplotlibPlotTerminal.is_supported(args)
         )
+    elif args.backend == "braille":
+        from termplot.backend.braille_plot import BraillePlot
 
-        if MatplotlibPlotTerminal.get_supported_backend() is not None:
-            # automatically use terminal version of matplotlib, if supported.
-            plotter = MatplotlibPlotTerminal(args)
-        else:
-            plotter = MatplotlibPlot(args)
+        plotter = BraillePlot(args)
     elif args.backend == "matplotlib-terminal":
-        from termplot.backend.matplotlib_plot import MatplotlibPlotTerminal
-
-        plotter = MatplotlibPlotTerminal(args)
+        plotter = create_matplotlib_plotter(args, terminal=True)
     else:
         raise NotImplementedError(f"Backend specified: {args.backend}")
 
     ##################################################
     monitor: AbstractMonitor = AbstractMonitor()
+    smoother = create_smoother(args)
+    # the data source is kept across refreshes, and is only rebuilt when the target
+    # input changes
+    data_source: Optional[DataSource] = None
 
     def get_monitor_and_input(data_source: str) -> Tuple[Path, AbstractMonitor]:
         if data_source in ("tensorboard", "csv", "jsonl"):
-            _monitor = FilesystemMonitor(args.folder)
+            from termplot.monitor.fs_monitor import FilesystemMonitor
+
+            _monitor = FilesystemMonitor(args.folder, debounce=args.debounce)
             _target_input = args.folder
         elif data_source in ("stdin-csv",):
             from termplot.monitor.stdin_monitor import StdinMonitor
 
             _monitor = StdinMonitor()
-            while len(_monitor.buffer) < 2:
+            # wait for the header and the first row
+            while True:
+                _monitor.reset_condition()
+                if _monitor.n_lines >= 2:
+                    break
                 _monitor.wait_till_new_modification()
             _target_input = _monitor.get_latest()
         else:
@@ -500,7 +845,8 @@ def main(args):
             target_input, monitor = get_monitor_and_input(_data_source)
             data_source_class = get_data_source_class(_data_source)
             try:
-                data_source_class(target_input, args)
+                with profiler.stage("load"):
+                    data_source = data_source_class(target_input, args)
             except DataSourceMissingException:
                 pass
             else:
@@ -519,56 +865,50 @@ def main(args):
             raise ValueError(f"The given path {args.folder} is not a folder")
         monitor.set_should_refresh()
 
+    def get_data_source() -> DataSource:
+        nonlocal target_input, data_source
+        if monitor.should_refresh():
+            if args.data_source in ("tensorboard", "csv") and args.latest:
+                # switch the input target to the latest file/folder
+                target_input = monitor.get_latest()
+                data_source = None
+            # e.g. the stdin data source reads the newly arrived lines by itself
+            monitor.reset_condition()
+        if data_source is None:
+            with profiler.stage("load"):
+                data_source = data_source_class(target_input, args)
+        return data_source
+
     try:
-        # this while loop will ends if --follow is not given
+        if args.follow:
+            _follow(args, plotter, monitor, get_data_source, smoother)
+            return
+        # we will actually keep trying to update the plot, until there are no more
+        # new pending output. Needed for csv-stdin as we begin to plot before getting
+        # all stdin inputs.
         while True:
-            if monitor.should_refresh():
-                if (
-                    # grab latest modified file
-                    args.data_source in ("tensorboard", "csv")
-                    and args.latest
-                ) or (
-                    # grad latest content from stdin
-                    args.data_source
-                    in ("stdin-csv",)
-                ):
-                    # switch the input target to the latest file/folder
-                    target_input = monitor.get_latest()
-                    monitor.reset_condition()
-            try:
-                plot_logic(
-                    target_input,
-                    plotter,
-                    data_source_class,
-                )
-                if not plotter.args.follow and not monitor.should_refresh():
-                    # we will actually keep trying to update the plot, until there are
-                    # no more new pending output. Needed for csv-stdin as we begin to
-                    # plot before getting all stdin inputs.
-                    break
-                # sleep to reduce update frequency
-                plotter.sleep()
-                # we will wait for filesystem to notify us when there's new update
-                monitor.wait_till_new_modification()
-
-            except (
-                DataSourceMissingException,
-                DataSourceProcessingException,
-                PlottingError,
-            ) as e:
-                if not (args.latest and plotter.args.follow):
-                    raise e
-                monitor.wait_till_new_modification()
+            last_refresh = time.monotonic()
+            with profiler.refresh():
+                plot_logic(get_data_source(), plotter, smoother)
+            if not monitor.should_refresh():
+                break
+            monitor.wait_till_new_modification()
+            plotter.sleep(since=last_refresh)
 
     # except KeyboardInterrupt:
     #     monitor.stop()
     finally:
         monitor.stop()
+        plotter.teardown()
 
 
 def run():
     try:
-        argcomplete.autocomplete(parser)
+        # only import argcomplete when completing, to keep the startup fast
+        if "_ARGCOMPLETE" in os.environ:
+            import argcomplete
+
+            argcomplete.autocomplete(parser)
 
         _args = parser.parse_args()
         if _args.folder is None:
@@ -593,6 +933,9 @@ def run():
                 _args.axes_color = "black"
             if _args.ticks_color is None:
                 _args.ticks_color = "white"
+        if _args.smooth_method == "ema" and _args.smooth == 1:
+            # the average would never move from its (zero) initial value
+            parser.error("--smooth must be less than 1 for the 'ema' smoothing method")
         if _args.matplotlib:
             _args.backend = "matplotlib"
         if _args.csv:
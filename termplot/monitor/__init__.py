@@ -1,4 +1,6 @@
 from abc import ABC
+from pathlib import Path
+from typing import Iterable, Optional
 
 
 class AbstractMonitor(ABC):
@@ -17,5 +19,16 @@ class AbstractMonitor(ABC):
     def wait_till_new_modification(self):
         pass
 
+    def notify(self) -> None:
+        """Wake up wait_till_new_modification, e.g. when the terminal was resized."""
+        pass
+
+    def watch(self, paths: Optional[Iterable[Path]]) -> None:
+        """
+        Only watch the given paths, i.e. the files that are read and the folders
+        where new files can appear. None denotes everything.
+        """
+        pass
+
     def get_latest(self):
         raise NotImplementedError()
@@ -1,12 +1,17 @@
 import os
 import threading
+import time
 from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
 
 from termplot.monitor import AbstractMonitor
 
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
+# a burst of events is coalesced for at most this many debounce windows
+_MAX_DEBOUNCE_WINDOWS = 5
+
 
 class TerminateCondition:
     def __init__(self):
@@ -30,19 +35,85 @@ class MyHandler(FileSystemEventHandler):
     def on_modified(self, event):
         self.callback(event)
 
+    def on_moved(self, event):
+        # e.g. a file that is atomically replaced
+        self.callback(event)
+
 
 class FilesystemMonitor(AbstractMonitor):
-    def __init__(self, folder: str):
+    """
+    Watches the files that the data source reads (see ``watch``), and the folders
+    where new runs can appear. Until ``watch`` is called, everything within the
+    target folder is watched.
+
+    :param debounce: seconds without any new event, before a burst of events is
+        considered to be over
+    """
+
+    def __init__(self, folder: str, debounce: float = 0.2):
         self.folder = folder
+        self.root = os.path.abspath(folder)
+        self.debounce = debounce
         self.new_modify = threading.Event()
+        self._last_event_time = 0.0
         # self.created_new_file = TerminateCondition()
         self._created_new_file = False
 
-        event_handler = MyHandler(folder, callback=self.callback)
+        # files whose modifications are relevant, None denotes everything
+        self._watched_files: Optional[Set[str]] = None
+        # folders where newly created entries are relevant
+        self._watched_dirs: Set[str] = set()
+        self._event_handler = MyHandler(folder, callback=self.callback)
         self.observer = Observer()
-        self.observer.schedule(event_handler, path=folder, recursive=True)
+        # watched path -> (recursive, watchdog handle)
+        self._schedules: Dict[str, tuple] = {}
+        self._schedule({self.root: True})
         self.observer.start()
 
+    def _schedule(self, paths: Dict[str, bool]) -> None:
+        """Make the observer watch exactly the given paths (path -> recursive)."""
+        for path, (recursive, watch) in list(self._schedules.items()):
+            if paths.get(path) != recursive:
+                self.observer.unschedule(watch)
+                del self._schedules[path]
+        for path, recursive in paths.items():
+            if path not in self._schedules and os.path.exists(path):
+                watch = self.observer.schedule(
+                    self._event_handler, path=path, recursive=recursive
+                )
+                self._schedules[path] = (recursive, watch)
+
+    def watch(self, paths: Optional[Iterable[Path]]) -> None:
+        if paths is None:
+            self._watched_files = None
+            self._watched_dirs = set()
+            self._schedule({self.root: True})
+            return
+        files = set()
+        dirs = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                dirs.add(path)
+            else:
+                files.add(path)
+        if os.path.isdir(self.root):
+            # for new runs (and --latest)
+            dirs.add(self.root)
+        self._watched_files = files
+        self._watched_dirs = dirs
+        # watched files are observed through their folder
+        self._schedule(
+            {path: False for path in dirs | {os.path.dirname(f) for f in files}}
+        )
+
+    def _is_relevant(self, path: str, event_type: str) -> bool:
+        if self._watched_files is None or path in self._watched_files:
+            return True
+        return event_type in ("created", "moved") and (
+            os.path.dirname(path) in self._watched_dirs
+        )
+
     def should_refresh(self):
         return self._created_new_file
 
@@ -63,11 +134,28 @@ class FilesystemMonitor(AbstractMonitor):
         return folders[-1]
 
     def callback(self, event):
+        path = os.path.abspath(getattr(event, "dest_path", "") or event.src_path)
+        if not self._is_relevant(path, event.event_type):
+            return
         if event.event_type == "created":
             # print("on_created", event.src_path)
             self.set_should_refresh()
+        self._last_event_time = time.monotonic()
+        self.new_modify.set()
+
+    def notify(self):
+        self._last_event_time = time.monotonic()
         self.new_modify.set()
 
     def wait_till_new_modification(self):
         self.new_modify.wait()
+        # coalesce a burst of events, i.e. wait till there is no new event for a
+        # debounce window (but not indefinitely, if the events never stop)
+        deadline = time.monotonic() + _MAX_DEBOUNCE_WINDOWS * self.debounce
+        while True:
+            now = time.monotonic()
+            remaining = min(self._last_event_time + self.debounce - now, deadline - now)
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
         self.new_modify.clear()
@@ -1,21 +1,40 @@
 import sys
 import threading
+from collections import deque
 
 from termplot.monitor import AbstractMonitor
 
 
 class StdinMonitor(AbstractMonitor):
+    """
+    Reads stdin line by line in a watcher thread. The lines are handed over through
+    a deque (whose appends and pops are atomic, i.e. no lock is needed), and each
+    of them is consumed (and hence parsed) exactly once through ``read``, such that
+    a long-running producer costs linear time and memory.
+
+    The monitor itself is the input of the stdin data source.
+    """
+
     def __init__(self):
-        self.buffer = []
+        self.n_lines = 0
+        self._lines = deque()
         self.modified_event = threading.Event()
         self.watcher = threading.Thread(target=self._watcher_loop)
         self.watcher.start()
 
     def _watcher_loop(self):
-        for line in sys.stdin:
-            self.buffer.append(line)
+        for line in sys.stdin.buffer:
+            self._lines.append(line)
+            self.n_lines += 1
             self.modified_event.set()
 
+    def read(self) -> bytes:
+        """The lines that had arrived since the last call."""
+        lines = []
+        while self._lines:
+            lines.append(self._lines.popleft())
+        return b"".join(lines)
+
     def should_refresh(self) -> bool:
         return self.modified_event.is_set()
 
@@ -28,6 +47,9 @@ class StdinMonitor(AbstractMonitor):
     def reset_condition(self):
         self.modified_event.clear()
 
+    def notify(self) -> None:
+        self.modified_event.set()
+
     def wait_till_new_modification(self):
         if self.should_refresh():
             return
@@ -37,4 +59,7 @@ class StdinMonitor(AbstractMonitor):
 
     def get_latest(self):
         self.reset_condition()
-        return "".join(self.buffer)
+        return self
+
+    def __str__(self):
+        return "<stdin>"
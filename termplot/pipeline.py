@@ -0,0 +1,97 @@
+"""
+The --follow refresh loop, as a pipeline of two stages: a loader thread waits for
+changes and prepares frames (i.e. reads and processes the data), while the calling
+thread renders them. Hence the next frame is prepared while the current one is being
+rendered, and the calling thread stays responsive to resizes and Ctrl-C.
+"""
+
+import queue
+import shutil
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+# seconds between checks of the terminal size, while waiting for a frame
+_POLL_INTERVAL = 0.1
+
+
+class _Stop(Exception):
+    pass
+
+
+class RefreshPipeline(Generic[T]):
+    """
+    :param prepare: prepares the next frame; None denotes that there is nothing new
+        to render. Exceptions are re-raised in the rendering thread.
+    :param render: renders a frame, in the thread that calls ``run``
+    :param wait: blocks until the next frame should be prepared
+    :param on_resize: called (from the rendering thread) when the terminal had been
+        resized; it should make ``wait`` return.
+    :param max_pending: the number of prepared frames that can be pending. Older
+        frames are dropped (rather than piling up) when rendering is too slow.
+    """
+
+    def __init__(
+        self,
+        prepare: Callable[[], Optional[T]],
+        render: Callable[[T], None],
+        wait: Callable[[], None],
+        on_resize: Optional[Callable[[], None]] = None,
+        max_pending: int = 1,
+    ):
+        self.prepare = prepare
+        self.render = render
+        self.wait = wait
+        self.on_resize = on_resize
+        self.n_dropped_frames = 0
+        self._frames: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._stopped = threading.Event()
+        self._loader = threading.Thread(
+            target=self._load_loop, name="termplot-loader", daemon=True
+        )
+
+    def _put(self, item) -> None:
+        while True:
+            try:
+                self._frames.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._frames.get_nowait()
+                    self.n_dropped_frames += 1
+                    logger.debug("dropped a stale frame ({})", self.n_dropped_frames)
+                except queue.Empty:
+                    pass
+
+    def _load_loop(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                frame = self.prepare()
+                if frame is not None:
+                    self._put(frame)
+                self.wait()
+        except BaseException as e:
+            self._put(e)
+
+    def run(self) -> None:
+        """Run until an exception is raised (by either stage), e.g. Ctrl-C."""
+        terminal_size = shutil.get_terminal_size()
+        self._loader.start()
+        try:
+            while True:
+                try:
+                    item = self._frames.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    if shutil.get_terminal_size() != terminal_size:
+                        terminal_size = shutil.get_terminal_size()
+                        if self.on_resize is not None:
+                            self.on_resize()
+                    continue
+                if isinstance(item, BaseException):
+                    raise item
+                self.render(item)
+        finally:
+            # the loader is a daemon thread, that may be blocked in waiting
+            self._stopped.set()
@@ -0,0 +1,169 @@
+"""
+Per-stage profiling of the plotting cycle, which is enabled by ``--profile``.
+
+Every refresh emits one json line with the accumulated time of each stage, the
+number of bytes read from the data files, and the peak resident memory. Stages may
+be nested (e.g. ``build`` and ``write`` are within ``show``), hence their sum can
+exceed the total time of the refresh. Stages that ran before the first refresh (e.g.
+loading the data while auto-detecting the data source) are reported along with it.
+
+Stages are accumulated per thread, e.g. the pipelined --follow loop reports the
+'prepare' and the 'render' phase of each frame separately.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        # not available on windows
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # it is in bytes on macos, but in kilobytes on linux
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+class Profiler:
+    """
+    Accumulates the time spent in each stage of a refresh. It is a no-op unless
+    ``configure`` has been called, such that the stages can be instrumented
+    unconditionally.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.output = None
+        self.cprofile_path = None
+        self._n_refresh = 0
+        self._hottest_refresh = 0.0
+        self._lock = threading.Lock()
+        # only one thread at a time can be profiled by cProfile (which is an error
+        # since python 3.12), e.g. the loader of the pipelined --follow loop is not
+        # profiled while the main thread renders
+        self._cprofile_lock = threading.Lock()
+        # the timings, bytes read and records of the current thread
+        self._local = threading.local()
+
+    @property
+    def _timings(self) -> Dict[str, float]:
+        if not hasattr(self._local, "timings"):
+            self._local.timings = defaultdict(float)
+        return self._local.timings
+
+    @property
+    def _records(self) -> Dict[str, object]:
+        if not hasattr(self._local, "records"):
+            self._local.records = {}
+        return self._local.records
+
+    @property
+    def _bytes_read(self) -> int:
+        return getattr(self._local, "bytes_read", 0)
+
+    @_bytes_read.setter
+    def _bytes_read(self, value: int):
+        self._local.bytes_read = value
+
+    def configure(self, output: str, cprofile_path: Optional[str] = None) -> None:
+        """
+        :param output: a jsonl file that the reports are appended to; '-' denotes
+            stderr.
+        :param cprofile_path: if given, the cProfile stats of the slowest refresh
+            are dumped to it, which can be inspected with ``python -m pstats``.
+            Refreshes that overlap one being profiled in another thread are not
+            profiled.
+        """
+        self.enabled = True
+        self.output = output
+        self.cprofile_path = cprofile_path
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timings[name] += time.perf_counter() - start
+
+    def add_bytes_read(self, n_bytes: int) -> None:
+        if self.enabled:
+            self._bytes_read += n_bytes
+
+    def record(self, name: str, value) -> None:
+        """Add an extra field to the report of the current refresh."""
+        if self.enabled:
+            self._records[name] = value
+
+    @contextmanager
+    def refresh(self, phase: Optional[str] = None):
+        """
+        Profile one refresh, and report it at the end.
+
+        :param phase: the part of the refresh that is done, if not all of it
+        """
+        if not self.enabled:
+            yield
+            return
+        cprofile = None
+        if self.cprofile_path is not None and self._cprofile_lock.acquire(
+            blocking=False
+        ):
+            import cProfile
+
+            cprofile = cProfile.Profile()
+            try:
+                cprofile.enable()
+            except ValueError:
+                # another profiling tool (e.g. a debugger) is already active
+                cprofile = None
+                self._cprofile_lock.release()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - start
+            if phase is not None:
+                self.record("phase", phase)
+            with self._lock:
+                if cprofile is not None:
+                    cprofile.disable()
+                    self._cprofile_lock.release()
+                    if total > self._hottest_refresh:
+                        cprofile.dump_stats(self.cprofile_path)
+                        self._hottest_refresh = total
+                self._report(total)
+                self._n_refresh += 1
+            self._timings.clear()
+            self._records.clear()
+            self._bytes_read = 0
+
+    def _report(self, total: float) -> None:
+        report = json.dumps(
+            dict(
+                refresh=self._n_refresh,
+                total=total,
+                stages=dict(self._timings),
+                bytes_read=self._bytes_read,
+                peak_rss_bytes=_peak_rss_bytes(),
+                **self._records,
+            )
+        )
+        if self.output == "-":
+            print(report, file=sys.stderr, flush=True)
+        else:
+            with open(self.output, "a") as f:
+                f.write(report + "\n")
+
+
+profiler = Profiler()
@@ -0,0 +1,234 @@
+"""
+Smoothing of series. Results are cached per series, such that a refresh only needs
+to smooth the newly appended points:
+
+- ``savgol``: Savitzky-Golay filter, with a window that is a fraction of the series
+  length. Only the tail (i.e. the points within half a window of the end) is
+  recomputed; the window is kept until the series had grown by a few percent.
+- ``ema``: exponential moving average, debiased as in tensorboard.
+- ``rolling``: mean of a fixed number of trailing points.
+"""
+
+import weakref
+from typing import Dict, Optional
+
+import numpy as np
+
+from termplot.data_source.incremental import ColumnBuffer
+
+SMOOTHING_METHODS = ("savgol", "ema", "rolling")
+# number of trailing values that are compared to detect whether a series had only
+# been appended to since it was last smoothed
+_TAIL_CHECK_SIZE = 64
+# the savgol window is only updated once the series had grown by this fraction
+_SAVGOL_WINDOW_SLACK = 1 / 32
+
+
+def ensure_odd(x: int, roundup: bool):
+    if x % 2 == 0:
+        if roundup:
+            return x + 1
+        else:
+            return x - 1
+    return x
+
+
+def savgol_window(n: int, smoothing_factor: float, poly_order: int) -> Optional[int]:
+    """
+    The window size of the Savitzky-Golay filter for a series of length n, or None
+    if the series is too short to be smoothed.
+    """
+    # factor controls the window size, with factor 0 being the min and 1
+    # being the max
+    # window size must be odd, and greater than the polynomial order
+    min_win_size = ensure_odd(poly_order + 1, roundup=True)
+    max_win_size = ensure_odd(n, roundup=False)
+    if min_win_size >= max_win_size:
+        return None
+    # apply the user-supplied factor
+    win_size = int(min_win_size + smoothing_factor * (max_win_size - min_win_size))
+    return ensure_odd(win_size, roundup=False)
+
+
+def _savgol_interior(y: np.ndarray, window: int, poly_order: int) -> np.ndarray:
+    """The filtered values of y[h:-h], where h is half the window."""
+    from scipy.signal import convolve, savgol_coeffs
+
+    # convolve picks between direct and fft convolution, i.e. it does not grow with
+    # the product of the length and the window
+    return convolve(y, savgol_coeffs(window, poly_order), mode="valid")
+
+
+def _savgol_edge(y: np.ndarray, window: int, poly_order: int) -> np.ndarray:
+    """Fit a polynomial to the given window, as savgol_filter(mode='interp') does."""
+    x = np.arange(window)
+    return np.polyval(np.polyfit(x, y, poly_order), x)
+
+
+def _savgol(y: np.ndarray, window: int, poly_order: int) -> np.ndarray:
+    half = window // 2
+    return np.concatenate(
+        [
+            _savgol_edge(y[:window], window, poly_order)[:half],
+            _savgol_interior(y, window, poly_order),
+            _savgol_edge(y[-window:], window, poly_order)[-half:],
+        ]
+    )
+
+
+class _SmoothingState:
+    """The smoothed values of one series, and what is needed to extend them."""
+
+    def __init__(self):
+        self.n = 0
+        self.smoothed = ColumnBuffer()
+        self._head = None
+        self._tail = None
+
+    def is_prefix_of(self, y: np.ndarray) -> bool:
+        if len(y) < self.n:
+            return False
+        if self.n == 0:
+            return True
+        return np.array_equal(y[0], self._head, equal_nan=True) and np.array_equal(
+            y[self.n - len(self._tail) : self.n], self._tail, True
+        )
+
+    def update(self, y: np.ndarray) -> np.ndarray:
+        if len(y) > self.n:
+            self._extend(y)
+            self.n = len(y)
+            self._head = y[0]
+            self._tail = y[-_TAIL_CHECK_SIZE:].copy()
+        return self.smoothed.values
+
+    def _extend(self, y: np.ndarray) -> None:
+        raise NotImplementedError()
+
+
+class _SavgolState(_SmoothingState):
+    def __init__(self, smoothing_factor: float, poly_order: int):
+        super().__init__()
+        self.smoothing_factor = smoothing_factor
+        self.poly_order = poly_order
+        self.window = None
+        self._window_n = 0
+
+    def _extend(self, y: np.ndarray) -> None:
+        window = self.window
+        if window is None or len(y) > self._window_n * (1 + _SAVGOL_WINDOW_SLACK):
+            window = savgol_window(len(y), self.smoothing_factor, self.poly_order)
+            self._window_n = len(y)
+        if window is None:
+            self.smoothed.truncate(0)
+            self.smoothed.extend(y)
+            return
+        half = window // 2
+        start = self.n - 2 * half
+        if window != self.window or start < 0:
+            self.smoothed.truncate(0)
+            self.smoothed.extend(_savgol(y, window, self.poly_order))
+            self.window = window
+            return
+        # with an unchanged window, only the trailing edge and the new points differ
+        self.smoothed.truncate(self.n - half)
+        self.smoothed.extend(_savgol_interior(y[start:], window, self.poly_order))
+        self.smoothed.extend(_savgol_edge(y[-window:], window, self.poly_order)[-half:])
+
+
+class _EmaState(_SmoothingState):
+    def __init__(self, weight: float):
+        super().__init__()
+        self.weight = weight
+        self._last = 0.0
+        self._n_accumulated = 0
+
+    def _extend(self, y: np.ndarray) -> None:
+        from scipy.signal import lfilter
+
+        new = y[self.n :]
+        smoothed = new.copy()
+        # non-finite values are shown as-is, and do not affect the average
+        finite = np.isfinite(new)
+        values = new[finite]
+        if len(values):
+            w = self.weight
+            accumulated, _ = lfilter([1 - w], [1, -w], values, zi=[w * self._last])
+            self._last = accumulated[-1]
+            n_accumulated = self._n_accumulated + np.arange(1, len(values) + 1)
+            # debias the zero initialised average, as tensorboard does
+            smoothed[finite] = accumulated / (1 - w**n_accumulated)
+            self._n_accumulated = n_accumulated[-1]
+        self.smoothed.extend(smoothed)
+
+
+class _RollingState(_SmoothingState):
+    def __init__(self, window: int):
+        super().__init__()
+        self.window = window
+
+    def _extend(self, y: np.ndarray) -> None:
+        # only the points within a window of the new points are needed
+        lo = max(0, self.n - self.window + 1)
+        segment = y[lo:]
+        finite = np.isfinite(segment)
+        cum_sum = np.concatenate([[0.0], np.cumsum(np.where(finite, segment, 0))])
+        cum_count = np.concatenate([[0], np.cumsum(finite)])
+        end = np.arange(self.n - lo, len(segment)) + 1
+        begin = np.maximum(end - self.window, 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.smoothed.extend(
+                (cum_sum[end] - cum_sum[begin]) / (cum_count[end] - cum_count[begin])
+            )
+
+
+class SeriesSmoother:
+    """
+    Smooths series of figures, and caches the result per (figure, series name).
+    A cached result is extended if the series had only been appended to, and is
+    recomputed otherwise.
+
+    :param method: one of SMOOTHING_METHODS
+    :param smoothing_factor: the window as a fraction of the series length for
+        'savgol', and the weight (in [0, 1)) of the previous average for 'ema' (as
+        the smoothing slider of tensorboard).
+    :param poly_order: the polynomial order for 'savgol'
+    :param window: the number of points to average over for 'rolling'
+    """
+
+    def __init__(
+        self,
+        method: str,
+        smoothing_factor: float,
+        poly_order: int = 3,
+        window: int = 10,
+    ):
+        if method not in SMOOTHING_METHODS:
+            raise ValueError(f"Unknown smoothing method {method}")
+        if method == "ema" and not 0 <= smoothing_factor < 1:
+            raise ValueError(
+                f"The ema weight must be in [0, 1), not {smoothing_factor}"
+            )
+        self.method = method
+        self.smoothing_factor = smoothing_factor
+        self.poly_order = poly_order
+        self.window = window
+        # entries are dropped along with their figure
+        self._states: Dict[object, Dict[str, _SmoothingState]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _new_state(self) -> _SmoothingState:
+        if self.method == "savgol":
+            return _SavgolState(self.smoothing_factor, self.poly_order)
+        if self.method == "ema":
+            return _EmaState(self.smoothing_factor)
+        return _RollingState(self.window)
+
+    def __call__(self, figure_data, name: str, y_vals) -> np.ndarray:
+        y_vals = np.asarray(y_vals, dtype=float)
+        states = self._states.setdefault(figure_data, {})
+        state = states.get(name)
+        if state is None or not state.is_prefix_of(y_vals):
+            state = states[name] = self._new_state()
+        return state.update(y_vals)
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+
+from termplot.data_source.cache import SeriesCache
+from termplot.data_source.jsonl import JsonlTailReader
+
+
+def test_incomplete_trailing_row_is_not_cached(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text('{"a": 1}\n{"a": 2}\n{"a": 3, "b": 4}')
+    cache = SeriesCache(tmp_path / "cache", 1024 * 1024)
+    reader = JsonlTailReader(path, cache=cache)
+    reader.read_new()
+    assert reader.names == ["a", "b"]
+
+    entry = cache.load(reader._cache_key)
+    assert list(entry.columns) == ["a"]
+    assert np.array_equal(entry.columns["a"], [1, 2])
+
+
+def _source(tmp_path, name, content=b"a\n1\n2\n"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_store_and_load(tmp_path):
+    cache = SeriesCache(tmp_path / "cache", 1024 * 1024)
+    path = _source(tmp_path, "run.csv")
+    cache.store(
+        "key",
+        offsets={path: 6},
+        columns=dict(
+            loss=np.array([1.0, 0.5]),
+            phase=np.array(["train", None], dtype=object),
+        ),
+        state=dict(header=["loss", "phase"]),
+    )
+
+    entry = SeriesCache(tmp_path / "cache", 1024 * 1024).load("key")
+    assert entry.offsets == {path: 6}
+    assert entry.state == dict(header=["loss", "phase"])
+    assert np.array_equal(entry.columns["loss"], [1.0, 0.5])
+    assert list(entry.columns["phase"]) == ["train", None]
+
+
+def test_entry_of_a_changed_source(tmp_path):
+    cache = SeriesCache(tmp_path / "cache", 1024 * 1024)
+    path = _source(tmp_path, "run.csv")
+    cache.store("key", offsets={path: 6}, columns=dict(a=np.array([1, 2])))
+
+    # resumed from its offset if the source had only been appended to
+    with open(path, "ab") as f:
+        f.write(b"3\n")
+    assert cache.load("key").offsets == {path: 6}
+
+    # discarded if it had been re-written
+    _source(tmp_path, "run.csv", b"a\n5\n6\n7\n")
+    assert cache.load("key") is None
+
+
+def test_generations(tmp_path):
+    cache = SeriesCache(tmp_path / "cache", 1024 * 1024)
+    path = _source(tmp_path, "run.csv")
+    cache.store("key", offsets={path: 4}, columns=dict(a=np.array([1])))
+    cache.store("key", offsets={path: 6}, columns=dict(a=np.array([1, 2])))
+
+    (entry_dir,) = (tmp_path / "cache").iterdir()
+    # the files of the previous generation are removed
+    assert sorted(f.name for f in entry_dir.iterdir()) == ["1-0.npy", "manifest.json"]
+    assert np.array_equal(cache.load("key").columns["a"], [1, 2])
+
+
+def test_should_store(tmp_path):
+    cache = SeriesCache(tmp_path / "cache", 1024 * 1024)
+    path = _source(tmp_path, "run.csv")
+    assert not cache.should_store("key", 0)
+    assert cache.should_store("key", 100)
+    cache.store("key", offsets={path: 6}, columns=dict(a=np.arange(100)))
+
+    # until the data had doubled (or a while had passed)
+    assert not cache.should_store("key", 150)
+    assert cache.should_store("key", 200)
+
+
+def test_eviction_of_the_least_recently_used_entries(tmp_path):
+    path = _source(tmp_path, "run.csv")
+    values = np.zeros(1000)
+    cache = SeriesCache(tmp_path / "cache", 10 * 1024 * 1024)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.store(key, offsets={path: 6}, columns=dict(x=values))
+        os.utime(cache._entry_dir(key) / "manifest.json", (i, i))
+    # i.e. "a" is now the most recently used
+    cache.load("a")
+
+    # room for (about) two entries
+    cache.max_bytes = 2 * values.nbytes + 4096
+    cache.store("d", offsets={path: 6}, columns=dict(x=values))
+    assert [key for key in "abcd" if cache.load(key) is not None] == ["a", "d"]
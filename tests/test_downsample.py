@@ -0,0 +1,101 @@
+import numpy as np
+
+from termplot.downsample import lttb_indices, minmax_indices
+
+
+def test_minmax_ignores_nan():
+    y = np.sin(np.arange(1000) / 20.0)
+    y[::7] = np.nan
+    y[300] = 5.0
+    y[600] = -5.0
+    # the whole (last) bucket is missing
+    y[-100:] = np.nan
+
+    indices = minmax_indices(y, 10, bucket_edges=False)
+    assert {300, 600} <= set(indices)
+    for bucket in np.split(np.arange(900), 9):
+        kept = y[np.intersect1d(indices, bucket)]
+        assert np.nanmax(kept) == np.nanmax(y[bucket])
+        assert np.nanmin(kept) == np.nanmin(y[bucket])
+    # one point of the missing bucket, plus the last point of the series
+    assert len(np.intersect1d(indices, np.arange(900, 1000))) == 2
+
+
+def test_lttb_leaves_out_nan():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 20.0)
+    y[::7] = np.nan
+    x[5] = np.nan
+    y[500] = 10.0
+
+    indices = lttb_indices(x, y, 50)
+    assert len(indices) == 50
+    assert np.isfinite(x[indices]).all() and np.isfinite(y[indices]).all()
+    assert 500 in indices
+    assert np.all(np.diff(indices) > 0)
+
+    # fewer points than the output
+    y[:-20] = np.nan
+    assert np.array_equal(lttb_indices(x, y, 50), np.flatnonzero(np.isfinite(y)))
+
+
+def _reference_lttb(x, y, n_out, approximate=False):
+    """
+    One bucket after the other, with the point kept in the previous bucket. Or as
+    approximated by lttb_indices, with the point that a first pass had kept in the
+    previous bucket, where the first pass uses the average of the bucket before.
+    """
+    n = len(y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    bounds = list(zip(edges[:-1], edges[1:])) + [(n - 1, n)]
+    averages = [(x[start:end].mean(), y[start:end].mean()) for start, end in bounds]
+
+    def largest_triangle(i, prev_x, prev_y):
+        (start, end), (next_x, next_y) = bounds[i], averages[i + 1]
+        areas = np.abs(
+            (prev_x - next_x) * (y[start:end] - prev_y)
+            + (next_y - prev_y) * (x[start:end] - prev_x)
+        )
+        return start + np.argmax(areas)
+
+    n_buckets = n_out - 2
+    if approximate:
+        prev_averages = [(x[0], y[0])] + averages[: n_buckets - 1]
+        first_pass = [largest_triangle(i, *prev_averages[i]) for i in range(n_buckets)]
+        prev = [0] + first_pass[:-1]
+        kept = [largest_triangle(i, x[prev[i]], y[prev[i]]) for i in range(n_buckets)]
+    else:
+        kept = [0]
+        for i in range(n_buckets):
+            kept.append(largest_triangle(i, x[kept[-1]], y[kept[-1]]))
+        kept = kept[1:]
+    return np.array([0] + kept + [n - 1])
+
+
+def _noisy(n):
+    x = np.arange(n, dtype=np.float64)
+    return x, np.sin(x / 300.0) + np.random.default_rng(0).normal(0, 0.1, n)
+
+
+def test_lttb_of_large_buckets_is_exact():
+    # i.e. buckets of more than _LTTB_MAX_VECTORISED_BUCKET points
+    x, y = _noisy(100_000)
+    assert np.array_equal(lttb_indices(x, y, 40), _reference_lttb(x, y, 40))
+
+
+def test_lttb_of_small_buckets():
+    x, y = _noisy(200_000)
+    y[123_457] = 50.0
+    n_out = 2000
+    indices = lttb_indices(x, y, n_out)
+
+    assert len(indices) == n_out
+    assert (indices[0], indices[-1]) == (0, len(y) - 1)
+    # one point within every bucket
+    edges = np.linspace(1, len(y) - 1, n_out - 1).astype(np.int64)
+    assert np.array_equal(
+        np.searchsorted(edges, indices[1:-1], side="right"), np.arange(1, n_out - 1)
+    )
+    assert 123_457 in indices
+    # computed at once, in blocks of buckets
+    assert np.array_equal(indices, _reference_lttb(x, y, n_out, approximate=True))
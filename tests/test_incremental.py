@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from termplot.data_source import incremental
+from termplot.data_source.csv_source import CsvTailReader
+from termplot.data_source.incremental import ColumnBuffer
+
+
+def _append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_datetime_strings_are_converted_once(tmp_path, monkeypatch):
+    converted = []
+    to_datetime = incremental._to_datetime
+    monkeypatch.setattr(
+        incremental,
+        "_to_datetime",
+        lambda values: converted.append(len(values)) or to_datetime(values),
+    )
+    path = tmp_path / "run.csv"
+    _append(path, "time,loss\n2024-01-01 00:00:00,1.0\n2024-01-01 00:01:00,0.5\n")
+    reader = CsvTailReader(path)
+    reader.read_new()
+    reader.plottable("time")
+    assert converted == [2]
+
+    # a complete row, and an incomplete one that is converted on every call
+    _append(path, "2024-01-01 00:02:00,0.3\n2024-01-01 00:03:00,0.2")
+    reader.read_new()
+    reader.plottable("time")
+    values = reader.plottable("time")
+    assert converted == [2, 1, 1, 1]
+    assert np.array_equal(
+        values,
+        pd.to_datetime(
+            [
+                "2024-01-01 00:00:00",
+                "2024-01-01 00:01:00",
+                "2024-01-01 00:02:00",
+                "2024-01-01 00:03:00",
+            ]
+        ).to_numpy(),
+    )
+
+    # the incomplete row is re-read once it is complete
+    _append(path, "\n")
+    reader.read_new()
+    assert len(reader.plottable("time")) == 4
+    assert converted == [2, 1, 1, 1, 1]
+
+
+def test_datetime_strings_within_a_window(tmp_path):
+    path = tmp_path / "run.csv"
+    times = pd.date_range("2024-01-01", periods=10, freq="min")
+    _append(path, "time,loss\n")
+    reader = CsvTailReader(path, window=incremental.Window(n_points=3))
+    for time in times:
+        _append(path, f"{time},1.0\n")
+        reader.read_new()
+        reader.plottable("time")
+
+    assert np.array_equal(reader.plottable("time"), times[-3:].to_numpy())
+
+
+def test_window_seconds_by_the_datetime_column(tmp_path):
+    path = tmp_path / "run.csv"
+    times = pd.date_range("2024-01-01", periods=10, freq="min")
+    _append(path, "time,loss\n")
+    _append(path, "".join(f"{time},{i}\n" for i, time in enumerate(times[:8])))
+    reader = CsvTailReader(
+        path, window=incremental.Window(seconds=120.0, column="time")
+    )
+    # i.e. rather than all of them, as they were read at once
+    reader.read_new()
+    assert list(reader.column("loss")) == [5, 6, 7]
+    assert reader.column_offset("loss") == 5
+
+    _append(path, "".join(f"{time},{i}\n" for i, time in enumerate(times[8:], 8)))
+    reader.read_new()
+    assert list(reader.column("loss")) == [7, 8, 9]
+    assert np.array_equal(reader.plottable("time"), times[-3:].to_numpy())
+
+
+def test_column_buffer_keeps_the_last_values():
+    buffer = ColumnBuffer(capacity=4, max_length=10)
+    appended = np.arange(1000)
+    for start in range(0, 1000, 7):
+        buffer.extend(appended[start : start + 7])
+        assert np.array_equal(buffer.values, appended[: start + 7][-10:])
+        assert buffer.n_appended == min(start + 7, 1000)
+        # the storage (of twice the max length) is not grown
+        assert len(buffer._data) <= 20
+
+    # more values than the max length at once
+    buffer.extend(np.arange(25.0))
+    assert np.array_equal(buffer.values, np.arange(15.0, 25.0))
+    assert (buffer.n_dropped, buffer.n_appended) == (1015, 1025)
+
+
+def test_column_buffer_drop_head():
+    buffer = ColumnBuffer(capacity=4)
+    buffer.extend([1, 2, 3, 4, 5])
+    buffer.drop_head(2)
+    assert list(buffer.values) == [3, 4, 5]
+    assert (buffer.n_dropped, buffer.n_appended) == (2, 5)
+
+    buffer.extend([6, 7])
+    buffer.pad(1)
+    assert np.array_equal(buffer.values, [3, 4, 5, 6, 7, np.nan], equal_nan=True)
+    # an index of the whole series, i.e. including the dropped values
+    buffer.truncate(6)
+    assert list(buffer.values) == [3, 4, 5, 6]
+
+    buffer.drop_head(100)
+    assert len(buffer) == 0
+    assert buffer.n_appended == 6
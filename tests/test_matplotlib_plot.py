@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from termplot.main import Frame, Line, Subplot, parser, render_frame
+from termplot.main import subplot_fingerprint
+
+pytest.importorskip("matplotlib")
+
+from termplot.backend.matplotlib_plot import MatplotlibPlot  # noqa: E402
+
+
+def _frame(y_max: float) -> Frame:
+    x = np.arange(100)
+    subplot = Subplot(
+        1, 1, "loss", [Line(x, np.linspace(0, y_max, 100), "a", "C0", "loss")]
+    )
+    return Frame(
+        None, 1, 1, [subplot._replace(fingerprint=subplot_fingerprint(subplot))]
+    )
+
+
+def _render(plotter, frame, capsysbinary) -> bytes:
+    render_frame(plotter, frame)
+    return capsysbinary.readouterr().out
+
+
+@pytest.mark.parametrize("y_max", [1.2e5, -1e5, 1.2e8, 0.5])
+def test_retained_figure_matches_new_figure(y_max, capsysbinary):
+    args = parser.parse_args(["run.csv", "--as-raw-bytes"])
+    retained = MatplotlibPlot(args)
+    _render(retained, _frame(1.0), capsysbinary)
+
+    # e.g. the wider tick labels of the new range need a new layout
+    assert _render(retained, _frame(y_max), capsysbinary) == _render(
+        MatplotlibPlot(args), _frame(y_max), capsysbinary
+    )
+
+
+def _grid_frame(i: int) -> Frame:
+    """A 2x3 grid, where a different subplot (and range) changes in every frame."""
+    x = np.arange(200)
+    subplots = []
+    for row in (1, 2):
+        for col in (1, 2, 3):
+            scale = 10.0 ** ((row * col + i) % 6) if (row + col + i) % 3 == 0 else 1.0
+            line = Line(x, scale * np.sin(x / (5.0 * col + row)), "a", "C0", "loss")
+            subplot = Subplot(row, col, f"run {col}" if row == 1 else None, [line])
+            subplots.append(subplot._replace(fingerprint=subplot_fingerprint(subplot)))
+    return Frame(None, 2, 3, subplots)
+
+
+def test_tiled_rendering_does_not_depend_on_the_number_of_workers(capsysbinary):
+    from termplot.main import create_matplotlib_plotter
+
+    def plotter(n_workers):
+        args = parser.parse_args(
+            ["run.csv", "--as-raw-bytes", "--tile-columns", "1"]
+            + ["--render-workers", str(n_workers), "--plotsize", "9,4"]
+        )
+        return create_matplotlib_plotter(args, terminal=False)
+
+    single, pooled = plotter(1), plotter(3)
+    try:
+        for i in range(5):
+            frame = _grid_frame(i)
+            assert _render(single, frame, capsysbinary) == _render(
+                pooled, frame, capsysbinary
+            ), f"frame {i}"
+    finally:
+        single.teardown()
+        pooled.teardown()
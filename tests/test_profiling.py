@@ -0,0 +1,30 @@
+import json
+import threading
+
+from termplot.profiling import Profiler
+
+
+def test_concurrent_refreshes_with_cprofile(tmp_path):
+    profiler = Profiler()
+    profiler.configure(str(tmp_path / "profile.jsonl"), str(tmp_path / "stats"))
+
+    errors = []
+
+    def load():
+        try:
+            with profiler.refresh("prepare"):
+                pass
+        except Exception as e:
+            errors.append(e)
+
+    # e.g. the loader of the pipelined --follow loop, while the main thread renders
+    with profiler.refresh("render"):
+        loader = threading.Thread(target=load)
+        loader.start()
+        loader.join()
+
+    assert errors == []
+    with open(tmp_path / "profile.jsonl") as f:
+        phases = [json.loads(line)["phase"] for line in f]
+    assert phases == ["prepare", "render"]
+    assert (tmp_path / "stats").exists()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from termplot.smoothing import SeriesSmoother, savgol_window
+
+
+def test_ema_weight_of_one_is_rejected():
+    with pytest.raises(ValueError):
+        SeriesSmoother("ema", 1.0)
+    # i.e. the window of the whole series
+    SeriesSmoother("savgol", 1.0)
+
+
+class _Figure:
+    pass
+
+
+def _series(n):
+    return np.sin(np.arange(n) / 10.0) + np.random.default_rng(0).normal(0, 0.1, n)
+
+
+def _smooth_appended(smoother, y, chunk_sizes):
+    """Smooth the series as it grows by the given chunks, i.e. as with --follow."""
+    figure = _Figure()
+    n = 0
+    for size in chunk_sizes:
+        n += size
+        smoothed = smoother(figure, "loss", y[:n])
+    return smoothed
+
+
+def test_ema():
+    y = _series(500)
+    y[[10, 200]] = np.nan
+    smoothed = _smooth_appended(SeriesSmoother("ema", 0.9), y, [1, 99, 3, 397])
+
+    # as tensorboard, where non-finite values do not affect the average
+    expected, last, n = [], 0.0, 0
+    for value in y:
+        if not np.isfinite(value):
+            expected.append(value)
+            continue
+        last = 0.9 * last + 0.1 * value
+        n += 1
+        expected.append(last / (1 - 0.9**n))
+    assert np.allclose(smoothed, expected, equal_nan=True)
+
+
+def test_rolling():
+    import pandas as pd
+
+    y = _series(500)
+    smoothed = _smooth_appended(
+        SeriesSmoother("rolling", 0.05, window=10), y, [3, 100, 1, 396]
+    )
+    assert np.allclose(smoothed, pd.Series(y).rolling(10, min_periods=1).mean())
+
+
+def test_savgol():
+    pytest.importorskip("scipy")
+    from scipy.signal import savgol_filter
+
+    y = _series(1000)
+    # the window is kept while the series grows by a few percent
+    smoothed = _smooth_appended(SeriesSmoother("savgol", 0.05), y, [990, 1, 5, 4])
+    window = savgol_window(990, 0.05, 3)
+    assert np.allclose(smoothed, savgol_filter(y, window, 3, mode="interp"))
+
+    # and is updated past that
+    smoothed = _smooth_appended(SeriesSmoother("savgol", 0.05), y, [500, 500])
+    window = savgol_window(1000, 0.05, 3)
+    assert np.allclose(smoothed, savgol_filter(y, window, 3, mode="interp"))
+
+
+def test_changed_series_is_smoothed_again():
+    smoother = SeriesSmoother("rolling", 0.05, window=3)
+    figure = _Figure()
+    smoother(figure, "loss", np.array([1.0, 2.0, 3.0]))
+    # e.g. the file had been re-written
+    assert np.allclose(smoother(figure, "loss", np.array([5.0, 5.0, 5.0, 5.0])), 5.0)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from termplot.main import Line, Subplot, subplot_fingerprint
+
+
+def _subplot(x, y):
+    return Subplot(1, 1, "loss", [Line(x, y, "loss", "blue", "loss")])
+
+
+def test_datetime_column():
+    x = pd.to_datetime(
+        ["2024-01-01 00:00:00", "2024-01-01 00:01:00", "2024-01-01 00:02:00"]
+    ).to_numpy()
+    y = np.array([1.0, 0.5, 0.3])
+
+    assert subplot_fingerprint(_subplot(x, y)) == subplot_fingerprint(
+        _subplot(x.copy(), y)
+    )
+    assert subplot_fingerprint(_subplot(x, y)) != subplot_fingerprint(
+        _subplot(x + np.timedelta64(1, "s"), y)
+    )
+    # the same instants, in another unit
+    assert subplot_fingerprint(_subplot(x, y)) != subplot_fingerprint(
+        _subplot(x.astype("datetime64[s]"), y)
+    )
+
+
+def test_timedelta_column():
+    x = np.array([0, 60, 120], dtype="timedelta64[s]")
+    y = np.array([1.0, 0.5, 0.3])
+
+    assert subplot_fingerprint(_subplot(x, y)) != subplot_fingerprint(
+        _subplot(x * 2, y)
+    )
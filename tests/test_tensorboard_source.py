@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from termplot.main import parser
+
+pytest.importorskip("tensorboard")
+
+from tensorboard.compat.proto import event_pb2, summary_pb2  # noqa: E402
+from tensorboard.summary.writer.event_file_writer import EventFileWriter  # noqa: E402
+
+from termplot.data_source import tensorboard_source  # noqa: E402
+
+
+def _write_scalars(folder, tag, values):
+    writer = EventFileWriter(str(folder))
+    for step, value in enumerate(values):
+        summary = summary_pb2.Summary(
+            value=[summary_pb2.Summary.Value(tag=tag, simple_value=value)]
+        )
+        writer.add_event(
+            event_pb2.Event(wall_time=1000.0 + step, step=step, summary=summary)
+        )
+    writer.close()
+
+
+def test_tensorboard_reader_reduces_once_per_refresh(tmp_path, monkeypatch):
+    values = np.sin(np.arange(1000) / 10.0)
+    _write_scalars(tmp_path, "loss", values)
+    args = parser.parse_args(
+        [str(tmp_path), "--tensorboard-reader", "tensorboard"]
+        + ["--tensorboard-max-points", "50"]
+    )
+    n_calls = []
+    minmax_indices = tensorboard_source.minmax_indices
+    monkeypatch.setattr(
+        tensorboard_source,
+        "minmax_indices",
+        lambda *args, **kwargs: n_calls.append(1) or minmax_indices(*args, **kwargs),
+    )
+    (figure,) = tensorboard_source.TensorboardDataSource(tmp_path, args)
+
+    steps, vals = figure.get_series(x="step", y="loss")
+    assert len(steps) <= 50
+    assert vals.max() == pytest.approx(values.max())
+    assert vals.min() == pytest.approx(values.min())
+    figure.get_series(x="time", y="loss")
+    figure.get_series(x="step", y="loss")
+    assert len(n_calls) == 1
+
+    figure.refresh()
+    figure.get_series(x="step", y="loss")
+    assert len(n_calls) == 2
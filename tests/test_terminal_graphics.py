@@ -0,0 +1,139 @@
+import base64
+import io
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from termplot.backend.terminal_graphics import (
+    KittyImageWriter,
+    SixelImageWriter,
+    changed_regions,
+)
+
+
+def _image(height, width, color=(255, 255, 255)):
+    rgba = np.full((height, width, 4), 255, dtype=np.uint8)
+    rgba[..., :3] = color
+    return rgba
+
+
+def _kitty_commands(out: bytes):
+    """The (control keys, decompressed payload) of every (chunked) kitty command."""
+    commands = []
+    for keys, chunk in re.findall(rb"\x1b_G([^;\x1b]*);?([^\x1b]*)\x1b\\", out):
+        keys = dict(key.split(b"=") for key in keys.split(b","))
+        if commands and commands[-1][0].get(b"m") == b"1":
+            # continuation of the previous command
+            commands[-1][0][b"m"] = keys[b"m"]
+            commands[-1][1].append(chunk)
+        else:
+            commands.append((keys, [chunk]))
+    return [
+        (
+            (keys, zlib.decompress(base64.standard_b64decode(b"".join(chunks))))
+            if b"o" in keys
+            else (keys, b"")
+        )
+        for keys, chunks in commands
+    ]
+
+
+def test_kitty_transmits_the_first_frame_in_full():
+    stream = io.BytesIO()
+    rgba = np.random.default_rng(0).integers(0, 256, (60, 80, 4), dtype=np.uint8)
+    KittyImageWriter(stream, image_id=7).write(rgba)
+
+    ((keys, payload),) = _kitty_commands(stream.getvalue())
+    assert keys[b"a"] == b"T"
+    assert (keys[b"s"], keys[b"v"], keys[b"i"]) == (b"80", b"60", b"7")
+    assert payload == rgba.tobytes()
+    # the (random, i.e. incompressible) payload is chunked
+    assert stream.getvalue().count(b"m=1") > 0
+
+
+def test_kitty_sends_the_changed_regions_only():
+    stream = io.BytesIO()
+    writer = KittyImageWriter(stream, image_id=7)
+    previous = _image(100, 50)
+    writer.write(previous)
+    stream.seek(0)
+    stream.truncate()
+
+    current = previous.copy()
+    current[10:12, 5:9, :3] = 0
+    current[80, 40, :3] = 0
+    writer.write(current)
+
+    commands = _kitty_commands(stream.getvalue())
+    assert [keys[b"a"] for keys, _ in commands] == [b"f", b"f"]
+    for (keys, payload), (y0, y1, x0, x1) in zip(
+        commands, [(10, 12, 5, 9), (80, 81, 40, 41)]
+    ):
+        assert (keys[b"x"], keys[b"y"]) == (str(x0).encode(), str(y0).encode())
+        assert (keys[b"s"], keys[b"v"]) == (
+            str(x1 - x0).encode(),
+            str(y1 - y0).encode(),
+        )
+        assert payload == current[y0:y1, x0:x1].tobytes()
+
+    # an identical frame is not sent at all
+    stream.seek(0)
+    stream.truncate()
+    writer.write(current.copy())
+    assert stream.getvalue() == b""
+
+
+def test_kitty_retransmits_a_resized_frame():
+    stream = io.BytesIO()
+    writer = KittyImageWriter(stream, image_id=7)
+    writer.write(_image(10, 10))
+    stream.seek(0)
+    stream.truncate()
+    writer.write(_image(20, 10))
+
+    (delete, _), (keys, payload) = _kitty_commands(stream.getvalue())
+    assert (delete[b"a"], delete[b"d"], delete[b"i"]) == (b"d", b"I", b"7")
+    assert (keys[b"a"], keys[b"v"]) == (b"T", b"20")
+    assert payload == _image(20, 10).tobytes()
+
+
+def test_changed_regions():
+    previous = _image(100, 50)
+    current = previous.copy()
+    assert changed_regions(previous, current, gap=16) == []
+
+    current[10, 3, 0] = 0
+    current[20, 7, 1] = 0
+    # further than the gap from the rows above
+    current[40:42, 30, 2] = 0
+    assert changed_regions(previous, current, gap=16) == [
+        (10, 21, 3, 8),
+        (40, 42, 30, 31),
+    ]
+    assert changed_regions(previous, current, gap=5) == [
+        (10, 11, 3, 4),
+        (20, 21, 7, 8),
+        (40, 42, 30, 31),
+    ]
+
+
+def test_sixel():
+    pytest.importorskip("PIL")
+    rgba = _image(7, 5)
+    rgba[1:3, 1:4, :3] = (255, 0, 0)
+    rgba[6, :, :3] = (0, 0, 255)
+    stream = io.BytesIO()
+    SixelImageWriter(stream).write(rgba)
+
+    assert stream.getvalue() == (
+        b'\x1bP0;1;0q"1;1;5;7'
+        # the palette, in RGB percentages
+        b"#0;2;100;100;100#1;2;100;0;0#2;2;0;0;100"
+        # the first band of 6 rows
+        b"#0~xxx~$#1?EEE$-"
+        # the second band, i.e. the last row
+        b"#2!5@$-"
+        b"\x1b\\"
+    )
@@ -0,0 +1,114 @@
+import struct
+
+import numpy as np
+import pytest
+
+from termplot.data_source.tfevents import ScalarEventAccumulator
+
+
+def _varint(n: int) -> bytes:
+    n &= (1 << 64) - 1
+    out = b""
+    while True:
+        if n < 0x80:
+            return out + bytes([n])
+        out += bytes([n & 0x7F | 0x80])
+        n >>= 7
+
+
+def _length_delimited(field: int, payload: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _event(wall_time: float, step: int, values) -> bytes:
+    summary = b""
+    for tag, value in values:
+        summary += _length_delimited(
+            1,
+            _length_delimited(1, tag.encode())
+            # e.g. the (unused) node name, which is skipped
+            + _length_delimited(7, b"node")
+            + _varint(2 << 3 | 5)
+            + struct.pack("<f", value),
+        )
+    return (
+        _varint(1 << 3 | 1)
+        + struct.pack("<d", wall_time)
+        + _varint(2 << 3 | 0)
+        + _varint(step)
+        # e.g. the file version of the first event, which is skipped
+        + _length_delimited(3, b"brain.Event:2")
+        + _length_delimited(5, summary)
+    )
+
+
+def _record(data: bytes) -> bytes:
+    # the crcs are not checked
+    return struct.pack("<QI", len(data), 0) + data + b"\0\0\0\0"
+
+
+def test_scalars(tmp_path):
+    path = tmp_path / "events.out.tfevents.1"
+    path.write_bytes(
+        _record(_event(10.0, 0, [("loss", 1.0), ("lr", 0.1)]))
+        + _record(_event(11.0, 1, [("loss", 0.5)]))
+        + _record(_event(12.0, -1, [("loss", 0.25), ("lr", 0.01)]))
+    )
+    ea = ScalarEventAccumulator(str(tmp_path)).Reload()
+
+    assert ea.Tags() == {"scalars": ["loss", "lr"]}
+    assert np.array_equal(
+        ea.Scalars("loss"), [[10.0, 0, 1.0], [11.0, 1, 0.5], [12.0, -1, 0.25]]
+    )
+    assert np.allclose(ea.Scalars("lr"), [[10.0, 0, 0.1], [12.0, -1, 0.01]])
+
+
+def test_tag_filter(tmp_path):
+    path = tmp_path / "events.out.tfevents.1"
+    path.write_bytes(_record(_event(10.0, 0, [("loss", 1.0), ("lr", 0.1)])))
+    ea = ScalarEventAccumulator(str(tmp_path), tag_filter=lambda tag: tag != "lr")
+
+    assert ea.Reload().Tags() == {"scalars": ["loss"]}
+
+
+def test_reload_resumes_after_an_incomplete_record(tmp_path):
+    path = tmp_path / "events.out.tfevents.1"
+    second = _record(_event(11.0, 1, [("loss", 0.5)]))
+    path.write_bytes(_record(_event(10.0, 0, [("loss", 1.0)])) + second[:10])
+    ea = ScalarEventAccumulator(str(path)).Reload()
+    assert len(ea.Scalars("loss")) == 1
+
+    with open(path, "ab") as f:
+        f.write(second[10:])
+    assert np.array_equal(ea.Reload().Scalars("loss")[:, 1], [0, 1])
+
+
+def test_same_scalars_as_tensorboard(tmp_path):
+    pytest.importorskip("tensorboard")
+    from tensorboard.backend.event_processing.event_accumulator import (
+        EventAccumulator,
+    )
+    from tensorboard.compat.proto import event_pb2, summary_pb2
+    from tensorboard.summary.writer.event_file_writer import EventFileWriter
+
+    writer = EventFileWriter(str(tmp_path))
+    for step in range(100):
+        summary = summary_pb2.Summary(
+            value=[
+                summary_pb2.Summary.Value(tag="loss", simple_value=1 / (step + 1)),
+                summary_pb2.Summary.Value(tag="acc/top1", simple_value=step / 100),
+            ]
+        )
+        writer.add_event(
+            event_pb2.Event(wall_time=1000.0 + step, step=step, summary=summary)
+        )
+    writer.close()
+
+    expected = EventAccumulator(str(tmp_path)).Reload()
+    ea = ScalarEventAccumulator(str(tmp_path)).Reload()
+    assert sorted(ea.Tags()["scalars"]) == sorted(expected.Tags()["scalars"])
+    for tag in ea.Tags()["scalars"]:
+        assert np.array_equal(
+            ea.Scalars(tag),
+            [[e.wall_time, e.step, e.value] for e in expected.Scalars(tag)],
+        )